@@ -0,0 +1,116 @@
+# Copyright (c) 2024 Sungkyunkwan University AutomationLab
+#
+# Authors:
+# - Gyuhyeon Hwang <rbgus7080@g.skku.edu>, Hobin Oh <hobin0676@daum.net>, Minkwan Choi <arbong97@naver.com>, Hyeonjin Sim <nufxwms@naver.com>
+# - url: https://micro.skku.ac.kr/micro/index.do
+
+import time
+import numpy as np
+
+FILTER_MEDIAN = 'median'
+FILTER_EMA = 'ema'
+
+
+class AdcSampler:
+    """
+    조향 가변저항 ADC 샘플러
+
+    SPI 전송 한 번(2바이트)에 샘플 하나를 읽어 미리 할당한 링 버퍼에 넣고,
+    최근 window개의 중앙값 또는 지수 이동 평균을 돌려준다. MCP3201처럼 CS를
+    올렸다 내려야 다음 변환을 하는 ADC가 기본이므로 필터는 호출 간 샘플로 동작한다.
+    samples_per_read > 1(한 전송에 2바이트마다 새 변환 값)은 ADC가 CS를 유지한 채
+    연속 변환하는 것이 실제 보드에서 확인된 경우에만 켠다.
+    """
+
+    def __init__(self, spi, samples_per_read=1, window=5, filter_type=FILTER_MEDIAN,
+                 ema_alpha=0.3, history=64):
+        """
+        Args:
+            spi: xfer2()를 제공하는 SPI 객체
+            samples_per_read: 전송 1회당 샘플 수 (1 이외는 연속 변환 ADC에서만)
+            window: 중앙값 필터 창 크기 (history 이하)
+            filter_type: FILTER_MEDIAN 또는 FILTER_EMA
+            ema_alpha: 지수 이동 평균 계수 (0~1, 클수록 최신 값 비중이 큼)
+            history: 보관할 최근 원시 샘플 수
+        """
+        self.spi = spi
+        self.samples_per_read = samples_per_read
+        self.window = min(window, history)
+        self.filter_type = filter_type
+        self.ema_alpha = ema_alpha
+        self.history = history
+
+        self._request = [0x00] * (2 * samples_per_read)
+        # 같은 샘플을 i와 i + history에 써서 최근 window개가 항상 연속 구간이 되도록 함
+        self._ring = np.zeros(2 * history, dtype=np.int32)
+        self._scratch = np.zeros(self.window, dtype=np.int32)
+        self._index = 0
+
+        # 상태 / 통계
+        self.value = None
+        self.last_raw = None
+        self.reads = 0
+        self.samples = 0
+        self.read_rate_hz = 0.0
+        self._last_read_at = None
+
+    def _push(self, sample):
+        index = self._index
+        self._ring[index] = sample
+        self._ring[index + self.history] = sample
+        self._index = (index + 1) % self.history
+        self.samples += 1
+
+    def recent(self, count=None):
+        """최근 원시 샘플 (오래된 것부터, 링 버퍼 view)"""
+        count = min(count or self.history, self.samples, self.history)
+        end = self._index + self.history
+        return self._ring[end - count:end]
+
+    def read(self):
+        """
+        샘플을 읽어 필터링한 ADC 값 반환
+
+        Returns:
+            필터링된 12bit ADC 값 (float, 아직 샘플이 없으면 None)
+        """
+        response = self.spi.xfer2(self._request)
+        sample = None
+        for i in range(0, len(response) - 1, 2):
+            sample = ((response[i] & 0x0F) << 8) | response[i + 1]
+            self._push(sample)
+            if self.filter_type == FILTER_EMA:
+                self.value = sample if self.value is None else \
+                    self.value + self.ema_alpha * (sample - self.value)
+        if sample is None:
+            # 응답이 2바이트 미만이면 새 샘플 없이 이전 값 유지
+            return self.value
+        self.last_raw = sample
+
+        if self.filter_type == FILTER_MEDIAN:
+            window = self.recent(self.window)
+            scratch = self._scratch[:window.size]
+            scratch[...] = window
+            scratch.sort()
+            self.value = float(scratch[window.size // 2])
+
+        now = time.perf_counter()
+        if self._last_read_at is not None:
+            interval = now - self._last_read_at
+            if interval > 0:
+                rate = 1.0 / interval
+                self.read_rate_hz = rate if self.reads == 1 else self.read_rate_hz + 0.05 * (rate - self.read_rate_hz)
+        self._last_read_at = now
+        self.reads += 1
+        return self.value
+
+    def get_stats(self):
+        """읽기 횟수, 샘플 수, 읽기/샘플 속도 추정 (Hz), 최근 값"""
+        return {
+            'reads': self.reads,
+            'samples': self.samples,
+            'read_rate_hz': self.read_rate_hz,
+            'sample_rate_hz': self.read_rate_hz * self.samples_per_read,
+            'last_raw': self.last_raw,
+            'filtered': self.value,
+        }
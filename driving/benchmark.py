@@ -0,0 +1,232 @@
+# Copyright (c) 2024 Sungkyunkwan University AutomationLab
+#
+# Authors:
+# - Gyuhyeon Hwang <rbgus7080@g.skku.edu>, Hobin Oh <hobin0676@daum.net>, Minkwan Choi <arbong97@naver.com>, Hyeonjin Sim <nufxwms@naver.com>
+# - url: https://micro.skku.ac.kr/micro/index.do
+
+"""
+주행 코드 프레임 처리 시간 벤치마크
+
+segmentation/test_data 이미지나 비디오를 실제 ImageProcessor / MotorController
+코드 경로로 재생하고, DPU와 MMIO/SPI는 대체품을 사용한다.
+단계별 p50/p95/p99 지연 시간, FPS, 할당량, 프레임당 MMIO 쓰기 수를 JSON으로 출력한다.
+
+사용 예:
+    python benchmark.py --images ../segmentation/test_data --frames 300 --output before.json
+    python benchmark.py --video ../test_video/test_video.mp4 --dpu-latency 0.015
+    python benchmark.py --trace-output after_trace.npz --adc-replay before_trace.npz
+"""
+
+import os
+import gc
+import sys
+import glob
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+import cv2
+import numpy as np
+
+from config import anchors
+from image_processor import ImageProcessor
+from motor_controller import MotorController
+from sim_dpu import SimDpuRunner
+from fake_hardware import HardwareTrace, FakeSpiDev, make_fake_motors, TRACE_WRITE, TRACE_ADC
+
+STAGES = ['bird_convert', 'pre_process', 'dpu', 'evaluate', 'detect_lane_center_x', 'control_motors']
+
+
+def load_frames(images=None, video=None, frame_size=(640, 480), max_frames=None):
+    """벤치마크용 프레임 목록 로드 (카메라 해상도로 리사이즈)"""
+    frames = []
+    if video:
+        cap = cv2.VideoCapture(video)
+        while max_frames is None or len(frames) < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(cv2.resize(frame, frame_size))
+        cap.release()
+    else:
+        for path in sorted(glob.glob(os.path.join(images, '*.jpg'))):
+            frame = cv2.imread(path)
+            if frame is not None:
+                frames.append(cv2.resize(frame, frame_size))
+    if not frames:
+        raise FileNotFoundError("벤치마크에 사용할 프레임이 없습니다.")
+    return frames
+
+
+def run_frame(image_processor, motor_controller, frame, timings=None, allocations=None):
+    """
+    한 프레임을 단계별로 실행하며 시간(초)과 할당량(byte)을 기록
+
+    Args:
+        timings: 단계별 시간을 기록할 (단계 수,) 배열 (None이면 기록 안 함)
+        allocations: 단계별 최대 할당량을 기록할 (단계 수,) 배열 (tracemalloc 실행 중일 때)
+    """
+    ip = image_processor
+    h, w = frame.shape[0], frame.shape[1]
+
+    def mark(stage, start, base):
+        if timings is not None:
+            timings[stage] = time.perf_counter() - start
+        if allocations is not None:
+            current, peak = tracemalloc.get_traced_memory()
+            allocations[stage] = max(0, peak - base)
+            tracemalloc.reset_peak()
+            return current
+        return base
+
+    base = tracemalloc.get_traced_memory()[0] if allocations is not None else 0
+
+    t = time.perf_counter()
+    roi = ip.warp_engine.warp(frame, ip.src_mat, ip.get_dst_mat(w, h), out=ip.roi_buffers[0])
+    base = mark(0, t, base)
+
+    t = time.perf_counter()
+    ip.preprocessors[0](roi)
+    base = mark(1, t, base)
+
+    t = time.perf_counter()
+    ip.wait(ip.submit(0))
+    base = mark(2, t, base)
+
+    t = time.perf_counter()
+    boxes, scores, classes = ip.detect(0)
+    base = mark(3, t, base)
+
+    t = time.perf_counter()
+    angle = ip.lane_angle(boxes)
+    base = mark(4, t, base)
+
+    t = time.perf_counter()
+    with motor_controller.batch_writes():
+        motor_controller.control_motors(angle, control_mode=1)
+    mark(5, t, base)
+
+
+def summarize(samples_ms):
+    """지연 시간 표본(ms) 요약"""
+    return {
+        'p50': float(np.percentile(samples_ms, 50)),
+        'p95': float(np.percentile(samples_ms, 95)),
+        'p99': float(np.percentile(samples_ms, 99)),
+        'mean': float(samples_ms.mean()),
+        'max': float(samples_ms.max()),
+    }
+
+
+def run_benchmark(frames, num_frames=200, warmup=10, dpu_latency=0.0, dpu_recordings=None,
+                  num_classes=1, alloc_frames=50, adc_replay=None, trace_output=None):
+    """
+    벤치마크 실행
+
+    Args:
+        adc_replay: 재생할 ADC 값이 들어 있는 trace 파일 (None이면 중앙값 고정)
+        trace_output: 측정 구간 MMIO/SPI trace를 저장할 파일
+
+    Returns:
+        결과 딕셔너리 (JSON 직렬화 가능)
+    """
+    if dpu_recordings:
+        dpu = SimDpuRunner.from_recordings(dpu_recordings, latency=dpu_latency)
+        num_classes = dpu.get_output_tensors()[0].dims[3] // 3 - 5
+    else:
+        channels = 3 * (num_classes + 5)
+        dpu = SimDpuRunner(output_shapes=((1, 8, 8, channels), (1, 16, 16, channels)), latency=dpu_latency)
+
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+        f.write('\n'.join(f'lane_{i}' for i in range(num_classes)))
+        classes_path = f.name
+
+    trace = HardwareTrace()
+    motors = make_fake_motors(trace)
+    if adc_replay:
+        spi = FakeSpiDev.from_trace(HardwareTrace.load(adc_replay), trace)
+    else:
+        spi = FakeSpiDev(trace)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        image_processor = ImageProcessor(dpu, classes_path, anchors)
+        motor_controller = MotorController(motors, spi=spi)
+        motor_controller.init_motors()
+        motor_controller.steering_speed = 50
+    os.unlink(classes_path)
+
+    timings = np.zeros((num_frames, len(STAGES)), dtype=np.float64)
+    allocations = np.zeros((alloc_frames, len(STAGES)), dtype=np.float64)
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for i in range(warmup):
+            run_frame(image_processor, motor_controller, frames[i % len(frames)])
+
+        trace.clear()
+        gc_before = sum(stat['collections'] for stat in gc.get_stats())
+        start = time.perf_counter()
+        for i in range(num_frames):
+            run_frame(image_processor, motor_controller, frames[i % len(frames)], timings=timings[i])
+        elapsed = time.perf_counter() - start
+        gc_collections = sum(stat['collections'] for stat in gc.get_stats()) - gc_before
+
+        # 할당량은 tracemalloc 오버헤드가 시간 측정에 섞이지 않도록 따로 측정
+        trace.enabled = False
+        tracemalloc.start()
+        for i in range(alloc_frames):
+            run_frame(image_processor, motor_controller, frames[i % len(frames)], allocations=allocations[i])
+        tracemalloc.stop()
+
+    if trace_output:
+        trace.save(trace_output)
+    records = trace.view()
+
+    timings_ms = timings * 1000.0
+    result = {
+        'frames': num_frames,
+        'fps': num_frames / elapsed,
+        'dpu_latency_ms': dpu_latency * 1000.0,
+        'gc_collections': gc_collections,
+        'mmio_writes_per_frame': int((records['kind'] == TRACE_WRITE).sum()) / num_frames,
+        'adc_samples_per_frame': int((records['kind'] == TRACE_ADC).sum()) / num_frames,
+        'total_ms': summarize(timings_ms.sum(axis=1)),
+        'stages': {},
+    }
+    for i, stage in enumerate(STAGES):
+        result['stages'][stage] = summarize(timings_ms[:, i])
+        result['stages'][stage]['alloc_bytes_p50'] = float(np.percentile(allocations[:, i], 50))
+        result['stages'][stage]['alloc_bytes_max'] = float(allocations[:, i].max())
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="주행 코드 프레임 처리 시간 벤치마크")
+    parser.add_argument('--images', default='../segmentation/test_data', help="테스트 이미지 디렉터리")
+    parser.add_argument('--video', default=None, help="테스트 비디오 경로 (지정 시 이미지 대신 사용)")
+    parser.add_argument('--frames', type=int, default=200, help="측정 프레임 수")
+    parser.add_argument('--warmup', type=int, default=10, help="워밍업 프레임 수")
+    parser.add_argument('--dpu-latency', type=float, default=0.0, help="DPU 추론 지연 시간 (초)")
+    parser.add_argument('--dpu-recordings', default=None, help="녹화된 DPU 출력 디렉터리")
+    parser.add_argument('--num-classes', type=int, default=1, help="합성 DPU 출력 클래스 수")
+    parser.add_argument('--adc-replay', default=None, help="ADC 값을 재생할 trace 파일")
+    parser.add_argument('--trace-output', default=None, help="MMIO/SPI trace 저장 파일 (.npz)")
+    parser.add_argument('--output', default=None, help="JSON 결과 파일 (없으면 표준 출력)")
+    args = parser.parse_args()
+
+    frames = load_frames(args.images, args.video, max_frames=args.frames)
+    result = run_benchmark(frames, args.frames, args.warmup, args.dpu_latency,
+                           args.dpu_recordings, args.num_classes,
+                           adc_replay=args.adc_replay, trace_output=args.trace_output)
+    result['source'] = args.video or args.images
+
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text + '\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# Copyright (c) 2024 Sungkyunkwan University AutomationLab
+#
+# Authors:
+# - Gyuhyeon Hwang <rbgus7080@g.skku.edu>, Hobin Oh <hobin0676@daum.net>, Minkwan Choi <arbong97@naver.com>, Hyeonjin Sim <nufxwms@naver.com>
+# - url: https://micro.skku.ac.kr/micro/index.do
+
+import time
+import threading
+from collections import deque
+import cv2
+
+
+class CameraGrabber:
+    """
+    별도 스레드에서 카메라를 계속 비우고 항상 최신 프레임만 넘겨주는 캡처기
+
+    제어 루프가 늦어져도 OpenCV 내부 버퍼에 오래된 프레임이 쌓이지 않는다.
+    비디오 파일은 원래 FPS(또는 replay_rate 배속)에 맞춰 재생한다.
+    """
+
+    def __init__(self, source, width=640, height=480, ring_size=0, replay_rate=1.0):
+        """
+        Args:
+            source: 카메라 인덱스(int) 또는 비디오 파일 경로
+            width, height: 카메라 해상도 (비디오 파일은 무시)
+            ring_size: 디버깅용으로 보관할 최근 프레임 수 (0이면 보관 안 함)
+            replay_rate: 비디오 재생 배속 (None이면 최대 속도)
+        """
+        self.source = source
+        self.is_file = isinstance(source, str)
+        self.replay_rate = replay_rate
+
+        self.cap = cv2.VideoCapture(source)
+        if not self.is_file:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            # 드라이버 버퍼를 최소화 (지원하지 않는 백엔드는 무시)
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        self.ring = deque(maxlen=ring_size) if ring_size > 0 else None
+
+        self._cond = threading.Condition()
+        self._frame = None
+        self._timestamp = None
+        self._seq = 0
+        self._read_seq = 0
+        self._thread = None
+        self.running = False
+        self.finished = False
+        self.frames_grabbed = 0
+
+    def isOpened(self):
+        """캡처 장치/파일 열림 여부"""
+        return self.cap.isOpened()
+
+    def start(self):
+        """캡처 스레드 시작"""
+        if self._thread is not None:
+            return self
+        self.running = True
+        self.finished = False
+        self._thread = threading.Thread(target=self._grab_loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """캡처 스레드 정지"""
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def release(self):
+        """스레드 정지 후 장치 해제"""
+        self.stop()
+        self.cap.release()
+
+    def _grab_loop(self):
+        """장치에서 프레임을 계속 읽어 최신 프레임 갱신"""
+        frame_period = None
+        if self.is_file and self.replay_rate:
+            fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+            frame_period = 1.0 / (fps * self.replay_rate)
+        next_time = time.perf_counter()
+
+        while self.running:
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            timestamp = time.perf_counter()
+
+            with self._cond:
+                self._frame = frame
+                self._timestamp = timestamp
+                self._seq += 1
+                self.frames_grabbed += 1
+                if self.ring is not None:
+                    self.ring.append((timestamp, frame))
+                self._cond.notify_all()
+
+            if frame_period is not None:
+                # 비디오 파일은 재생 속도에 맞춰 대기 (누적 오차 없이)
+                next_time += frame_period
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_time = time.perf_counter()
+
+        with self._cond:
+            self.finished = True
+            self._cond.notify_all()
+
+    def read(self, timeout=1.0):
+        """
+        아직 넘겨주지 않은 가장 최신 프레임 반환 (새 프레임이 올 때까지 대기)
+
+        Returns:
+            (ret, frame, timestamp) - timestamp는 time.perf_counter() 기준 캡처 시각
+        """
+        if self._thread is None:
+            self.start()
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq != self._read_seq or self.finished, timeout):
+                return False, None, None
+            if self._seq == self._read_seq:
+                return False, None, None
+            self._read_seq = self._seq
+            return True, self._frame, self._timestamp
+
+    def recent_frames(self):
+        """링 버퍼에 보관된 최근 (timestamp, frame) 목록"""
+        with self._cond:
+            return list(self.ring) if self.ring is not None else []
@@ -5,26 +5,45 @@
 # - url: https://micro.skku.ac.kr/micro/index.do
 
 import cv2
-import time
-import keyboard
+import signal
 from threading import Lock
 
 from image_processor import ImageProcessor
-from motor_controller import MotorController
+from motor_controller import MotorController, STEERING_BANG_BANG, STEERING_PID
+from frame_pipeline import FramePipeline
+from camera_grabber import CameraGrabber
+from steering_servo import SteeringServo
+from key_input import KeyInput
+from frame_scheduler import FrameScheduler, LEVEL_REDUCED
+from stage_profiler import StageProfiler
 from config import classes_path, anchors 
 
 
 
 class DrivingSystemController:
-    def __init__(self, dpu_overlay, dpu, motors, speed, steering_speed):
+    def __init__(self, dpu_overlay, dpu, motors, speed, steering_speed, steering_mode=STEERING_BANG_BANG, spi=None,
+                 key_input=None, control_rate_hz=30):
         """
         자율주행 차량 시스템 초기화
         Args:
             dpu_overlay: DPU 오버레이 객체
+            steering_mode: 자율주행 조향 방식 (STEERING_BANG_BANG / STEERING_PID)
+            spi: 공유 SPI (HardwareSession.spi, None이면 MotorController가 직접 열기)
+            key_input: 키 입력 (KeyInput / ScriptedKeySource, None이면 키보드 훅)
+            control_rate_hz: 인식/제어 루프 주기 (Hz)
         """
-        self.image_processor = ImageProcessor(dpu, classes_path, anchors)
-        self.motor_controller = MotorController(motors)
+        # 영상 처리/모터 제어 구간별 지연 시간 히스토그램 (P 키 또는 SIGUSR1로 출력)
+        self.profiler = StageProfiler()
+        
+        # 파이프라인 모드에서 DPU 입력/출력을 번갈아 쓰도록 버퍼 2세트 할당
+        self.image_processor = ImageProcessor(dpu, classes_path, anchors, num_buffers=2, profiler=self.profiler)
+        self.motor_controller = MotorController(motors, spi=spi, profiler=self.profiler, steering_mode=steering_mode)
+        # 조향은 영상 처리 주기와 별도로 500Hz 스레드에서 제어
+        self.steering_servo = SteeringServo(self.motor_controller, rate_hz=500)
+        self.motor_controller.steering_servo = self.steering_servo
         self.overlay = dpu_overlay
+        # 키 눌림/뗌 이벤트 입력 (제어 루프를 막지 않음)
+        self.keys = key_input if key_input is not None else KeyInput()
         
         # 제어 상태 변수
         self.is_running = False
@@ -34,6 +53,11 @@ class DrivingSystemController:
         self.speed = speed
         self.steering_speed = steering_speed
         
+        # 제어 주기 / 마감 관리 (예산 초과 시 단계적으로 처리량 축소)
+        self.scheduler = FrameScheduler(rate_hz=control_rate_hz, on_level_change=self.apply_degradation)
+        self.last_slope = None
+        self.default_nms_topk = self.image_processor.nms_topk
+        
         # 시스템 초기화
         self.init_system()
         
@@ -47,20 +71,23 @@ class DrivingSystemController:
             self.is_running = True
             print("주행을 시작합니다.")
             if self.control_mode == 1:
-                # 자율주행 모드 초기 설정
-                self.motor_controller.left_speed = self.speed
-                self.motor_controller.right_speed = self.speed
-                self.motor_controller.steering_speed = self.steering_speed
+                # 자율주행 모드 초기 설정 (MMIO 쓰기는 한 번에 반영)
+                with self.motor_controller.batch_writes():
+                    self.motor_controller.left_speed = self.speed
+                    self.motor_controller.right_speed = self.speed
+                    self.motor_controller.steering_speed = self.steering_speed
             else:
                 # 수동 주행 모드 초기 설정
                 self.motor_controller.manual_speed = 0
                 self.motor_controller.manual_steering_angle = 0
+            self.steering_servo.enable()
 
     def stop_driving(self):
         """주행 정지"""
         with self.control_lock:
             self.is_running = False
             print("주행을 정지합니다.")
+            self.steering_servo.disable()
             self.motor_controller.reset_motor_values()
 
     def switch_mode(self, new_mode):
@@ -72,6 +99,7 @@ class DrivingSystemController:
         if self.control_mode != new_mode:
             self.control_mode = new_mode
             self.is_running = False
+            self.steering_servo.disable()
             self.motor_controller.reset_motor_values()
             mode_str = "자율주행" if new_mode == 1 else "수동주행"
             print(f"{mode_str} 모드로 전환되었습니다.")
@@ -87,14 +115,45 @@ class DrivingSystemController:
         """
         if self.control_mode == 1:  # Autonomous mode
             slope, image = self.image_processor.process_frame(frame)
-            if self.is_running:
-                self.motor_controller.control_motors(slope, control_mode=1)
+            self.apply_control(slope)
             return image
         else:  # Manual mode
             if self.is_running:
-                self.motor_controller.handle_manual_control()
+                self.motor_controller.handle_manual_control(self.keys)
             return frame
 
+    def apply_control(self, slope):
+        """
+        차선 각도로 차량 제어 (자율주행 모드)
+        Args:
+            slope: 차선 각도
+        """
+        self.last_slope = slope
+        if self.is_running:
+            with self.motor_controller.batch_writes():
+                self.motor_controller.control_motors(slope, control_mode=1)
+
+    def reuse_last_control(self):
+        """새 인식 결과 없이 이번 주기 제어 (자율주행: 마지막 각도, 수동: 키 입력)"""
+        if self.control_mode == 1:
+            if self.last_slope is not None:
+                self.apply_control(self.last_slope)
+                self.scheduler.count_reuse()
+        elif self.is_running:
+            self.motor_controller.handle_manual_control(self.keys)
+
+    def _admit_frame(self):
+        """파이프라인 제출 단계 훅: 수동 주행은 인식 결과를 쓰지 않으므로 모두, 자율주행은 저하 단계에 따라 걸러 냄"""
+        return self.control_mode == 1 and self.scheduler.admit_frame()
+
+    def apply_degradation(self, level):
+        """저하 단계에 맞춰 인식 설정 조정"""
+        if level >= LEVEL_REDUCED:
+            self.image_processor.nms_topk = min(self.default_nms_topk or 20, 20)
+        else:
+            self.image_processor.nms_topk = self.default_nms_topk
+        print(f"제어 주기 저하 단계: {level}")
+
     def wait_for_mode_selection(self):
         """시작 시 모드 선택 대기"""
         print("\n주행 모드를 선택하세요:")
@@ -102,91 +161,190 @@ class DrivingSystemController:
         print("2: 수동주행 모드")
         
         while True:
-            if keyboard.is_pressed('1'):
-                self.switch_mode(1)
-                break
-            elif keyboard.is_pressed('2'):
-                self.switch_mode(2)
+            key = self.keys.wait_pressed()
+            if key in ('1', '2'):
+                self.switch_mode(int(key))
                 break
-            time.sleep(0.1)
 
-    def run(self, video_path=None, camera_index=0):
+    def dump_profile(self, *args):
+        """구간별 지연 시간 통계 출력 (시그널 핸들러로도 사용)"""
+        print("\n구간별 지연 시간:")
+        print(self.profiler.dump())
+        print(f"MMIO 쓰기: {self.motor_controller.get_write_stats()}")
+        print(f"조향 서보: {self.steering_servo.get_stats()}")
+        print(f"조향 ADC: {self.motor_controller.adc_sampler.get_stats()}")
+        print(f"제어 주기: {self.scheduler.get_stats()}")
+
+    def install_profile_signal(self):
+        """SIGUSR1 수신 시 구간별 통계 출력"""
+        try:
+            signal.signal(signal.SIGUSR1, self.dump_profile)
+        except (AttributeError, ValueError):
+            # SIGUSR1이 없는 OS 또는 메인 스레드가 아닌 경우
+            pass
+
+    def print_manual_guide(self):
+        """수동 주행 조작 안내 출력"""
+        print("\n수동 주행 제어:")
+        print("W/S: 전진/후진")
+        print("A/D: 좌회전/우회전")
+        print("R: 긴급 정지")
+
+    def handle_keyboard(self):
+        """
+        키보드 입력 처리 (쌓인 키 눌림만 처리하고 바로 반환)
+        Returns:
+            False: 종료 키 입력, True: 계속 실행
+        """
+        for key in self.keys.poll_pressed():
+            if key == 'space':
+                if self.is_running:
+                    self.stop_driving()
+                else:
+                    self.start_driving()
+            
+            elif key in ('1', '2'):
+                new_mode = int(key)
+                if self.control_mode != new_mode:
+                    self.switch_mode(new_mode)
+                    if new_mode == 2:
+                        self.print_manual_guide()
+            
+            elif key == 'm':
+                # 조향 방식 비교용 전환
+                mode = STEERING_PID if self.motor_controller.steering_mode == STEERING_BANG_BANG else STEERING_BANG_BANG
+                self.motor_controller.set_steering_mode(mode)
+                print(f"조향 방식: {mode}")
+            
+            elif key == 'p':
+                self.dump_profile()
+            
+            elif key == 'q':
+                print("\n프로그램을 종료합니다.")
+                return False
+        return True
+
+    def run(self, video_path=None, camera_index=0, pipelined=False, replay_rate=1.0, frame_ring_size=0):
         """
         메인 실행 함수
         Args:
             video_path: 비디오 파일 경로 (선택)
             camera_index: 카메라 인덱스 (기본값 0)
+            pipelined: True면 캡처/전처리/DPU/후처리를 스레드 파이프라인으로 실행
+            replay_rate: 비디오 재생 배속 (None이면 최대 속도)
+            frame_ring_size: 디버깅용으로 보관할 최근 프레임 수
         """
-        # 카메라 또는 비디오 초기화
+        # 카메라 또는 비디오 초기화 (별도 스레드에서 항상 최신 프레임 유지)
         if video_path:
-            cap = cv2.VideoCapture(video_path)
+            cap = CameraGrabber(video_path, ring_size=frame_ring_size, replay_rate=replay_rate)
         else:
-            cap = cv2.VideoCapture(camera_index)
-            cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+            cap = CameraGrabber(camera_index, 640, 480, ring_size=frame_ring_size)
+        self.camera = cap
 
         if not cap.isOpened():
             print("카메라를 열 수 없습니다.")
             return
 
         # 시작 시 모드 선택
+        self.keys.start()
         self.wait_for_mode_selection()
 
         # 제어 안내 출력
         print("\n키보드 제어 안내:")
         print("Space: 주행 시작/정지")
         print("1/2: 자율주행/수동주행 모드 전환")
+        print("M: 조향 방식 전환 (bang_bang/pid)")
+        print("P: 구간별 지연 시간 출력")
         if self.control_mode == 2:
-            print("\n수동 주행 제어:")
-            print("W/S: 전진/후진")
-            print("A/D: 좌회전/우회전")
-            print("R: 긴급 정지")
+            self.print_manual_guide()
         print("Q: 프로그램 종료\n")
 
-        try:
-            while True:
-                # 키보드 입력 처리
-                if keyboard.is_pressed('space'):
-                    time.sleep(0.3)  # 디바운싱
-                    if self.is_running:
-                        self.stop_driving()
-                    else:
-                        self.start_driving()
-                
-                elif keyboard.is_pressed('1') or keyboard.is_pressed('2'):
-                    prev_mode = self.control_mode
-                    new_mode = 1 if keyboard.is_pressed('1') else 2
-                    if prev_mode != new_mode:
-                        self.switch_mode(new_mode)
-                        if new_mode == 2:
-                            print("\n수동 주행 제어:")
-                            print("W/S: 전진/후진")
-                            print("A/D: 좌회전/우회전")
-                            print("R: 긴급 정지")
-                    time.sleep(0.3)  # 디바운싱
-                
-                if keyboard.is_pressed('q'):
-                    print("\n프로그램을 종료합니다.")
-                    break
+        self.install_profile_signal()
 
-                # 프레임 처리
-                ret, frame = cap.read()
-                if not ret:
-                    print("프레임을 읽을 수 없습니다.")
-                    break
-
-                # 이미지 처리 및 차량 제어
-                processed_image = self.process_and_control(frame)
-                
-                # 상태 표시
-                mode_text = "모드: " + ("자율주행" if self.control_mode == 1 else "수동주행")
-                status_text = "상태: " + ("주행중" if self.is_running else "정지")
-                
+        pipeline = None
+        try:
+            cap.start()
+            self.steering_servo.start()
+            if pipelined:
+                # 인식 건너뛰기 저하 정책은 제출 단계에서 프레임 단위로 적용
+                pipeline = FramePipeline(self.image_processor, should_process=self._admit_frame)
+                pipeline.start(cap)
+                self._run_pipelined(pipeline)
+            else:
+                self._run_serial(cap)
 
         except KeyboardInterrupt:
             print("\n사용자에 의해 중지되었습니다.")
         finally:
             # 리소스 정리
+            if pipeline is not None:
+                pipeline.stop()
+                print(f"파이프라인 통계: {pipeline.get_stats()}")
+            self.steering_servo.stop()
+            print(f"조향 서보 통계: {self.steering_servo.get_stats()}")
+            print(f"제어 주기 통계: {self.scheduler.get_stats()}")
             cap.release()
+            self.keys.stop()
             cv2.destroyAllWindows()
-            self.stop_driving()
\ No newline at end of file
+            self.stop_driving()
+
+    def _run_serial(self, cap):
+        """캡처 -> 처리 -> 제어를 한 스레드에서 제어 주기마다 순서대로 실행"""
+        scheduler = self.scheduler
+        scheduler.reset()
+        while True:
+            scheduler.wait_tick()
+
+            # 키보드 입력 처리
+            if not self.handle_keyboard():
+                break
+
+            if self.control_mode == 1 and not scheduler.run_perception():
+                # 예산 초과 시 이번 주기는 인식을 건너뛰고 마지막 각도로 제어
+                self.reuse_last_control()
+                scheduler.end_tick()
+                continue
+
+            # 프레임 처리 (아직 처리하지 않은 가장 최신 프레임, 마감까지만 대기)
+            ret, frame, captured_at = scheduler.wait_input(cap.read)
+            if not ret:
+                if cap.finished:
+                    print("프레임을 읽을 수 없습니다.")
+                    break
+                self.reuse_last_control()
+                scheduler.end_tick(starved=True)
+                continue
+
+            # 이미지 처리 및 차량 제어
+            processed_image = self.process_and_control(frame)
+            scheduler.end_tick()
+
+    def _run_pipelined(self, pipeline):
+        """파이프라인 결과를 받아 제어 단계만 이 스레드에서 제어 주기마다 실행"""
+        scheduler = self.scheduler
+        scheduler.reset()
+        while True:
+            scheduler.wait_tick()
+
+            # 키보드 입력 처리
+            if not self.handle_keyboard():
+                break
+
+            # 마감까지 새 결과가 없으면 마지막 각도로 제어
+            result = scheduler.wait_input(pipeline.get_result)
+            if result is None:
+                if pipeline.finished:
+                    print("프레임을 읽을 수 없습니다.")
+                    break
+                self.reuse_last_control()
+                scheduler.end_tick(starved=True)
+                continue
+
+            seq, slope, image, captured_at = result
+            if self.control_mode == 1:
+                self.apply_control(slope)
+                # 캡처부터 모터 제어까지의 지연 시간 기록
+                pipeline.record_latency(captured_at)
+            elif self.is_running:
+                self.motor_controller.handle_manual_control(self.keys)
+            scheduler.end_tick()
@@ -0,0 +1,255 @@
+# Copyright (c) 2024 Sungkyunkwan University AutomationLab
+#
+# Authors:
+# - Gyuhyeon Hwang <rbgus7080@g.skku.edu>, Hobin Oh <hobin0676@daum.net>, Minkwan Choi <arbong97@naver.com>, Hyeonjin Sim <nufxwms@naver.com>
+# - url: https://micro.skku.ac.kr/micro/index.do
+
+"""
+보드 없이 MotorController를 돌리기 위한 MMIO / SPI 대체품
+
+모든 레지스터 쓰기/읽기와 ADC 읽기를 단조 시계 시각과 함께 배열 기반
+trace에 기록한다. 녹화한 trace의 ADC 값을 다시 넣어 재생할 수 있고,
+두 버전의 trace를 비교할 수 있다.
+
+사용 예:
+    python fake_hardware.py summary trace.npz
+    python fake_hardware.py diff before.npz after.npz
+"""
+
+import sys
+import time
+import argparse
+import numpy as np
+
+# trace 항목 종류
+TRACE_WRITE = 0
+TRACE_READ = 1
+TRACE_ADC = 2
+TRACE_KIND_NAMES = ('write', 'read', 'adc')
+
+# ADC 장치 번호 (모터는 0부터 순서대로)
+ADC_DEVICE = -1
+
+TRACE_DTYPE = np.dtype([
+    ('t_ns', np.int64),
+    ('kind', np.int8),
+    ('device', np.int16),
+    ('offset', np.int32),
+    ('value', np.int64),
+])
+
+
+class HardwareTrace:
+    """
+    레지스터 / ADC 접근 기록
+
+    미리 할당한 구조화 배열에 기록하며, 가득 차면 두 배로 늘린다.
+    """
+
+    def __init__(self, capacity=4096, device_names=()):
+        """
+        Args:
+            capacity: 초기 기록 용량
+            device_names: 장치 번호 순서의 이름 목록 (저장/출력용)
+        """
+        self.records = np.zeros(capacity, dtype=TRACE_DTYPE)
+        self.count = 0
+        self.device_names = list(device_names)
+        self.enabled = True
+
+    def add_device(self, name):
+        """장치 이름 등록 후 장치 번호 반환"""
+        self.device_names.append(name)
+        return len(self.device_names) - 1
+
+    def append(self, kind, device, offset, value):
+        """접근 한 건 기록"""
+        if not self.enabled:
+            return
+        if self.count == self.records.size:
+            grown = np.zeros(self.records.size * 2, dtype=TRACE_DTYPE)
+            grown[:self.count] = self.records
+            self.records = grown
+        record = self.records[self.count]
+        record['t_ns'] = time.perf_counter_ns()
+        record['kind'] = kind
+        record['device'] = device
+        record['offset'] = offset
+        record['value'] = value
+        self.count += 1
+
+    def clear(self):
+        """기록 비우기 (용량은 유지)"""
+        self.count = 0
+
+    def view(self):
+        """기록된 부분 배열"""
+        return self.records[:self.count]
+
+    def adc_values(self):
+        """기록된 ADC 값 순서대로 반환"""
+        records = self.view()
+        return records['value'][records['kind'] == TRACE_ADC].copy()
+
+    def summary(self):
+        """종류별 / 장치별 접근 수와 기록 시간 (ms)"""
+        records = self.view()
+        stats = {name: int((records['kind'] == kind).sum()) for kind, name in enumerate(TRACE_KIND_NAMES)}
+        writes = records[records['kind'] == TRACE_WRITE]
+        stats['writes_per_device'] = {
+            self.device_name(device): int(count)
+            for device, count in zip(*np.unique(writes['device'], return_counts=True))
+        }
+        stats['duration_ms'] = float(records['t_ns'][-1] - records['t_ns'][0]) / 1e6 if self.count else 0.0
+        return stats
+
+    def device_name(self, device):
+        """장치 번호 -> 이름"""
+        if device == ADC_DEVICE:
+            return 'adc'
+        if 0 <= device < len(self.device_names):
+            return self.device_names[device]
+        return str(device)
+
+    def diff(self, other, limit=20):
+        """
+        두 trace의 접근 순서 비교 (시각은 무시)
+
+        Returns:
+            [(index, 이 trace 항목, 다른 trace 항목), ...] 최대 limit개.
+            한쪽이 짧으면 없는 항목은 None
+        """
+        fields = ['kind', 'device', 'offset', 'value']
+        a = self.view()[fields]
+        b = other.view()[fields]
+        n = min(len(a), len(b))
+        mismatched = np.nonzero(a[:n] != b[:n])[0].tolist()
+        mismatched += list(range(n, max(len(a), len(b))))
+        result = []
+        for index in mismatched[:limit]:
+            result.append((index,
+                           self.format_record(index) if index < len(a) else None,
+                           other.format_record(index) if index < len(b) else None))
+        return result
+
+    def format_record(self, index):
+        """기록 한 건을 읽기 쉬운 문자열로"""
+        record = self.records[index]
+        return (f"{TRACE_KIND_NAMES[record['kind']]} {self.device_name(int(record['device']))}"
+                f"[0x{int(record['offset']):02x}] = {int(record['value'])}")
+
+    def save(self, path):
+        """기록을 .npz로 저장"""
+        np.savez(path, records=self.view(), device_names=np.array(self.device_names))
+
+    @classmethod
+    def load(cls, path):
+        """save()로 저장한 기록 불러오기"""
+        with np.load(path) as data:
+            records = data['records']
+            trace = cls(max(len(records), 1), [str(name) for name in data['device_names']])
+        trace.records[:len(records)] = records
+        trace.count = len(records)
+        return trace
+
+
+class FakeMMIO:
+    """레지스터 값을 보관하고 접근을 기록하는 pynq MMIO 대체품"""
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+        self.device = trace.add_device(name)
+        self.registers = {}
+
+    def write(self, offset, value):
+        self.registers[offset] = value
+        self.trace.append(TRACE_WRITE, self.device, offset, value)
+
+    def read(self, offset):
+        value = self.registers.get(offset, 0)
+        self.trace.append(TRACE_READ, self.device, offset, value)
+        return value
+
+
+class FakeSpiDev:
+    """
+    12bit ADC 응답을 돌려주는 spidev.SpiDev 대체품
+
+    adc_values가 있으면 순서대로 재생하고(끝나면 처음부터), 없으면 adc_value를 돌려준다.
+    2바이트마다 ADC 값 하나로 응답하므로 여러 샘플을 한 번에 읽는 전송도 지원한다.
+    """
+
+    def __init__(self, trace=None, adc_value=632, adc_values=None):
+        self.trace = trace
+        self.adc_value = adc_value
+        self.adc_values = None if adc_values is None else np.asarray(adc_values, dtype=np.int64)
+        self._index = 0
+        self.max_speed_hz = 0
+        self.mode = 0
+
+    @classmethod
+    def from_trace(cls, replay, trace=None):
+        """녹화한 trace의 ADC 값을 재생하는 SPI 생성"""
+        return cls(trace, adc_values=replay.adc_values())
+
+    def open(self, bus, device):
+        pass
+
+    def close(self):
+        pass
+
+    def next_value(self):
+        """다음 ADC 값"""
+        if self.adc_values is None or self.adc_values.size == 0:
+            return self.adc_value
+        value = int(self.adc_values[self._index % self.adc_values.size])
+        self._index += 1
+        return value
+
+    def xfer2(self, data):
+        response = []
+        for _ in range(len(data) // 2):
+            value = self.next_value()
+            if self.trace is not None:
+                self.trace.append(TRACE_ADC, ADC_DEVICE, 0, value)
+            response.append((value >> 8) & 0x0F)
+            response.append(value & 0xFF)
+        return response
+
+
+def make_fake_motors(trace, num_motors=6):
+    """main.py와 같은 이름(motor_0 ~ motor_N)의 FakeMMIO 딕셔너리 생성"""
+    return {f'motor_{i}': FakeMMIO(trace, f'motor_{i}') for i in range(num_motors)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MMIO/SPI trace 요약 및 비교")
+    sub = parser.add_subparsers(dest='command', required=True)
+    summary = sub.add_parser('summary', help="trace 요약")
+    summary.add_argument('trace')
+    diff = sub.add_parser('diff', help="두 trace 비교")
+    diff.add_argument('before')
+    diff.add_argument('after')
+    diff.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == 'summary':
+        print(HardwareTrace.load(args.trace).summary())
+        return
+
+    before = HardwareTrace.load(args.before)
+    after = HardwareTrace.load(args.after)
+    print(f"before: {before.summary()}")
+    print(f"after:  {after.summary()}")
+    differences = before.diff(after, args.limit)
+    if not differences:
+        print("접근 순서가 같습니다.")
+        return
+    for index, a, b in differences:
+        print(f"{index:>8}: {a} | {b}")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# Copyright (c) 2024 Sungkyunkwan University AutomationLab
+#
+# Authors:
+# - Gyuhyeon Hwang <rbgus7080@g.skku.edu>, Hobin Oh <hobin0676@daum.net>, Minkwan Choi <arbong97@naver.com>, Hyeonjin Sim <nufxwms@naver.com>
+# - url: https://micro.skku.ac.kr/micro/index.do
+
+import time
+import queue
+import threading
+import numpy as np
+
+
+def put_latest(q, item):
+    """
+    큐가 가득 차 있으면 가장 오래된 항목을 버리고 새 항목을 넣음
+
+    Returns:
+        버린 항목 수 (0 또는 1)
+    """
+    dropped = 0
+    while True:
+        try:
+            q.put_nowait(item)
+            return dropped
+        except queue.Full:
+            try:
+                q.get_nowait()
+                dropped += 1
+            except queue.Empty:
+                pass
+
+
+class FramePipeline:
+    """
+    캡처 / 전처리+DPU 제출 / DPU 대기+후처리 단계를 스레드로 분리한 파이프라인
+
+    단계 사이는 크기가 제한된 큐로 연결되며, 뒤 단계가 밀리면 오래된 프레임을
+    버린다. DPU 입력/출력 버퍼는 ImageProcessor의 slot 단위로 번갈아 사용하므로
+    CPU가 다음 프레임을 전처리하는 동안 DPU는 이전 프레임을 추론한다.
+    제어 단계는 호출한 스레드에서 get_result()로 결과를 받아 실행한다.
+    """
+
+    def __init__(self, image_processor, queue_size=1, latency_history=256, should_process=None):
+        """
+        Args:
+            image_processor: ImageProcessor (num_buffers >= 2 권장)
+            queue_size: 단계 사이 큐 크기
+            latency_history: 보관할 프레임별 지연 시간 개수
+            should_process: 전처리 전에 호출해 False면 그 프레임은 인식하지 않고 버림 (선택사항)
+        """
+        self.image_processor = image_processor
+        self.should_process = should_process
+        self.num_slots = image_processor.num_buffers
+
+        self.frame_queue = queue.Queue(maxsize=queue_size)
+        self.inflight_queue = queue.Queue(maxsize=self.num_slots)
+        self.result_queue = queue.Queue(maxsize=queue_size)
+        self.free_slots = queue.Queue(maxsize=self.num_slots)
+        for slot in range(self.num_slots):
+            self.free_slots.put(slot)
+
+        self.running = False
+        self.finished = False
+        self._threads = []
+
+        # 통계
+        self.frames_captured = 0
+        self.frames_processed = 0
+        self.frames_dropped = 0
+        self.frames_skipped = 0
+        self.last_latency = None
+        self._latencies = np.zeros(latency_history, dtype=np.float64)
+        self._latency_count = 0
+
+    def start(self, cap):
+        """
+        파이프라인 스레드 시작
+
+        Args:
+            cap: read() -> (ret, frame, timestamp) 와 finished 를 제공하는 CameraGrabber
+        """
+        self.running = True
+        self.finished = False
+        self._threads = [
+            threading.Thread(target=self._capture_loop, args=(cap,), daemon=True),
+            threading.Thread(target=self._submit_loop, daemon=True),
+            threading.Thread(target=self._postprocess_loop, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """파이프라인 스레드 정지"""
+        self.running = False
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads = []
+
+    def _capture_loop(self, cap):
+        """캡처 단계: 최신 프레임만 전처리 단계로 전달"""
+        seq = 0
+        while self.running:
+            ret, frame, captured_at = cap.read(timeout=0.1)
+            if not ret:
+                if cap.finished:
+                    self.finished = True
+                    break
+                continue
+            seq += 1
+            self.frames_captured += 1
+            self.frames_dropped += put_latest(self.frame_queue, (seq, captured_at, frame))
+
+    def _submit_loop(self):
+        """전처리 단계: 빈 slot에 전처리 후 DPU에 비동기 제출"""
+        while self.running:
+            try:
+                seq, captured_at, frame = self.frame_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if self.should_process is not None and not self.should_process():
+                # 저하 정책으로 이번 프레임은 전처리/DPU 생략
+                self.frames_skipped += 1
+                continue
+            try:
+                slot = self.free_slots.get(timeout=0.5)
+            except queue.Empty:
+                self.frames_dropped += 1
+                continue
+            image = self.image_processor.prepare(frame, slot)
+            job_id = self.image_processor.submit(slot)
+            self.inflight_queue.put((seq, captured_at, slot, job_id, image))
+
+    def _postprocess_loop(self):
+        """후처리 단계: DPU 완료 대기 후 차선 각도 계산"""
+        while self.running or not self.inflight_queue.empty():
+            try:
+                seq, captured_at, slot, job_id, image = self.inflight_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self.image_processor.wait(job_id)
+            angle = self.image_processor.postprocess(slot)
+            self.free_slots.put(slot)
+            self.frames_processed += 1
+            self.frames_dropped += put_latest(self.result_queue, (seq, angle, image, captured_at))
+
+    def get_result(self, timeout=0.1):
+        """
+        가장 최근 처리 결과 반환
+
+        Returns:
+            (seq, angle, image, captured_at) 또는 결과가 없으면 None
+            image는 slot 버퍼이므로 해당 slot이 재사용되기 전까지만 유효
+        """
+        try:
+            return self.result_queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def record_latency(self, captured_at):
+        """캡처 시점부터 제어 적용까지의 지연 시간 기록 (초)"""
+        latency = time.perf_counter() - captured_at
+        self._latencies[self._latency_count % self._latencies.size] = latency
+        self._latency_count += 1
+        self.last_latency = latency
+        return latency
+
+    def get_stats(self):
+        """프레임 수와 지연 시간 통계 반환 (ms)"""
+        n = min(self._latency_count, self._latencies.size)
+        stats = {
+            'captured': self.frames_captured,
+            'processed': self.frames_processed,
+            'dropped': self.frames_dropped,
+            'skipped': self.frames_skipped,
+        }
+        if n:
+            recent = self._latencies[:n] * 1000.0
+            stats['latency_ms_p50'] = float(np.percentile(recent, 50))
+            stats['latency_ms_p95'] = float(np.percentile(recent, 95))
+            stats['latency_ms_max'] = float(recent.max())
+        return stats
@@ -0,0 +1,200 @@
+# Copyright (c) 2024 Sungkyunkwan University AutomationLab
+#
+# Authors:
+# - Gyuhyeon Hwang <rbgus7080@g.skku.edu>, Hobin Oh <hobin0676@daum.net>, Minkwan Choi <arbong97@naver.com>, Hyeonjin Sim <nufxwms@naver.com>
+# - url: https://micro.skku.ac.kr/micro/index.do
+
+import time
+import numpy as np
+
+# 성능 저하 단계
+LEVEL_NORMAL = 0           # 모든 단계 실행
+LEVEL_REDUCED = 1          # NMS 전 상위 후보 수를 20개로 축소
+LEVEL_SKIP_PERCEPTION = 2  # 인식은 두 주기(파이프라인은 두 프레임)에 한 번, 나머지는 마지막 각도 재사용
+
+LEVEL_NAMES = ('normal', 'reduced', 'skip_perception')
+
+
+class FrameScheduler:
+    """
+    주행 루프 주기/마감 관리
+
+    설정한 주기마다 tick을 시작하고, tick이 끝날 때 마감까지 남은 시간(slack)과
+    마감 초과(overrun)를 기록한다. slack은 wait_input()으로 입력을 기다린 시간을
+    뺀 계산 시간 기준이므로, 입력을 기다리다 마감에 걸린 tick은 overrun이 아니다.
+    입력 없이 끝난 tick(starved)은 따로 세고 단계 판단에 쓰지 않는다.
+    최근 window개 tick 중 overrun이 degrade_after개 이상이면 저하 단계를 올리고,
+    slack이 주기의 recover_slack 비율 이상인 tick이 recover_after번 연속되면 한 단계 내린다.
+    """
+
+    def __init__(self, rate_hz=30, window=30, degrade_after=5, recover_after=60, recover_slack=0.3,
+                 max_level=LEVEL_SKIP_PERCEPTION, on_level_change=None, slack_history=1024):
+        """
+        Args:
+            rate_hz: 제어 주기 (Hz)
+            window: overrun 판단에 쓰는 최근 tick 수
+            degrade_after: window 안의 overrun이 이 수 이상이면 저하 단계 상승
+            recover_after: 여유 있는 tick이 이만큼 연속되면 저하 단계 하강
+            recover_slack: 여유 있는 tick으로 보는 slack 비율 (주기 대비)
+            max_level: 최대 저하 단계
+            on_level_change: 단계가 바뀔 때 호출할 함수 (new_level)
+            slack_history: 보관할 tick별 slack 개수
+        """
+        self.period = 1.0 / rate_hz
+        self.degrade_after = degrade_after
+        self.recover_after = recover_after
+        self.recover_slack = recover_slack
+        self.max_level = max_level
+        self.on_level_change = on_level_change
+
+        self._overrun_window = np.zeros(window, dtype=np.bool_)
+        self._slack = np.zeros(slack_history, dtype=np.float64)
+        self.reset()
+
+    def reset(self):
+        """주기와 통계 초기화"""
+        self.level = LEVEL_NORMAL
+        self.ticks = 0
+        self.overruns = 0
+        self.starved_ticks = 0
+        self.missed_ticks = 0
+        self.perception_skips = 0
+        self.angle_reuses = 0
+        self.level_changes = 0
+        self.max_overrun = 0.0
+        self._calm_ticks = 0
+        self._frames_offered = 0
+        self._overrun_window[...] = False
+        self._tick_start = None
+        self._input_wait = 0.0
+        self._deadline = None
+        self._next_release = None
+
+    def wait_tick(self):
+        """다음 tick 시작 시각까지 대기 후 tick 시작 (이미 늦었으면 바로 시작)"""
+        now = time.perf_counter()
+        if self._next_release is None:
+            self._next_release = now
+        delay = self._next_release - now
+        if delay > 0:
+            time.sleep(delay)
+            now = time.perf_counter()
+        elif -delay >= self.period:
+            # 한 주기 이상 밀렸으면 놓친 tick은 건너뛰고 지금부터 다시 시작
+            self.missed_ticks += int(-delay / self.period)
+            self._next_release = now
+        self._tick_start = now
+        self._input_wait = 0.0
+        self._deadline = self._next_release + self.period
+        self._next_release = self._deadline
+        return now
+
+    def remaining(self):
+        """이번 tick 마감까지 남은 시간 (초, 0 이상)"""
+        if self._deadline is None:
+            return self.period
+        return max(0.0, self._deadline - time.perf_counter())
+
+    def wait_input(self, read):
+        """
+        이번 tick 마감까지 입력 대기 (대기 시간은 slack 계산에서 제외)
+
+        Args:
+            read: timeout 인자를 받는 입력 함수 (cap.read / pipeline.get_result)
+        Returns:
+            read()의 반환값
+        """
+        start = time.perf_counter()
+        result = read(timeout=self.remaining())
+        self._input_wait += time.perf_counter() - start
+        return result
+
+    def run_perception(self):
+        """이번 tick에 인식을 실행할지 여부"""
+        if self.level >= LEVEL_SKIP_PERCEPTION and self.ticks % 2 == 1:
+            self.perception_skips += 1
+            return False
+        return True
+
+    def admit_frame(self):
+        """
+        파이프라인 제출 단계에서 이번 프레임을 인식할지 여부 (제출 스레드에서 호출)
+
+        run_perception()과 같은 정책을 tick 대신 프레임 단위로 적용한다.
+        """
+        if self.level < LEVEL_SKIP_PERCEPTION:
+            return True
+        self._frames_offered += 1
+        if self._frames_offered % 2 == 0:
+            self.perception_skips += 1
+            return False
+        return True
+
+    def count_reuse(self):
+        """마지막 각도 재사용 횟수 기록"""
+        self.angle_reuses += 1
+
+    def end_tick(self, starved=False):
+        """
+        tick 종료 기록 및 저하 단계 갱신
+
+        Args:
+            starved: 마감까지 입력이 없어 새 인식 결과 없이 끝난 tick 여부
+        Returns:
+            입력 대기 시간을 뺀 slack (초, 음수면 overrun)
+        """
+        slack = self._deadline - time.perf_counter() + self._input_wait
+        index = self.ticks % self._overrun_window.size
+        self._slack[self.ticks % self._slack.size] = slack
+        self.ticks += 1
+        if starved:
+            # 입력 부족은 계산 예산 초과가 아니므로 overrun / 회복 판단에 넣지 않음
+            self._overrun_window[index] = False
+            self.starved_ticks += 1
+            return slack
+
+        overrun = slack < 0
+        self._overrun_window[index] = overrun
+        if overrun:
+            self.overruns += 1
+            self.max_overrun = max(self.max_overrun, -slack)
+
+        if slack >= self.recover_slack * self.period:
+            self._calm_ticks += 1
+        else:
+            self._calm_ticks = 0
+
+        if self.level < self.max_level and self._overrun_window.sum() >= self.degrade_after:
+            self._set_level(self.level + 1)
+        elif self.level > LEVEL_NORMAL and self._calm_ticks >= self.recover_after:
+            self._set_level(self.level - 1)
+        return slack
+
+    def _set_level(self, level):
+        self.level = level
+        self.level_changes += 1
+        self._calm_ticks = 0
+        self._overrun_window[...] = False
+        if self.on_level_change is not None:
+            self.on_level_change(level)
+
+    def get_stats(self):
+        """tick / overrun / 저하 단계 / slack 통계 (ms)"""
+        n = min(self.ticks, self._slack.size)
+        stats = {
+            'period_ms': self.period * 1000.0,
+            'ticks': self.ticks,
+            'overruns': self.overruns,
+            'starved_ticks': self.starved_ticks,
+            'missed_ticks': self.missed_ticks,
+            'level': LEVEL_NAMES[self.level],
+            'level_changes': self.level_changes,
+            'perception_skips': self.perception_skips,
+            'angle_reuses': self.angle_reuses,
+            'max_overrun_ms': self.max_overrun * 1000.0,
+        }
+        if n:
+            slack_ms = self._slack[:n] * 1000.0
+            stats['slack_ms_p50'] = float(np.percentile(slack_ms, 50))
+            stats['slack_ms_p5'] = float(np.percentile(slack_ms, 5))
+        return stats
@@ -0,0 +1,133 @@
+# Copyright (c) 2024 Sungkyunkwan University AutomationLab
+#
+# Authors:
+# - Gyuhyeon Hwang <rbgus7080@g.skku.edu>, Hobin Oh <hobin0676@daum.net>, Minkwan Choi <arbong97@naver.com>, Hyeonjin Sim <nufxwms@naver.com>
+# - url: https://micro.skku.ac.kr/micro/index.do
+
+from threading import RLock
+
+
+class LockedSpi:
+    """버스 잠금을 잡고 전송하는 SPI 래퍼 (spidev.SpiDev와 같은 xfer2 인터페이스)"""
+
+    def __init__(self, spi, bus_lock):
+        self.spi = spi
+        self.bus_lock = bus_lock
+
+    def xfer2(self, data):
+        with self.bus_lock:
+            return self.spi.xfer2(data)
+
+    def close(self):
+        with self.bus_lock:
+            self.spi.close()
+
+
+class MmioWindow:
+    """큰 MMIO 매핑 안의 장치 하나 구간 (MMIO와 같은 write/read 인터페이스)"""
+
+    def __init__(self, block, base):
+        self.block = block
+        self.base = base
+
+    def write(self, offset, value):
+        self.block.write(self.base + offset, value)
+
+    def read(self, offset):
+        return self.block.read(self.base + offset)
+
+    def register_view(self, count):
+        """구간 시작부터 32bit 레지스터 count개를 가리키는 배열 (MMIO.array가 없으면 None)"""
+        array = getattr(self.block, 'array', None)
+        if array is None:
+            return None
+        start = self.base // 4
+        return array[start:start + count]
+
+
+class HardwareSession:
+    """
+    보드 하드웨어 자원을 한 곳에서 소유하는 세션
+
+    SPI는 한 번만 열어 공유하고, 주소가 이어진 장치들은 MMIO 매핑 하나로
+    묶어 장치별 구간(MmioWindow)으로 나눠 준다. 여러 스레드가 같은 버스를
+    쓰므로 SPI 전송은 bus_lock으로 직렬화하며, 여러 레지스터를 한 번에
+    바꿔야 하는 쪽도 같은 bus_lock을 사용한다.
+    """
+
+    def __init__(self, spi_bus=0, spi_device=0, spi_speed_hz=20000000, spi_mode=0b00,
+                 mmio_factory=None, spi_factory=None):
+        """
+        Args:
+            spi_bus, spi_device: SPI 버스/장치 번호
+            spi_speed_hz: SPI 클럭
+            spi_mode: SPI 모드
+            mmio_factory: (base, length) -> MMIO (None이면 pynq.MMIO)
+            spi_factory: () -> SpiDev (None이면 spidev.SpiDev)
+        """
+        self.bus_lock = RLock()
+        self.spi_config = (spi_bus, spi_device, spi_speed_hz, spi_mode)
+        self._mmio_factory = mmio_factory
+        self._spi_factory = spi_factory
+        self._spi = None
+        self.blocks = {}
+
+    @property
+    def spi(self):
+        """공유 SPI (처음 사용할 때 한 번만 열림)"""
+        with self.bus_lock:
+            if self._spi is None:
+                if self._spi_factory is None:
+                    import spidev
+                    spi = spidev.SpiDev()
+                else:
+                    spi = self._spi_factory()
+                bus, device, speed_hz, mode = self.spi_config
+                spi.open(bus, device)
+                spi.max_speed_hz = speed_hz
+                spi.mode = mode
+                self._spi = LockedSpi(spi, self.bus_lock)
+            return self._spi
+
+    def _map(self, base, length):
+        if self._mmio_factory is None:
+            from pynq import MMIO
+            return MMIO(base, length)
+        return self._mmio_factory(base, length)
+
+    def map_devices(self, addresses, window_size):
+        """
+        장치 주소 목록을 MMIO 구간으로 매핑
+
+        주소가 window_size 간격으로 이어진 장치들은 매핑 하나를 공유한다.
+
+        Args:
+            addresses: 장치 이름 -> 시작 주소 딕셔너리
+            window_size: 장치 하나의 주소 범위
+        Returns:
+            장치 이름 -> MmioWindow 딕셔너리 (addresses 순서 유지)
+        """
+        ordered = sorted(addresses.items(), key=lambda item: item[1])
+        windows = {}
+        group = []
+        for name, addr in ordered + [(None, None)]:
+            if group and (addr is None or addr != group[-1][1] + window_size):
+                base = group[0][1]
+                length = group[-1][1] + window_size - base
+                block = self.blocks.get((base, length))
+                if block is None:
+                    block = self._map(base, length)
+                    self.blocks[(base, length)] = block
+                for device_name, device_addr in group:
+                    windows[device_name] = MmioWindow(block, device_addr - base)
+                group = []
+            if name is not None:
+                group.append((name, addr))
+        return {name: windows[name] for name in addresses}
+
+    def close(self):
+        """SPI 닫기 (MMIO 매핑은 프로세스 종료 시 해제)"""
+        with self.bus_lock:
+            if self._spi is not None:
+                self._spi.close()
+                self._spi = None
@@ -12,12 +12,20 @@ import colorsys
 import random
 from PIL import Image
 import time
-from yolo_utils import pre_process, evaluate
+from yolo_utils import (pre_process, evaluate, decode_outputs, select_boxes,
+                        get_input_quantization, InputPreprocessor, YoloDecoder)
+from warp_engine import WarpEngine
+from stage_profiler import (StageProfiler, SPAN_WARP, SPAN_PREPROCESS, SPAN_DPU_SUBMIT,
+                            SPAN_DPU_WAIT, SPAN_DECODE, SPAN_NMS, SPAN_LANE_CENTER)
 
 class ImageProcessor:
-    def __init__(self, dpu, classes_path, anchors):
+    def __init__(self, dpu, classes_path, anchors, num_buffers=1, profiler=None, nms_topk=None):
         # 클래스 변수로 저장
         self.dpu = dpu
+        # 구간별 지연 시간 히스토그램 (상시 기록)
+        self.profiler = profiler if profiler is not None else StageProfiler()
+        # 동시에 DPU에 올릴 수 있는 입력/출력 버퍼 세트 수 (파이프라인 모드는 2 이상)
+        self.num_buffers = num_buffers
             
         self.classes_path = classes_path
         self.anchors = anchors
@@ -27,6 +35,19 @@ class ImageProcessor:
         self.reference_point_y = 240
         self.point_detection_height = 20
         
+        # bird-eye 변환 설정 (원본 좌표, ROI 자르기 위치)
+        self.src_mat = ((238, 316), (402, 313), (501, 476), (155, 476))
+        self.cutting_idx = 300
+        self.warp_engine = WarpEngine(cutting_idx=self.cutting_idx, output_size=(256, 256))
+        self._dst_mats = {}
+        
+        # NMS 설정 (점수 임계값, IoU 임계값, NMS 전 상위 후보 수)
+        # nms_topk는 None이면 기존과 같은 결과, 값을 주면 (예: 100) 후보가 많을 때 결과가 달라질 수 있음
+        self.score_thresh = 0.3
+        self.max_boxes = 20
+        self.nms_iou_thresh = 0.1
+        self.nms_topk = nms_topk
+        
         # DPU 초기화 상태 추적 플래그
         self.initialized = False
         self.init_dpu()
@@ -54,11 +75,34 @@ class ImageProcessor:
         outputSize0 = int(outputTensors[0].get_data_size() / self.shapeIn[0])
         outputSize1 = int(outputTensors[1].get_data_size() / self.shapeIn[0])
 
-        self.input_data = [np.empty(self.shapeIn, dtype=np.float32, order="C")]
-        self.output_data = [
-            np.empty(self.shapeOut0, dtype=np.float32, order="C"),
-            np.empty(self.shapeOut1, dtype=np.float32, order="C")
-        ]
+        # xmodel이 고정소수점 입력을 보고하면 int8 버퍼와 입력 스케일 사용
+        input_dtype, self.input_scale = get_input_quantization(inputTensors[0])
+        out_w, out_h = self.warp_engine.output_size
+
+        # 버퍼 세트(slot)별 입력/출력 텐서, ROI 이미지, 전처리기
+        self.input_buffers = []
+        self.output_buffers = []
+        self.roi_buffers = []
+        self.preprocessors = []
+        for _ in range(self.num_buffers):
+            input_data = [np.empty(self.shapeIn, dtype=input_dtype, order="C")]
+            output_data = [
+                np.empty(self.shapeOut0, dtype=np.float32, order="C"),
+                np.empty(self.shapeOut1, dtype=np.float32, order="C")
+            ]
+            self.input_buffers.append(input_data)
+            self.output_buffers.append(output_data)
+            self.roi_buffers.append(np.empty((out_h, out_w, 3), dtype=np.uint8))
+            # DPU 입력 버퍼에 바로 기록하는 전처리기
+            self.preprocessors.append(InputPreprocessor(input_data[0], self.input_scale))
+
+        self.input_data = self.input_buffers[0]
+        self.output_data = self.output_buffers[0]
+        self.preprocessor = self.preprocessors[0]
+
+        # 출력 형태가 고정이므로 grid/anchor 텐서를 미리 계산한 디코더 생성
+        self.decoder = YoloDecoder((self.shapeOut0, self.shapeOut1), self.anchors,
+                                   len(self.class_names), (out_h, out_w))
 
         # 초기화 완료 플래그 설정
         self.initialized = True
@@ -81,6 +125,15 @@ class ImageProcessor:
         img_warpped, _ = self.warpping(img, srcmat, dstmat)
         return img_warpped
 
+    def get_dst_mat(self, w, h):
+        """프레임 크기별 bird-eye 목표 좌표 (캐시됨)"""
+        dst_mat = self._dst_mats.get((w, h))
+        if dst_mat is None:
+            dst_mat = ((round(w * 0.3), 0), (round(w * 0.7), 0),
+                       (round(w * 0.7), h), (round(w * 0.3), h))
+            self._dst_mats[(w, h)] = dst_mat
+        return dst_mat
+
     def calculate_angle(self, x1, y1, x2, y2):
         if x1 == x2:
             return 90.0
@@ -103,49 +156,94 @@ class ImageProcessor:
             return (rightmost_lane_x_min + rightmost_lane_x_max) // 2
         return None
 
-    def process_frame(self, img):
-
+    def prepare(self, img, slot=0):
+        """
+        bird-eye 변환 후 slot의 DPU 입력 버퍼에 전처리 결과 기록
         
+        Returns:
+            256x256 ROI 이미지 (slot 버퍼)
+        """
+        profiler = self.profiler
         h, w = img.shape[0], img.shape[1]
-        dst_mat = [[round(w * 0.3), 0], [round(w * 0.7), 0], 
-                  [round(w * 0.7), h], [round(w * 0.3), h]]
-        src_mat = [[238, 316], [402, 313], [501, 476], [155, 476]]
-        
-        bird_img = self.bird_convert(img, srcmat=src_mat, dstmat=dst_mat)
-        roi_image = self.roi_rectangle_below(bird_img, cutting_idx=300)
+        dst_mat = self.get_dst_mat(w, h)
         
-        img = cv2.resize(roi_image, (256, 256))
-        image_size = img.shape[:2]
-        image_data = np.array(pre_process(img, (256, 256)), dtype=np.float32)
+        # bird-eye 변환 + ROI 자르기 + 256x256 리사이즈를 한 번에 처리
+        t = profiler.start()
+        roi_img = self.warp_engine.warp(img, self.src_mat, dst_mat, out=self.roi_buffers[slot])
+        profiler.stop(SPAN_WARP, t)
         
-        start_time = time.time()
-
-        # self를 사용하여 클래스 변수에 접근
-        self.input_data[0][...] = image_data.reshape(self.shapeIn[1:])
-        job_id = self.dpu.execute_async(self.input_data, self.output_data)
+        # letterbox + BGR->RGB + 정규화 결과를 DPU 입력 버퍼에 바로 기록
+        t = profiler.start()
+        self.preprocessors[slot](roi_img)
+        profiler.stop(SPAN_PREPROCESS, t)
+        return roi_img
+
+    def submit(self, slot=0):
+        """slot의 입력으로 DPU 추론 시작, job id 반환"""
+        t = self.profiler.start()
+        job_id = self.dpu.execute_async(self.input_buffers[slot], self.output_buffers[slot])
+        self.profiler.stop(SPAN_DPU_SUBMIT, t)
+        return job_id
+
+    def wait(self, job_id):
+        """DPU 추론 완료 대기"""
+        t = self.profiler.start()
         self.dpu.wait(job_id)
-        end_time = time.time()
-        
-        conv_out0 = np.reshape(self.output_data[0], self.shapeOut0)
-        conv_out1 = np.reshape(self.output_data[1], self.shapeOut1)
-        yolo_outputs = [conv_out0, conv_out1]
-
-        boxes, scores, classes = evaluate(yolo_outputs, image_size, self.class_names, self.anchors)
+        self.profiler.stop(SPAN_DPU_WAIT, t)
 
+    def detect(self, slot=0):
+        """slot의 DPU 출력 디코딩 + NMS, (boxes, scores, classes) 반환"""
+        profiler = self.profiler
+        out_w, out_h = self.warp_engine.output_size
+        image_size = (out_h, out_w)
+        
+        t = profiler.start()
+        boxes, box_scores = decode_outputs(self.output_buffers[slot], image_size, self.class_names, self.anchors,
+                                           self.score_thresh, decoder=self.decoder, early_reject=True)
+        profiler.stop(SPAN_DECODE, t)
+        
+        t = profiler.start()
+        result = select_boxes(boxes, box_scores, self.score_thresh, self.max_boxes,
+                              iou_thresh=self.nms_iou_thresh, nms_topk=self.nms_topk)
+        profiler.stop(SPAN_NMS, t)
+        return result
+
+    def lane_angle(self, boxes):
+        """검출된 차선 박스에서 우측 차선 각도 계산"""
+        t = self.profiler.start()
         for i, box in enumerate(boxes):
             top_left = (int(box[1]), int(box[0]))
             bottom_right = (int(box[3]), int(box[2]))
             #cv2.rectangle(img, top_left, bottom_right, (0, 255, 0), 2)
 
         right_lane_center = self.detect_lane_center_x(boxes)
+        self.profiler.stop(SPAN_LANE_CENTER, t)
         
         ######### 예외처리 알고리즘 #########
         if right_lane_center is None:
             print("차선 중심을 찾을 수 없습니다.")
             right_lane_angle = 90
-            return right_lane_angle, img
+            return right_lane_angle
         ###################################
 
         right_lane_angle = self.calculate_angle(self.reference_point_x, self.reference_point_y, right_lane_center, self.point_detection_height)
         
+        return right_lane_angle
+
+    def postprocess(self, slot=0):
+        """slot의 DPU 출력에서 차선을 찾아 각도 반환"""
+        boxes, scores, classes = self.detect(slot)
+        return self.lane_angle(boxes)
+
+    def process_frame(self, img):
+        img = self.prepare(img)
+        
+        start_time = time.time()
+
+        job_id = self.submit()
+        self.wait(job_id)
+        end_time = time.time()
+        
+        right_lane_angle = self.postprocess()
+        
         return right_lane_angle, img
@@ -0,0 +1,129 @@
+# Copyright (c) 2024 Sungkyunkwan University AutomationLab
+#
+# Authors:
+# - Gyuhyeon Hwang <rbgus7080@g.skku.edu>, Hobin Oh <hobin0676@daum.net>, Minkwan Choi <arbong97@naver.com>, Hyeonjin Sim <nufxwms@naver.com>
+# - url: https://micro.skku.ac.kr/micro/index.do
+
+import time
+import queue
+import threading
+
+KEY_DOWN = 'down'
+KEY_UP = 'up'
+
+
+class KeyInput:
+    """
+    이벤트 기반 키보드 입력
+
+    keyboard 훅에서 키가 눌리고 떼어지는 순간(edge)만 큐에 넣는다. 누르고 있는
+    동안의 자동 반복은 무시하므로 디바운싱용 sleep이 필요 없고, 제어 루프는
+    poll_pressed()로 막히지 않고 입력을 가져간다. 누르고 있는 키는 is_down()으로 확인한다.
+    """
+
+    def __init__(self):
+        self.events = queue.Queue()
+        self._down = set()
+        self._hook = None
+
+    def start(self):
+        """keyboard 훅 등록"""
+        import keyboard
+        self._hook = keyboard.hook(self._on_event)
+
+    def stop(self):
+        """keyboard 훅 해제"""
+        if self._hook is not None:
+            import keyboard
+            keyboard.unhook(self._hook)
+            self._hook = None
+
+    def _on_event(self, event):
+        self.feed(event.event_type, event.name)
+
+    def feed(self, event_type, name):
+        """키 이벤트 입력 (같은 상태가 반복되면 무시)"""
+        if name is None:
+            return
+        name = name.lower()
+        if event_type == KEY_DOWN:
+            if name in self._down:
+                return  # 자동 반복
+            self._down.add(name)
+        elif event_type == KEY_UP:
+            self._down.discard(name)
+        else:
+            return
+        self.events.put((event_type, name, time.perf_counter()))
+
+    def is_down(self, name):
+        """키를 누르고 있는지 여부"""
+        return name in self._down
+
+    def poll_pressed(self):
+        """쌓인 키 눌림 이벤트를 막히지 않고 모두 가져옴 (눌린 순서의 키 이름 목록)"""
+        pressed = []
+        while True:
+            try:
+                event_type, name, _ = self.events.get_nowait()
+            except queue.Empty:
+                return pressed
+            if event_type == KEY_DOWN:
+                pressed.append(name)
+
+    def wait_pressed(self, timeout=None):
+        """
+        다음 키 눌림까지 대기
+
+        Returns:
+            키 이름 또는 timeout 동안 입력이 없으면 None
+        """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            try:
+                event_type, name, _ = self.events.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            if event_type == KEY_DOWN:
+                return name
+
+
+class ScriptedKeySource(KeyInput):
+    """
+    정해진 순서대로 키 이벤트를 내보내는 입력 (키보드 없이 실행/시험용)
+
+    script는 (시작 후 시각(초), 이벤트, 키 이름) 목록이며 이벤트는
+    KEY_DOWN, KEY_UP 또는 'press'(눌렀다 바로 뗌)이다.
+    """
+
+    def __init__(self, script):
+        super().__init__()
+        self.script = sorted(script, key=lambda item: item[0])
+        self._thread = None
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self._play, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _play(self):
+        started = time.perf_counter()
+        for at, event_type, name in self.script:
+            delay = started + at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            if not self.running:
+                return
+            if event_type == 'press':
+                self.feed(KEY_DOWN, name)
+                self.feed(KEY_UP, name)
+            else:
+                self.feed(event_type, name)
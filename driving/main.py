@@ -11,28 +11,28 @@ import cv2
 import numpy as np
 import time
 import os
-import spidev
-import keyboard
 from driving_system_controller import DrivingSystemController
 from image_processor import ImageProcessor
 from config import MOTOR_ADDRESSES, ADDRESS_RANGE
+from hardware_session import HardwareSession
 from AutoLab_lib import init
 
 
 init()
-# Initialize SPI
-spi0 = spidev.SpiDev()
-spi0.open(0, 0)
-spi0.max_speed_hz = 20000000
-spi0.mode = 0b00
+# SPI / MMIO는 세션 하나가 소유하고 컨트롤러에 나눠 줌
+session = HardwareSession(spi_bus=0, spi_device=0, spi_speed_hz=20000000, spi_mode=0b00)
 
 # 자율주행 모드 뒷바퀴 & 조향 속도 설정 (0 ~ 100)
 speed = 50
 steering_speed = 50
-motors = {}
-
-for name, addr in MOTOR_ADDRESSES.items():
-    motors[name] = MMIO(addr, ADDRESS_RANGE)
+# 자율주행 조향 방식: 'bang_bang' (±7 좌/우/유지) 또는 'pid' (연속 목표 + PID duty)
+steering_mode = 'bang_bang'
+# 캡처/전처리/DPU/후처리를 스레드 파이프라인으로 실행할지 여부 (차량에서 검증 전까지 직렬 실행)
+pipelined = False
+# 인식/제어 루프 주기 (Hz)
+control_rate_hz = 30
+# 모터 6개는 주소가 이어져 있으므로 MMIO 매핑 하나를 나눠 사용
+motors = session.map_devices(MOTOR_ADDRESSES, ADDRESS_RANGE)
 
 
 def load_dpu():
@@ -47,8 +47,12 @@ def load_dpu():
 
 def main():
     overlay = load_dpu()
-    controller = DrivingSystemController(overlay, dpu, motors, speed, steering_speed)
-    controller.run(camera_index=0)
+    controller = DrivingSystemController(overlay, dpu, motors, speed, steering_speed, steering_mode,
+                                         spi=session.spi, control_rate_hz=control_rate_hz)
+    try:
+        controller.run(camera_index=0, pipelined=pipelined)
+    finally:
+        session.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
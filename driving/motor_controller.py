@@ -4,16 +4,26 @@
 # - Gyuhyeon Hwang <rbgus7080@g.skku.edu>, Hobin Oh <hobin0676@daum.net>, Minkwan Choi <arbong97@naver.com>, Hyeonjin Sim <nufxwms@naver.com>
 # - url: https://micro.skku.ac.kr/micro/index.do
 
+import math
 import time
 from threading import Lock
-import spidev
-import keyboard
 import numpy as np
+from stage_profiler import StageProfiler, SPAN_ADC_READ
+from register_cache import RegisterCache
+from steering_pid import PIDController
+from adc_sampler import AdcSampler
+
+# 자율주행 조향 방식
+STEERING_BANG_BANG = 'bang_bang'  # 목표 ±7 / 좌·우·유지 (기존 방식)
+STEERING_PID = 'pid'              # 연속 목표 각도 + PID duty
 
 class MotorController:
-    def __init__(self, motors):
-        # 기본 모터 설정
-        self.motors = motors
+    def __init__(self, motors, spi=None, profiler=None, steering_mode=STEERING_BANG_BANG):
+        # 구간별 지연 시간 히스토그램 (ADC 읽기, MMIO 쓰기)
+        self.profiler = profiler if profiler is not None else StageProfiler()
+        # 기본 모터 설정 (값이 바뀐 레지스터만 MMIO에 쓰도록 shadow register로 감쌈)
+        self.register_cache = RegisterCache(motors, profiler=self.profiler)
+        self.motors = self.register_cache.motors
         self.size = 600600  # 2ms
         self._left_speed = 0
         self._right_speed = 0
@@ -32,23 +42,38 @@ class MotorController:
         self.manual_steering_angle = 0
         self.manual_speed = 0
         
-        # SPI 설정
-        self.spi = spidev.SpiDev()
-        self.spi.open(0, 0)
-        self.spi.max_speed_hz = 20000000
-        self.spi.mode = 0b00
+        # SPI 설정 (외부에서 받은 SPI 객체가 없으면 직접 열기)
+        if spi is None:
+            import spidev
+            spi = spidev.SpiDev()
+            spi.open(0, 0)
+            spi.max_speed_hz = 20000000
+            spi.mode = 0b00
+        self.spi = spi
+        # 전송 한 번에 샘플 하나 (CS 토글마다 변환), 최근 5개 중앙값 필터 적용
+        self.adc_sampler = AdcSampler(spi, samples_per_read=1, window=5)
+
+        # 고속 조향 제어 스레드 (SteeringServo, 없으면 control_motors에서 바로 조향)
+        self.steering_servo = None
         
         # 저항 값 범위 설정
         self.resistance_most_left = 1045 
         self.resistance_most_right = 220 
+
+        # 조향 방식 (자율주행 모드에서만 적용, 수동 주행은 항상 기존 방식)
+        self.steering_mode = steering_mode
+        self.angle_gain = 7 / 45  # 직진 대비 45도 벗어나면 최대 조향
+        self.max_target = 7
+        # 출력은 조향 duty(%)이며 한계는 steering_speed
+        self.steering_pid = PIDController(kp=15.0, ki=2.0, kd=0.5)
+
     @property
     def steering_speed(self):
         return self._steering_speed
 
     @steering_speed.setter
     def steering_speed(self, value):
-        self._steering_speed = value
-        self.control_motors(self._steering_speed)  # 속도 변경 시 자동으로 반영
+        self._steering_speed = value  # 다음 control_motors 호출부터 반영
         
     @property
     def left_speed(self):
@@ -68,8 +93,17 @@ class MotorController:
         self._right_speed = value
         self.set_right_speed(self._right_speed)  # 속도 변경 시 자동으로 반영
 
+    def batch_writes(self):
+        """제어 틱 하나의 MMIO 쓰기를 묶어 블록 끝에서 한 번에 반영"""
+        return self.register_cache.batch()
+
+    def get_write_stats(self):
+        """MMIO 쓰기 요청/실제 쓰기/생략 횟수 반환"""
+        return self.register_cache.get_stats()
+
     def init_motors(self):
         """모터 초기화"""
+        self.register_cache.invalidate()  # 하드웨어 상태를 모르므로 모두 다시 쓰기
         for name, motor in self.motors.items():
             motor.write(0x00, self.size)     # size
             motor.write(0x04, self.min_duty)  # 초기 duty 50%
@@ -84,8 +118,10 @@ class MotorController:
         self.manual_speed = 0
         self.manual_steering_angle = 0
         self.current_duty = self.min_duty
+        self.steering_pid.reset()
         
-        # 모든 모터 정지
+        # 모든 모터 정지 (shadow 값과 관계없이 반드시 하드웨어에 쓰기)
+        self.register_cache.invalidate()
         for motor in self.motors.values():
             motor.write(0x08, 0)
         
@@ -140,6 +176,17 @@ class MotorController:
         self.motors['motor_5'].write(0x04, duty)
         self.motors['motor_1'].write(0x04, duty)
 
+    def steer_neutral(self, control_mode=1):
+        """
+        조향 중립 (조향 모터 motor_4/motor_5만 해제)
+
+        stay()는 motor_1(좌측 뒤 구동 모터)에도 쓰므로 조향 서보 주기에서는 이 함수를 쓴다.
+        """
+        if control_mode != 1:  # 수동 주행 모드: 조향 duty 가속 초기화
+            self.current_duty = self.min_duty
+        self.motors['motor_4'].write(0x08, 0)  # valid  steering_left
+        self.motors['motor_5'].write(0x08, 0)  # valid  steering_right
+
     def set_left_speed(self, speed):
         """왼쪽 모터 속도 설정"""
         duty_percent = abs(speed) / 100
@@ -171,11 +218,17 @@ class MotorController:
             self.motors['motor_2'].write(0x08, 0)
 
     def read_adc(self):
-        """ADC 값 읽기"""
-        adc_response = self.spi.xfer2([0x00, 0x00])
-        adc_value = ((adc_response[0] & 0x0F) << 8) | adc_response[1]
+        """ADC 값 읽기 (필터링된 값)"""
+        t = self.profiler.start()
+        adc_value = self.adc_sampler.read()
+        self.profiler.stop(SPAN_ADC_READ, t)
         return adc_value 
 
+    def read_adc_raw(self):
+        """필터 없이 ADC 샘플 한 개 읽기"""
+        adc_response = self.spi.xfer2([0x00, 0x00])
+        return ((adc_response[0] & 0x0F) << 8) | adc_response[1]
+
     def map_value(self, x, in_min, in_max, out_min, out_max):
         """
         x를 in_min~in_max 범위에서 out_min~out_max 범위로 매핑
@@ -198,50 +251,101 @@ class MotorController:
         else:
             return 0
 
+    def map_angle_continuous(self, angle):
+        """
+        차선 각도를 연속 목표 각도로 매핑
+
+        calculate_angle 결과는 ±90도가 직진이므로 직진에서 벗어난 정도에
+        부호를 붙여 angle_gain을 곱하고 ±max_target으로 자른다.
+        부호는 map_angle_to_range와 같다.
+        """
+        deviation = math.copysign(90 - abs(angle), angle)
+        return max(-self.max_target, min(self.max_target, deviation * self.angle_gain))
+
+    def set_steering_mode(self, mode):
+        """조향 방식 변경 (STEERING_BANG_BANG / STEERING_PID)"""
+        self.steering_pid.reset()
+        self.steering_mode = mode
+
+    def set_steering_gains(self, kp=None, ki=None, kd=None, angle_gain=None):
+        """PID 이득 / 각도 이득 변경 (주행 중 변경 가능)"""
+        self.steering_pid.set_gains(kp, ki, kd)
+        if angle_gain is not None:
+            self.angle_gain = angle_gain
+
     def control_motors(self, angle=None, control_mode=1):
         """모터 전체 제어"""
+        if angle is not None and self.steering_mode == STEERING_PID:
+            target_angle = self.map_angle_continuous(angle)
+        elif angle is not None:
+            target_angle = self.map_angle_to_range(angle)
+        else:
+            target_angle = self.steering_angle
+
+        # 조향 서보 스레드가 돌고 있으면 목표만 게시하고 조향은 서보 주기로 수행
+        if self.steering_servo is not None and self.steering_servo.running:
+            self.steering_servo.set_target(target_angle, control_mode)
+            return
+        self.steer_to(target_angle, control_mode)
+
+    def steer_to(self, target_angle, control_mode=1):
+        """조향 가변저항 값을 읽어 목표 각도 쪽으로 조향 모터 구동"""
         mapped_resistance = self.map_value(
             self.read_adc(),
             self.resistance_most_right,
             self.resistance_most_left,
             -7, 7
         )
-        
-        if angle is not None:
-            target_angle = self.map_angle_to_range(angle)
-        else:
-            target_angle = self.steering_angle
+
+        if control_mode == 1 and self.steering_mode == STEERING_PID:
+            self.steer_pid(target_angle, mapped_resistance)
+            return
             
         tolerance = 0.5
         if abs(mapped_resistance - target_angle) <= tolerance:
-            self.stay(self.steering_speed, control_mode)
+            self.steer_neutral(control_mode)
         elif mapped_resistance > target_angle:
             self.left(self.steering_speed, control_mode)
         else:
             self.right(self.steering_speed, control_mode)
 
-    def handle_manual_control(self):
-        """수동 주행 모드에서의 키보드 입력 처리"""
-        if keyboard.is_pressed('w'):
-            self.left_speed = min(self.left_speed + 1, 100)
-            self.right_speed = min(self.right_speed + 1, 100)
+    def steer_pid(self, target_angle, mapped_resistance):
+        """PID 출력(duty %)으로 조향 모터 구동 (양수: 우회전, 음수: 좌회전)"""
+        self.steering_pid.output_limit = abs(self.steering_speed)
+        output = self.steering_pid.update(target_angle, mapped_resistance)
+        if output >= 0:
+            self.right(output)
+        else:
+            self.left(output)
+
+    def handle_manual_control(self, keys):
+        """
+        수동 주행 모드에서의 키보드 입력 처리
+
+        Args:
+            keys: is_down(키 이름)을 제공하는 키 입력 (KeyInput)
+        """
+        with self.batch_writes():
+            if keys.is_down('w'):
+                self.left_speed = min(self.left_speed + 1, 100)
+                self.right_speed = min(self.right_speed + 1, 100)
             
-        if keyboard.is_pressed('s'):
-            self.left_speed = max(self.left_speed - 1, -100)
-            self.right_speed = max(self.right_speed - 1, -100)
+            if keys.is_down('s'):
+                self.left_speed = max(self.left_speed - 1, -100)
+                self.right_speed = max(self.right_speed - 1, -100)
             
-        if keyboard.is_pressed('a'):
-            self.steering_angle = min(self.steering_angle - 1, 20)
+            if keys.is_down('a'):
+                self.steering_angle = min(self.steering_angle - 1, 20)
             
-        if keyboard.is_pressed('d'):
-            self.steering_angle = max(self.steering_angle + 1, -20)
+            if keys.is_down('d'):
+                self.steering_angle = max(self.steering_angle + 1, -20)
             
-        if keyboard.is_pressed('r'):
-            self.left_speed = 0
-            self.right_speed = 0
-            self.steering_angle = 0
-
-        # 모터 제어 적용
-        self.set_left_speed(self.left_speed)
-        self.set_right_speed(self.right_speed)
-        self.control_motors(control_mode=2)
\ No newline at end of file
+            if keys.is_down('r'):
+                self.left_speed = 0
+                self.right_speed = 0
+                self.steering_angle = 0
+
+            # 모터 제어 적용
+            self.set_left_speed(self.left_speed)
+            self.set_right_speed(self.right_speed)
+            self.control_motors(control_mode=2)
\ No newline at end of file
@@ -0,0 +1,128 @@
+# Copyright (c) 2024 Sungkyunkwan University AutomationLab
+#
+# Authors:
+# - Gyuhyeon Hwang <rbgus7080@g.skku.edu>, Hobin Oh <hobin0676@daum.net>, Minkwan Choi <arbong97@naver.com>, Hyeonjin Sim <nufxwms@naver.com>
+# - url: https://micro.skku.ac.kr/micro/index.do
+
+import threading
+from contextlib import contextmanager
+from stage_profiler import SPAN_MMIO_WRITE
+
+
+class ShadowRegisters:
+    """
+    모터 MMIO 한 개의 shadow register
+
+    MMIO와 같은 write/read 인터페이스를 제공하며, 마지막으로 쓴 값과 같은 값은
+    하드웨어에 다시 쓰지 않는다. 묶음(batch) 안의 쓰기는 commit 때 한 번에 반영한다.
+    """
+
+    def __init__(self, cache, name, mmio):
+        self.cache = cache
+        self.name = name
+        self.mmio = mmio
+        self.values = {}
+
+    def write(self, offset, value):
+        self.cache.write(self, offset, value)
+
+    def read(self, offset):
+        return self.mmio.read(offset)
+
+
+class RegisterCache:
+    """
+    모터 MMIO 쓰기 병합 계층
+
+    batch() 블록 안에서 같은 레지스터에 여러 번 쓰면 마지막 값만 남기고,
+    블록이 끝날 때 이전 값과 달라진 레지스터만 순서대로 MMIO에 쓴다.
+    batch 상태는 스레드별로 관리하므로 다른 스레드의 쓰기는 바로 반영된다.
+    """
+
+    def __init__(self, motors, profiler=None):
+        """
+        Args:
+            motors: 모터 이름 -> MMIO 객체 딕셔너리
+            profiler: MMIO 쓰기 시간을 기록할 StageProfiler (선택)
+        """
+        self.raw_motors = motors
+        self.motors = {name: ShadowRegisters(self, name, mmio) for name, mmio in motors.items()}
+        self.profiler = profiler
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        # 통계
+        self.writes_requested = 0
+        self.writes_issued = 0
+        self.writes_avoided = 0
+        self.commits = 0
+
+    def _pending(self):
+        """현재 스레드의 batch 대기 쓰기 (batch 밖이면 None)"""
+        return getattr(self._local, 'pending', None)
+
+    def write(self, shadow, offset, value):
+        """레지스터 쓰기 요청 (batch 안이면 대기, 밖이면 바로 반영)"""
+        self.writes_requested += 1
+        pending = self._pending()
+        if pending is not None:
+            key = (shadow, offset)
+            if key in pending:
+                self.writes_avoided += 1
+            pending[key] = value
+            return
+        t = self.profiler.start() if self.profiler is not None else None
+        self._write_through(shadow, offset, value)
+        if t is not None:
+            self.profiler.stop(SPAN_MMIO_WRITE, t)
+
+    def _write_through(self, shadow, offset, value):
+        """shadow 값과 다를 때만 MMIO에 쓰기"""
+        with self._lock:
+            if shadow.values.get(offset) == value:
+                self.writes_avoided += 1
+                return
+            shadow.mmio.write(offset, value)
+            shadow.values[offset] = value
+            self.writes_issued += 1
+
+    @contextmanager
+    def batch(self):
+        """제어 틱 하나의 쓰기를 묶어 블록 끝에서 한 번에 반영 (중첩 가능)"""
+        pending = self._pending()
+        if pending is not None:
+            yield
+            return
+        self._local.pending = {}
+        try:
+            yield
+        finally:
+            pending = self._local.pending
+            self._local.pending = None
+            self.commit(pending)
+
+    def commit(self, pending):
+        """대기 중인 쓰기를 요청 순서대로 반영"""
+        if not pending:
+            return
+        t = self.profiler.start() if self.profiler is not None else None
+        for (shadow, offset), value in pending.items():
+            self._write_through(shadow, offset, value)
+        self.commits += 1
+        if t is not None:
+            self.profiler.stop(SPAN_MMIO_WRITE, t)
+
+    def invalidate(self):
+        """shadow 값을 비워 다음 쓰기가 반드시 하드웨어에 반영되도록 함"""
+        with self._lock:
+            for shadow in self.motors.values():
+                shadow.values.clear()
+
+    def get_stats(self):
+        """쓰기 통계 반환"""
+        return {
+            'requested': self.writes_requested,
+            'issued': self.writes_issued,
+            'avoided': self.writes_avoided,
+            'commits': self.commits,
+        }
@@ -0,0 +1,174 @@
+# Copyright (c) 2024 Sungkyunkwan University AutomationLab
+#
+# Authors:
+# - Gyuhyeon Hwang <rbgus7080@g.skku.edu>, Hobin Oh <hobin0676@daum.net>, Minkwan Choi <arbong97@naver.com>, Hyeonjin Sim <nufxwms@naver.com>
+# - url: https://micro.skku.ac.kr/micro/index.do
+
+import os
+import glob
+import time
+import itertools
+from threading import Lock
+import numpy as np
+
+
+class SimTensor:
+    """DPU 러너 텐서 정보 흉내 (dims, get_data_size, fix_point 속성)"""
+
+    def __init__(self, name, dims, dtype='float32', fix_point=None):
+        self.name = name
+        self.dims = tuple(dims)
+        self.dtype = dtype
+        self._attrs = {} if fix_point is None else {'fix_point': fix_point}
+
+    def get_data_size(self):
+        return int(np.prod(self.dims))
+
+    def has_attr(self, name):
+        return name in self._attrs
+
+    def get_attr(self, name):
+        return self._attrs[name]
+
+
+class SimDpuRunner:
+    """
+    보드 없이 주행 코드를 돌리기 위한 DPU 러너 대체품
+
+    pynq_dpu 러너와 같은 get_input_tensors / get_output_tensors /
+    execute_async / wait 인터페이스를 제공한다. 출력은 디스크에 녹화된
+    DPU 출력(.npz)을 순서대로 재생하거나 합성하며, 추론 지연 시간을 흉내낸다.
+    """
+
+    def __init__(self, input_shape=(1, 256, 256, 3), output_shapes=((1, 8, 8, 18), (1, 16, 16, 18)),
+                 latency=0.0, latency_jitter=0.0, recordings=None, num_lanes=2, seed=0):
+        """
+        Args:
+            input_shape: 입력 텐서 형태
+            output_shapes: 출력 텐서 형태 목록
+            latency: 추론 1회 지연 시간 (초)
+            latency_jitter: 지연 시간 표준편차 (초)
+            recordings: 재생할 출력 목록 [[out0, out1], ...] (None이면 합성)
+            num_lanes: 합성 출력에 넣을 차선 검출 수
+            seed: 합성용 난수 시드
+        """
+        self.input_tensors = [SimTensor('input', input_shape)]
+        self.output_tensors = [SimTensor(f'output_{i}', shape) for i, shape in enumerate(output_shapes)]
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.recordings = recordings
+        self.num_lanes = num_lanes
+        self.rng = np.random.default_rng(seed)
+
+        self._frame_index = 0
+        self._job_ids = itertools.count(1)
+        self._jobs = {}
+        self._lock = Lock()
+
+    @classmethod
+    def from_recordings(cls, path, latency=0.0, latency_jitter=0.0):
+        """
+        RecordingDpuRunner로 저장한 디렉터리에서 러너 생성
+
+        Args:
+            path: .npz 파일이 있는 디렉터리
+        """
+        files = sorted(glob.glob(os.path.join(path, '*.npz')))
+        if not files:
+            raise FileNotFoundError(f"녹화된 DPU 출력이 없습니다: {path}")
+        recordings = []
+        input_shape = (1, 256, 256, 3)
+        for file in files:
+            with np.load(file) as data:
+                keys = sorted(key for key in data.files if key.startswith('out'))
+                recordings.append([data[key] for key in keys])
+                if 'input_shape' in data.files:
+                    input_shape = tuple(int(v) for v in data['input_shape'])
+        output_shapes = [out.shape for out in recordings[0]]
+        return cls(input_shape, output_shapes, latency, latency_jitter, recordings)
+
+    def get_input_tensors(self):
+        return self.input_tensors
+
+    def get_output_tensors(self):
+        return self.output_tensors
+
+    def _synthesize(self, outputs):
+        """배경 위주의 YOLO 출력에 차선 몇 개를 넣어 합성"""
+        for out in outputs:
+            _, gh, gw, channels = out.shape
+            pred = out.reshape(gh, gw, 3, channels // 3)
+            pred[...] = self.rng.normal(0.0, 0.5, pred.shape)
+            pred[..., 4] -= 8.0  # 대부분 배경
+            for _ in range(self.num_lanes):
+                y, x, a = self.rng.integers(gh), self.rng.integers(gw), self.rng.integers(3)
+                pred[y, x, a, 4] = 3.0
+                pred[y, x, a, 5:] = 3.0
+
+    def execute_async(self, inputs, outputs):
+        """출력 버퍼를 채우고 지연 시간 후 완료되는 job 등록"""
+        if self.recordings is not None:
+            recording = self.recordings[self._frame_index % len(self.recordings)]
+            for out, recorded in zip(outputs, recording):
+                out[...] = recorded.reshape(out.shape)
+        else:
+            self._synthesize(outputs)
+        self._frame_index += 1
+
+        latency = self.latency
+        if self.latency_jitter:
+            latency = max(0.0, latency + self.rng.normal(0.0, self.latency_jitter))
+        with self._lock:
+            job_id = next(self._job_ids)
+            self._jobs[job_id] = time.perf_counter() + latency
+        return job_id
+
+    def wait(self, job_id):
+        """job 완료 시각까지 대기"""
+        with self._lock:
+            done_at = self._jobs.pop(job_id)
+        delay = done_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class RecordingDpuRunner:
+    """
+    실제 DPU 러너를 감싸 추론 결과를 .npz로 저장하는 래퍼
+
+    보드에서 녹화한 출력은 SimDpuRunner.from_recordings()로 재생할 수 있다.
+    """
+
+    def __init__(self, runner, path, max_frames=None):
+        """
+        Args:
+            runner: 감쌀 DPU 러너
+            path: 저장 디렉터리
+            max_frames: 최대 저장 프레임 수 (None이면 제한 없음)
+        """
+        self.runner = runner
+        self.path = path
+        self.max_frames = max_frames
+        self.saved = 0
+        self._outputs = {}
+        os.makedirs(path, exist_ok=True)
+
+    def get_input_tensors(self):
+        return self.runner.get_input_tensors()
+
+    def get_output_tensors(self):
+        return self.runner.get_output_tensors()
+
+    def execute_async(self, inputs, outputs):
+        job_id = self.runner.execute_async(inputs, outputs)
+        self._outputs[job_id] = (inputs[0].shape, outputs)
+        return job_id
+
+    def wait(self, job_id):
+        self.runner.wait(job_id)
+        input_shape, outputs = self._outputs.pop(job_id)
+        if self.max_frames is None or self.saved < self.max_frames:
+            arrays = {f'out{i}': out for i, out in enumerate(outputs)}
+            np.savez(os.path.join(self.path, f'{self.saved:06d}.npz'),
+                     input_shape=np.array(input_shape), **arrays)
+            self.saved += 1
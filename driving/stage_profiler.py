@@ -0,0 +1,123 @@
+# Copyright (c) 2024 Sungkyunkwan University AutomationLab
+#
+# Authors:
+# - Gyuhyeon Hwang <rbgus7080@g.skku.edu>, Hobin Oh <hobin0676@daum.net>, Minkwan Choi <arbong97@naver.com>, Hyeonjin Sim <nufxwms@naver.com>
+# - url: https://micro.skku.ac.kr/micro/index.do
+
+import time
+from bisect import bisect_right
+import numpy as np
+
+# 측정 구간 번호 (프레임마다 문자열/딕셔너리를 만들지 않도록 정수 사용)
+SPAN_WARP = 0
+SPAN_PREPROCESS = 1
+SPAN_DPU_SUBMIT = 2
+SPAN_DPU_WAIT = 3
+SPAN_DECODE = 4
+SPAN_NMS = 5
+SPAN_LANE_CENTER = 6
+SPAN_ADC_READ = 7
+SPAN_MMIO_WRITE = 8
+
+SPAN_NAMES = (
+    'warp',
+    'preprocess',
+    'dpu_submit',
+    'dpu_wait',
+    'decode',
+    'nms',
+    'lane_center',
+    'adc_read',
+    'mmio_write',
+)
+
+# 히스토그램 구간 경계 (us): 10us ~ 1s 로그 간격
+DEFAULT_BUCKETS_US = (10, 20, 50, 100, 200, 500, 1000, 2000, 5000,
+                      10000, 20000, 50000, 100000, 200000, 500000, 1000000)
+
+
+class StageProfiler:
+    """
+    상시 켜 두는 구간별 지연 시간 히스토그램
+
+    start()/stop() 한 쌍이 perf_counter_ns 두 번과 미리 할당한 배열 갱신만 하므로
+    주행 루프에 넣어도 부담이 작다. dump()는 키보드나 시그널로 필요할 때만 호출한다.
+    여러 스레드에서 같은 구간을 동시에 기록하면 드물게 카운트가 누락될 수 있다.
+    """
+
+    def __init__(self, span_names=SPAN_NAMES, bucket_edges_us=DEFAULT_BUCKETS_US):
+        """
+        Args:
+            span_names: 구간 이름 목록 (인덱스가 구간 번호)
+            bucket_edges_us: 히스토그램 구간 경계 (us, 오름차순)
+        """
+        self.span_names = tuple(span_names)
+        self.bucket_edges_us = tuple(bucket_edges_us)
+        self._edges_ns = [edge * 1000 for edge in bucket_edges_us]
+
+        num_spans = len(self.span_names)
+        self.counts = np.zeros((num_spans, len(self._edges_ns) + 1), dtype=np.int64)
+        self.total_ns = np.zeros(num_spans, dtype=np.int64)
+        self.max_ns = np.zeros(num_spans, dtype=np.int64)
+
+    def start(self):
+        """구간 시작 시각 (ns)"""
+        return time.perf_counter_ns()
+
+    def stop(self, span, start_ns):
+        """
+        구간 종료 기록
+
+        Args:
+            span: 구간 번호 (SPAN_*)
+            start_ns: start()가 반환한 값
+        """
+        elapsed = time.perf_counter_ns() - start_ns
+        self.counts[span, bisect_right(self._edges_ns, elapsed)] += 1
+        self.total_ns[span] += elapsed
+        if elapsed > self.max_ns[span]:
+            self.max_ns[span] = elapsed
+        return elapsed
+
+    def reset(self):
+        """누적 통계 초기화"""
+        self.counts[...] = 0
+        self.total_ns[...] = 0
+        self.max_ns[...] = 0
+
+    def _percentile_us(self, span, q):
+        """히스토그램에서 백분위 추정 (해당 구간 상한 경계, us)"""
+        counts = self.counts[span]
+        total = counts.sum()
+        if total == 0:
+            return 0.0
+        bucket = int(np.searchsorted(np.cumsum(counts), q * total))
+        if bucket < len(self.bucket_edges_us):
+            return float(self.bucket_edges_us[bucket])
+        return self.max_ns[span] / 1000.0
+
+    def snapshot(self):
+        """구간별 통계 딕셔너리 (us)"""
+        stats = {}
+        for span, name in enumerate(self.span_names):
+            count = int(self.counts[span].sum())
+            if count == 0:
+                continue
+            stats[name] = {
+                'count': count,
+                'mean_us': self.total_ns[span] / count / 1000.0,
+                'p50_us': self._percentile_us(span, 0.50),
+                'p95_us': self._percentile_us(span, 0.95),
+                'p99_us': self._percentile_us(span, 0.99),
+                'max_us': self.max_ns[span] / 1000.0,
+                'histogram': self.counts[span].tolist(),
+            }
+        return stats
+
+    def dump(self):
+        """구간별 통계 표 문자열 (백분위는 히스토그램 구간 상한)"""
+        lines = [f"{'span':<12}{'count':>8}{'mean':>10}{'p50<=':>10}{'p95<=':>10}{'p99<=':>10}{'max':>10}  (us)"]
+        for name, stat in self.snapshot().items():
+            lines.append(f"{name:<12}{stat['count']:>8}{stat['mean_us']:>10.1f}{stat['p50_us']:>10.0f}"
+                         f"{stat['p95_us']:>10.0f}{stat['p99_us']:>10.0f}{stat['max_us']:>10.1f}")
+        return '\n'.join(lines)
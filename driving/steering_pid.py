@@ -0,0 +1,82 @@
+# Copyright (c) 2024 Sungkyunkwan University AutomationLab
+#
+# Authors:
+# - Gyuhyeon Hwang <rbgus7080@g.skku.edu>, Hobin Oh <hobin0676@daum.net>, Minkwan Choi <arbong97@naver.com>, Hyeonjin Sim <nufxwms@naver.com>
+# - url: https://micro.skku.ac.kr/micro/index.do
+
+import time
+
+
+class PIDController:
+    """
+    anti-windup PID 제어기
+
+    출력이 한계에 걸려 있고 오차가 같은 방향으로 더 밀어낼 때는 적분을 멈춘다.
+    미분은 목표값 변화에 튀지 않도록 측정값 기준으로 계산한다.
+    이득은 주행 중에도 set_gains()로 바꿀 수 있다.
+    """
+
+    def __init__(self, kp=15.0, ki=2.0, kd=0.5, output_limit=100.0, integral_limit=None):
+        """
+        Args:
+            kp, ki, kd: 비례/적분/미분 이득
+            output_limit: 출력 절댓값 한계
+            integral_limit: 적분항 절댓값 한계 (None이면 output_limit)
+        """
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.output_limit = output_limit
+        self.integral_limit = integral_limit
+        self.reset()
+
+    def set_gains(self, kp=None, ki=None, kd=None):
+        """이득 변경 (None인 값은 유지)"""
+        if kp is not None:
+            self.kp = kp
+        if ki is not None:
+            self.ki = ki
+        if kd is not None:
+            self.kd = kd
+
+    def reset(self):
+        """적분/미분 상태 초기화"""
+        self.integral = 0.0
+        self.last_measurement = None
+        self.last_time = None
+        self.last_output = 0.0
+
+    def update(self, target, measurement, now=None):
+        """
+        제어 출력 계산
+
+        Args:
+            target: 목표값
+            measurement: 현재 측정값
+            now: 현재 시각 (초, None이면 perf_counter)
+        Returns:
+            -output_limit ~ output_limit 범위의 출력
+        """
+        if now is None:
+            now = time.perf_counter()
+        error = target - measurement
+        dt = 0.0 if self.last_time is None else now - self.last_time
+
+        derivative = 0.0
+        if dt > 0 and self.last_measurement is not None:
+            derivative = -(measurement - self.last_measurement) / dt
+
+        limit = self.output_limit
+        unclamped = self.kp * error + self.ki * self.integral + self.kd * derivative
+        saturated = abs(unclamped) >= limit and (unclamped > 0) == (error > 0)
+        if dt > 0 and self.ki and not saturated:
+            integral_limit = self.integral_limit if self.integral_limit is not None else limit / self.ki
+            self.integral = max(-integral_limit, min(integral_limit, self.integral + error * dt))
+
+        output = self.kp * error + self.ki * self.integral + self.kd * derivative
+        output = max(-limit, min(limit, output))
+
+        self.last_measurement = measurement
+        self.last_time = now
+        self.last_output = output
+        return output
@@ -0,0 +1,135 @@
+# Copyright (c) 2024 Sungkyunkwan University AutomationLab
+#
+# Authors:
+# - Gyuhyeon Hwang <rbgus7080@g.skku.edu>, Hobin Oh <hobin0676@daum.net>, Minkwan Choi <arbong97@naver.com>, Hyeonjin Sim <nufxwms@naver.com>
+# - url: https://micro.skku.ac.kr/micro/index.do
+
+import time
+import threading
+import numpy as np
+
+
+class TargetMailbox:
+    """
+    조향 목표를 전달하는 단일 슬롯 우편함
+
+    쓰는 쪽은 (seq, target, control_mode, 시각) 튜플을 새로 만들어 속성 하나에
+    대입하고, 읽는 쪽은 그 속성을 한 번 읽는다. 속성 대입/읽기는 원자적이므로
+    잠금 없이 항상 최신 목표 한 개만 주고받는다. 쓰는 스레드는 하나라고 가정한다.
+    """
+
+    def __init__(self, target=0, control_mode=1):
+        self._slot = (0, target, control_mode, time.perf_counter())
+
+    def publish(self, target, control_mode=1):
+        """새 목표 게시 (이전 목표는 덮어씀)"""
+        self._slot = (self._slot[0] + 1, target, control_mode, time.perf_counter())
+
+    def read(self):
+        """최신 (seq, target, control_mode, published_at) 반환"""
+        return self._slot
+
+
+class SteeringServo:
+    """
+    영상 처리 주기와 분리된 고속 조향 제어 스레드
+
+    고정 주기마다 조향 가변저항 ADC를 읽어 motor_4/motor_5를 우편함의 목표
+    각도 쪽으로 구동한다. 주기는 시작 시각 기준으로 계산해 누적 오차가 없으며,
+    주기를 놓치면 건너뛰고 overrun으로 센다.
+    """
+
+    def __init__(self, motor_controller, rate_hz=500, jitter_history=1024):
+        """
+        Args:
+            motor_controller: MotorController (steer_to 사용)
+            rate_hz: 제어 주기 (Hz)
+            jitter_history: 보관할 주기별 지연(jitter) 개수
+        """
+        self.motor_controller = motor_controller
+        self.period = 1.0 / rate_hz
+        self.mailbox = TargetMailbox()
+
+        self.running = False
+        self.enabled = False
+        self._thread = None
+        self._step_lock = threading.Lock()
+
+        # 통계
+        self.ticks = 0
+        self.overruns = 0
+        self._jitter = np.zeros(jitter_history, dtype=np.float64)
+        self._started_at = None
+
+    def set_target(self, target, control_mode=1):
+        """목표 조향 각도 게시 (영상 처리 / 수동 조작 쪽에서 호출)"""
+        self.mailbox.publish(target, control_mode)
+
+    def start(self):
+        """제어 스레드 시작 (enable() 전까지는 모터를 구동하지 않음)"""
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """제어 스레드 정지"""
+        self.disable()
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def enable(self):
+        """조향 구동 시작"""
+        self.enabled = True
+
+    def disable(self):
+        """조향 구동 중지 (진행 중인 주기가 끝날 때까지 대기)"""
+        self.enabled = False
+        with self._step_lock:
+            pass
+
+    def _loop(self):
+        motor_controller = self.motor_controller
+        period = self.period
+        self._started_at = next_tick = time.perf_counter()
+        while self.running:
+            now = time.perf_counter()
+            if next_tick > now:
+                time.sleep(next_tick - now)
+                now = time.perf_counter()
+
+            self._jitter[self.ticks % self._jitter.size] = now - next_tick
+            self.ticks += 1
+
+            with self._step_lock:
+                if self.enabled:
+                    _, target, control_mode, _ = self.mailbox.read()
+                    with motor_controller.batch_writes():
+                        motor_controller.steer_to(target, control_mode)
+
+            next_tick += period
+            now = time.perf_counter()
+            if now > next_tick:
+                # 놓친 주기는 건너뛰고 다음 주기에 맞춤
+                missed = int((now - next_tick) / period) + 1
+                self.overruns += missed
+                next_tick += missed * period
+
+    def get_stats(self):
+        """주기 수, 실제 주기(Hz), overrun, 깨어남 지연 통계 (us)"""
+        n = min(self.ticks, self._jitter.size)
+        stats = {
+            'ticks': self.ticks,
+            'overruns': self.overruns,
+        }
+        if self._started_at is not None and self.ticks:
+            stats['rate_hz'] = self.ticks / (time.perf_counter() - self._started_at)
+        if n:
+            jitter_us = self._jitter[:n] * 1e6
+            stats['jitter_us_p50'] = float(np.percentile(jitter_us, 50))
+            stats['jitter_us_p99'] = float(np.percentile(jitter_us, 99))
+            stats['jitter_us_max'] = float(jitter_us.max())
+        return stats
@@ -0,0 +1,88 @@
+# Copyright (c) 2024 Sungkyunkwan University AutomationLab
+#
+# Authors:
+# - Gyuhyeon Hwang <rbgus7080@g.skku.edu>, Hobin Oh <hobin0676@daum.net>, Minkwan Choi <arbong97@naver.com>, Hyeonjin Sim <nufxwms@naver.com>
+# - url: https://micro.skku.ac.kr/micro/index.do
+
+"""FrameScheduler의 overrun / 입력 부족(starved) 구분 시험 (python -m pytest)"""
+
+import pytest
+
+import frame_scheduler
+from frame_scheduler import FrameScheduler, LEVEL_NORMAL, LEVEL_REDUCED, LEVEL_SKIP_PERCEPTION
+
+
+class FakeClock:
+    """perf_counter / sleep을 대신하는 가짜 시계"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def perf_counter(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(frame_scheduler, 'time', clock)
+    return clock
+
+
+def run_tick(scheduler, clock, input_after, compute):
+    """input_after초 뒤 입력이 오는 tick 하나 (None이면 마감까지 입력 없음)"""
+    scheduler.wait_tick()
+
+    def read(timeout):
+        if input_after is None or input_after > timeout:
+            clock.sleep(timeout)
+            return None
+        clock.sleep(input_after)
+        return 'frame'
+
+    result = scheduler.wait_input(read)
+    if result is None:
+        # 실제 루프처럼 마지막 각도 재사용에 약간의 시간이 듦
+        clock.sleep(0.0002)
+        return scheduler.end_tick(starved=True)
+    clock.sleep(compute)
+    return scheduler.end_tick()
+
+
+def test_waiting_for_input_is_not_an_overrun(clock):
+    scheduler = FrameScheduler(rate_hz=30)
+    for _ in range(300):
+        # 입력이 마감 직전에 도착하면 계산은 짧아도 마감을 넘김
+        run_tick(scheduler, clock, input_after=0.033, compute=0.005)
+    assert scheduler.overruns == 0
+    assert scheduler.level == LEVEL_NORMAL
+
+
+def test_starved_ticks_do_not_degrade(clock):
+    scheduler = FrameScheduler(rate_hz=30)
+    for _ in range(300):
+        run_tick(scheduler, clock, input_after=None, compute=0.0)
+    stats = scheduler.get_stats()
+    assert stats['overruns'] == 0
+    assert stats['starved_ticks'] == 300
+    assert stats['level'] == 'normal'
+
+
+def test_compute_past_deadline_degrades(clock):
+    scheduler = FrameScheduler(rate_hz=30, degrade_after=5)
+    for _ in range(5):
+        run_tick(scheduler, clock, input_after=0.0, compute=0.040)
+    assert scheduler.level == LEVEL_REDUCED
+
+
+def test_recovers_while_every_other_tick_is_starved(clock):
+    scheduler = FrameScheduler(rate_hz=30, recover_after=60)
+    scheduler._set_level(LEVEL_SKIP_PERCEPTION)
+    for tick in range(130):
+        # skip_perception 단계에서는 프레임이 두 번에 한 번만 오므로 절반은 입력 없음
+        run_tick(scheduler, clock, input_after=0.001 if tick % 2 == 0 else None, compute=0.005)
+    assert scheduler.level < LEVEL_SKIP_PERCEPTION
+    assert scheduler.starved_ticks == 65
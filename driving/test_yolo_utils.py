@@ -0,0 +1,177 @@
+# Copyright (c) 2024 Sungkyunkwan University AutomationLab
+#
+# Authors:
+# - Gyuhyeon Hwang <rbgus7080@g.skku.edu>, Hobin Oh <hobin0676@daum.net>, Minkwan Choi <arbong97@naver.com>, Hyeonjin Sim <nufxwms@naver.com>
+# - url: https://micro.skku.ac.kr/micro/index.do
+
+"""yolo_utils 시험 (python -m pytest)
+
+- batched_nms / select_boxes를 기존 클래스별 nms_boxes 루프와 비교
+  (nms_boxes는 기존 구현 그대로이며 동점 순서 포함 비교 기준으로 쓴다)
+- InputPreprocessor를 기존 pre_process()와 비교
+- decode_outputs의 decoder / image_shape 확인
+"""
+
+import numpy as np
+import pytest
+
+from yolo_utils import (nms_boxes, batched_nms, select_boxes, pre_process, InputPreprocessor,
+                        decode_outputs, YoloDecoder)
+
+
+def reference_select_boxes(boxes, box_scores, score_thresh=0.3, max_boxes=20, iou_thresh=0.1,
+                           nms_topk=None):
+    """기존 evaluate()의 클래스별 NMS 루프 (topk는 전체 후보 중 점수 상위 k개만 남긴 뒤 적용)"""
+    mask = box_scores >= score_thresh
+    if nms_topk is not None:
+        rows, classes = np.nonzero(mask)
+        scores = box_scores[rows, classes]
+        top = np.argsort(scores, kind='stable')[::-1][:nms_topk]
+        mask = np.zeros_like(mask)
+        mask[rows[top], classes[top]] = True
+
+    boxes_, scores_, classes_ = [], [], []
+    for c in range(box_scores.shape[1]):
+        class_boxes = boxes[mask[:, c]]
+        class_box_scores = box_scores[:, c][mask[:, c]]
+        nms_index = nms_boxes(class_boxes, class_box_scores, iou_thresh)[:max_boxes]
+        boxes_.append(class_boxes[nms_index])
+        scores_.append(class_box_scores[nms_index])
+        classes_.append(np.ones(len(nms_index), dtype=np.int32) * c)
+    return np.concatenate(boxes_), np.concatenate(scores_), np.concatenate(classes_)
+
+
+def make_candidates(seed, n=120, num_classes=4, tie_levels=None):
+    """겹치는 박스가 많은 무작위 후보 (tie_levels가 있으면 점수를 그 단계로 양자화해 동점 생성)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(20, 200, size=(8, 2))
+    xy = centers[rng.integers(0, len(centers), n)] + rng.normal(0, 6, size=(n, 2))
+    wh = rng.uniform(10, 40, size=(n, 2))
+    boxes = np.concatenate([xy - wh / 2, xy + wh / 2], axis=1).astype(np.float32)
+    box_scores = rng.uniform(0, 1, size=(n, num_classes)).astype(np.float32)
+    if tie_levels is not None:
+        box_scores = (np.round(box_scores * tie_levels) / tie_levels).astype(np.float32)
+    return boxes, box_scores
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('iou_thresh', [0.1, 0.3, 0.5, 0.7])
+@pytest.mark.parametrize('nms_topk', [None, 7, 40])
+@pytest.mark.parametrize('max_boxes', [20, 3])
+@pytest.mark.parametrize('tie_levels', [None, 5])
+def test_select_boxes_matches_per_class_loop(seed, iou_thresh, nms_topk, max_boxes, tie_levels):
+    boxes, box_scores = make_candidates(seed, tie_levels=tie_levels)
+    expected = reference_select_boxes(boxes, box_scores, max_boxes=max_boxes, iou_thresh=iou_thresh,
+                                      nms_topk=nms_topk)
+    actual = select_boxes(boxes, box_scores, max_boxes=max_boxes, iou_thresh=iou_thresh,
+                          nms_topk=nms_topk)
+    for a, e in zip(actual, expected):
+        np.testing.assert_array_equal(a, e)
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+@pytest.mark.parametrize('nms_topk', [None, 50])
+def test_select_boxes_matches_with_dense_ties(seed, nms_topk):
+    # 클래스당 후보가 많고 점수가 몇 단계뿐인 경우 (정렬 알고리즘의 동점 처리까지 같아야 함)
+    boxes, box_scores = make_candidates(seed, n=600, num_classes=2, tie_levels=3)
+    expected = reference_select_boxes(boxes, box_scores, max_boxes=600, nms_topk=nms_topk, iou_thresh=0.5)
+    actual = select_boxes(boxes, box_scores, max_boxes=600, nms_topk=nms_topk, iou_thresh=0.5)
+    for a, e in zip(actual, expected):
+        np.testing.assert_array_equal(a, e)
+
+
+def test_select_boxes_no_candidates():
+    boxes, box_scores = make_candidates(0)
+    result = select_boxes(boxes, box_scores * 0)
+    assert all(len(part) == 0 for part in result)
+
+
+@pytest.mark.parametrize('n', [3, 17, 300])
+def test_tie_order_matches_nms_boxes(n):
+    # 점수가 모두 같고 겹치지 않는 박스: 출력 순서가 기존 nms_boxes의 정렬 순서와 같아야 함
+    offsets = np.arange(n, dtype=np.float32)[:, None] * 50
+    boxes = np.array([0, 0, 10, 10], dtype=np.float32) + offsets
+    scores = np.full(n, 0.5, dtype=np.float32)
+    classes = np.zeros(n, dtype=np.int64)
+    expected = nms_boxes(boxes, scores)
+    assert batched_nms(boxes, scores, classes, max_boxes=n).tolist() == expected
+
+
+@pytest.mark.parametrize('n', [2, 40])
+def test_tie_order_decides_survivor(n):
+    # 완전히 겹치는 동점 박스: 기존 nms_boxes가 먼저 고르는 후보가 남음
+    boxes = np.tile(np.array([[0, 0, 10, 10]], dtype=np.float32), (n, 1))
+    scores = np.full(n, 0.8, dtype=np.float32)
+    classes = np.zeros(n, dtype=np.int64)
+    survivor = nms_boxes(boxes, scores)
+    assert len(survivor) == 1
+    assert batched_nms(boxes, scores, classes).tolist() == survivor
+
+
+def test_topk_keeps_highest_scores_across_classes():
+    boxes = np.array([[0, 0, 10, 10], [50, 50, 60, 60], [100, 100, 110, 110]], dtype=np.float32)
+    scores = np.array([0.9, 0.4, 0.7], dtype=np.float32)
+    classes = np.array([1, 0, 0])
+    assert batched_nms(boxes, scores, classes, topk=2).tolist() == [2, 0]
+
+
+def make_frame(seed, h, w):
+    return np.random.default_rng(seed).integers(0, 256, size=(h, w, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize('size', [(480, 640), (256, 256), (180, 640), (300, 200)])
+def test_preprocessor_matches_pre_process(size):
+    buffer = np.empty((1, 256, 256, 3), dtype=np.float32)
+    preprocess = InputPreprocessor(buffer)
+    frame = make_frame(0, *size)
+    expected = pre_process(frame, (256, 256))
+    np.testing.assert_allclose(preprocess(frame), expected, rtol=1e-6, atol=0)
+
+
+@pytest.mark.parametrize('input_scale', [64.0, 128.0])
+def test_preprocessor_fixed_point_input(input_scale):
+    buffer = np.empty((1, 256, 256, 3), dtype=np.int8)
+    preprocess = InputPreprocessor(buffer, input_scale)
+    frame = make_frame(1, 480, 640)
+    reference = pre_process(frame, (256, 256)).astype(np.float64) * input_scale
+    expected = np.clip(np.rint(reference), -128, 127).astype(np.int8)
+    np.testing.assert_array_equal(preprocess(frame), expected)
+
+
+def test_preprocessor_reuses_buffer_across_frame_sizes():
+    # 크기가 바뀌면 여백을 다시 채우고, 같은 크기의 다음 프레임은 이전 결과를 남기지 않아야 함
+    buffer = np.empty((1, 256, 256, 3), dtype=np.float32)
+    preprocess = InputPreprocessor(buffer)
+    for seed, size in enumerate([(480, 640), (256, 256), (480, 640), (480, 640)]):
+        frame = make_frame(seed, *size)
+        out = preprocess(frame)
+        assert out is buffer
+        np.testing.assert_allclose(out, pre_process(frame, (256, 256)), rtol=1e-6, atol=0)
+
+
+ANCHORS = np.array([[10, 14], [23, 27], [37, 58], [81, 82], [135, 169], [344, 319]], dtype=np.float32)
+CLASS_NAMES = ['a', 'b']
+
+
+def make_outputs(seed, num_classes=2):
+    rng = np.random.default_rng(seed)
+    depth = 3 * (num_classes + 5)
+    return [rng.normal(0, 2, size=(1, 8, 8, depth)).astype(np.float32),
+            rng.normal(0, 2, size=(1, 16, 16, depth)).astype(np.float32)]
+
+
+def test_decode_outputs_with_decoder_matches_reference():
+    outputs = make_outputs(0)
+    decoder = YoloDecoder([o.shape for o in outputs], ANCHORS, len(CLASS_NAMES), (256, 256))
+    expected = decode_outputs(outputs, (256, 256), CLASS_NAMES, ANCHORS)
+    actual = decode_outputs(outputs, (256, 256), CLASS_NAMES, ANCHORS, decoder=decoder)
+    for a, e in zip(actual, expected):
+        np.testing.assert_allclose(a, e, rtol=1e-4, atol=1e-3)
+
+
+@pytest.mark.parametrize('early_reject', [False, True])
+def test_decode_outputs_rejects_decoder_for_other_image_shape(early_reject):
+    outputs = make_outputs(1)
+    decoder = YoloDecoder([o.shape for o in outputs], ANCHORS, len(CLASS_NAMES), (256, 256))
+    with pytest.raises(AssertionError):
+        decode_outputs(outputs, (480, 640), CLASS_NAMES, ANCHORS, decoder=decoder, early_reject=early_reject)
@@ -0,0 +1,82 @@
+# Copyright (c) 2024 Sungkyunkwan University AutomationLab
+#
+# Authors:
+# - Gyuhyeon Hwang <rbgus7080@g.skku.edu>, Hobin Oh <hobin0676@daum.net>, Minkwan Choi <arbong97@naver.com>, Hyeonjin Sim <nufxwms@naver.com>
+# - url: https://micro.skku.ac.kr/micro/index.do
+
+import cv2
+import numpy as np
+
+
+class WarpEngine:
+    """
+    Bird-eye 변환 + ROI 자르기 + 리사이즈를 한 번의 cv2.remap으로 처리
+
+    (프레임 크기, src/dst 좌표) 조합마다 투시 변환 행렬과 remap 좌표표를
+    한 번만 계산해 두고, 이후 프레임에서는 cutting_idx 아래 영역만
+    output_size 크기로 바로 샘플링한다.
+    """
+
+    def __init__(self, cutting_idx=300, output_size=(256, 256), interpolation=cv2.INTER_LINEAR):
+        """
+        Args:
+            cutting_idx: bird-eye 이미지에서 잘라낼 상단 행 수
+            output_size: 출력 이미지 크기 (width, height)
+            interpolation: remap 보간 방식
+        """
+        self.cutting_idx = cutting_idx
+        self.output_size = output_size
+        self.interpolation = interpolation
+        self._maps = {}
+        self._outputs = {}
+
+    def _build_maps(self, h, w, srcmat, dstmat):
+        """출력 픽셀 -> 원본 픽셀 좌표표 생성"""
+        out_w, out_h = self.output_size
+        roi_h = h - self.cutting_idx
+
+        # dst -> src 역변환 (warpPerspective 가 내부적으로 사용하는 행렬)
+        minv = cv2.getPerspectiveTransform(np.float32(dstmat), np.float32(srcmat))
+
+        # cv2.resize(INTER_LINEAR)와 같은 픽셀 중심 정렬로 ROI 좌표 계산
+        xs = (np.arange(out_w, dtype=np.float64) + 0.5) * (w / out_w) - 0.5
+        ys = (np.arange(out_h, dtype=np.float64) + 0.5) * (roi_h / out_h) - 0.5 + self.cutting_idx
+        grid_x, grid_y = np.meshgrid(xs, ys)
+
+        denom = minv[2, 0] * grid_x + minv[2, 1] * grid_y + minv[2, 2]
+        map_x = (minv[0, 0] * grid_x + minv[0, 1] * grid_y + minv[0, 2]) / denom
+        map_y = (minv[1, 0] * grid_x + minv[1, 1] * grid_y + minv[1, 2]) / denom
+
+        # 고정소수점 좌표표로 변환하면 remap 이 ARM 에서 더 빠름
+        return cv2.convertMaps(map_x.astype(np.float32), map_y.astype(np.float32), cv2.CV_16SC2)
+
+    def warp(self, img, srcmat, dstmat, out=None):
+        """
+        bird-eye 변환된 ROI 이미지 반환
+
+        Args:
+            img: 입력 프레임
+            srcmat: 원본 좌표 4개 (튜플의 튜플)
+            dstmat: 변환 후 좌표 4개 (튜플의 튜플)
+            out: 결과를 기록할 버퍼 (없으면 내부 버퍼를 재사용)
+        Returns:
+            output_size 크기의 ROI 이미지
+        """
+        h, w = img.shape[0], img.shape[1]
+        key = (h, w, srcmat, dstmat)
+        maps = self._maps.get(key)
+        if maps is None:
+            maps = self._build_maps(h, w, srcmat, dstmat)
+            self._maps[key] = maps
+
+        if out is None:
+            out_key = img.shape[2:] + (img.dtype,)
+            out = self._outputs.get(out_key)
+            if out is None:
+                out_w, out_h = self.output_size
+                out = np.empty((out_h, out_w) + img.shape[2:], dtype=img.dtype)
+                self._outputs[out_key] = out
+
+        cv2.remap(img, maps[0], maps[1], self.interpolation, dst=out,
+                  borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+        return out
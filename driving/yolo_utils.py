@@ -7,6 +7,9 @@
 import cv2
 import numpy as np
 
+# 출력 레이어별 anchor 인덱스 (13x13 -> 큰 anchor, 26x26 -> 작은 anchor)
+ANCHOR_MASK = [[3, 4, 5], [0, 1, 2]]
+
 def letterbox_image(image, size):
     ih, iw, _ = image.shape
     w, h = size
@@ -30,6 +33,97 @@ def pre_process(image, model_image_size):
     image_data = np.array(boxed_image, dtype='float32') / 255.
     return np.expand_dims(image_data, 0)
 
+def get_input_quantization(tensor):
+    """
+    DPU 입력 텐서의 버퍼 dtype과 입력 스케일 반환
+
+    xmodel이 정수형 입력 텐서와 fix_point 속성을 보고하면
+    (np.int8, 2**fix_point), 그렇지 않으면 (np.float32, 1.0)
+    """
+    dtype = str(getattr(tensor, 'dtype', '')).lower()
+    if 'int8' in dtype and hasattr(tensor, 'has_attr') and tensor.has_attr('fix_point'):
+        return np.int8, float(2 ** tensor.get_attr('fix_point'))
+    return np.float32, 1.0
+
+class InputPreprocessor:
+    """
+    letterbox + BGR->RGB + 정규화를 DPU 입력 버퍼에 바로 기록하는 전처리기
+
+    pre_process()와 같은 결과를 프레임마다 새 배열을 만들지 않고 얻는다.
+    letterbox 배치는 입력 이미지 크기별로 한 번만 계산하고, 채널 순서는
+    미리 할당한 uint8 버퍼로 바꾼 뒤, 픽셀 값 변환은 채널별 256 크기
+    스케일 표(cv2.LUT)로 입력 버퍼의 letterbox 영역에 바로 기록한다.
+    """
+
+    def __init__(self, input_buffer, input_scale=1.0, channel_scale=(1/255., 1/255., 1/255.)):
+        """
+        Args:
+            input_buffer: DPU 입력 텐서 (예: (1, 256, 256, 3))
+            input_scale: xmodel 고정소수점 입력 스케일 (2**fix_point)
+            channel_scale: RGB 채널별 정규화 계수
+        """
+        self.input_buffer = input_buffer
+        self.target = input_buffer.reshape(input_buffer.shape[-3:])
+        h, w, _ = self.target.shape
+        assert h % 32 == 0 and w % 32 == 0
+        self.model_image_size = (h, w)
+
+        # RGB 채널별 uint8 -> 입력값 변환표 (고정소수점이면 반올림/포화 포함)
+        values = np.arange(256, dtype=np.float64)
+        table = np.empty((1, 256, 3), dtype=self.target.dtype)
+        for c in range(3):
+            scaled = values * channel_scale[c] * input_scale
+            if np.issubdtype(table.dtype, np.integer):
+                info = np.iinfo(table.dtype)
+                scaled = np.clip(np.rint(scaled), info.min, info.max)
+            table[0, :, c] = scaled
+        self.scale_table = table
+
+        self._geometry_key = None
+        self._geometry = None
+        self._resized = None
+        self._rgb = None
+
+    def _prepare_geometry(self, ih, iw):
+        """입력 크기에 맞는 letterbox 배치 계산 및 여백 채우기"""
+        h, w = self.model_image_size
+        scale = min(w/iw, h/ih)
+        nw, nh = int(iw*scale), int(ih*scale)
+        h_start, w_start = (h-nh)//2, (w-nw)//2
+
+        # 여백(회색 128)은 배치가 바뀔 때만 채움
+        self.target[...] = self.scale_table[0, 128]
+
+        self._geometry = (nw, nh, h_start, w_start)
+        self._geometry_key = (ih, iw)
+        if (nw, nh) != (iw, ih):
+            self._resized = np.empty((nh, nw, 3), dtype=np.uint8)
+        else:
+            self._resized = None
+        self._rgb = np.empty((nh, nw, 3), dtype=np.uint8)
+
+    def __call__(self, image):
+        """
+        BGR uint8 이미지를 전처리해 input_buffer에 기록
+
+        Args:
+            image: BGR 이미지 (H, W, 3) uint8
+        Returns:
+            input_buffer
+        """
+        ih, iw = image.shape[0], image.shape[1]
+        if self._geometry_key != (ih, iw):
+            self._prepare_geometry(ih, iw)
+        nw, nh, h_start, w_start = self._geometry
+
+        if self._resized is not None:
+            image = cv2.resize(image, (nw, nh), dst=self._resized, interpolation=cv2.INTER_LINEAR)
+
+        cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        region = self.target[h_start:h_start+nh, w_start:w_start+nw]
+        cv2.LUT(self._rgb, self.scale_table, dst=region)
+        return self.input_buffer
+
 # YOLOv3 detection functions
 def _get_feats(feats, anchors, num_classes, input_shape):
     num_anchors = len(anchors)
@@ -81,7 +175,160 @@ def boxes_and_scores(feats, anchors, classes_num, input_shape, image_shape):
     box_scores = np.reshape(box_scores, [-1, classes_num])
     return boxes, box_scores
 
-def nms_boxes(boxes, scores):
+class YoloDecoder:
+    """
+    고정된 DPU 출력 형태에 맞춰 미리 계산된 YOLO 디코더
+
+    grid, anchor 크기, correct_boxes의 offset/scale을 생성 시 한 번만 계산해
+    레이어별 gain/bias 텐서로 접어 두고, 매 프레임은 미리 할당된 배열에
+    sigmoid 1회 + exp 1회 + 곱/합 몇 번으로 boxes_and_scores()와 같은 결과를 만든다.
+    """
+
+    def __init__(self, output_shapes, anchors, num_classes, image_shape, anchor_mask=ANCHOR_MASK):
+        """
+        Args:
+            output_shapes: DPU 출력 텐서 형태 목록 (shapeOut0, shapeOut1)
+            anchors: 전체 anchor 배열 (config.anchors)
+            num_classes: 클래스 수
+            image_shape: 박스 좌표계로 쓸 이미지 크기 (h, w)
+            anchor_mask: 출력 레이어별 anchor 인덱스
+        """
+        self.num_classes = num_classes
+        self.image_shape = tuple(image_shape)
+        nu = num_classes + 5
+        anchors = np.asarray(anchors, dtype=np.float32)
+
+        input_shape = np.array(output_shapes[0][1:3], dtype=np.float32) * 32
+        image_shape = np.array(image_shape, dtype=np.float32)
+        new_shape = np.around(image_shape * np.min(input_shape / image_shape))
+        offset = (input_shape - new_shape) / 2. / input_shape
+        scale = input_shape / new_shape
+
+        # (y, x) 순서 값을 (x, y) 순서로 맞춤
+        offset_xy = offset[::-1]
+        scale_xy = scale[::-1] * image_shape[::-1]
+        input_xy = input_shape[::-1]
+
+        self.layers = []
+        total = 0
+        for i, shape in enumerate(output_shapes):
+            gh, gw = int(shape[1]), int(shape[2])
+            layer_anchors = anchors[anchor_mask[i]]
+            num_anchors = len(layer_anchors)
+            assert int(shape[3]) == num_anchors * nu
+
+            grid_xy = np.empty((gh, gw, 1, 2), dtype=np.float32)
+            grid_xy[..., 0] = np.arange(gw, dtype=np.float32)[None, :, None]
+            grid_xy[..., 1] = np.arange(gh, dtype=np.float32)[:, None, None]
+            grid_size = np.array([gw, gh], dtype=np.float32)
+
+            # 이미지 좌표 중심 = sigmoid(txy) * xy_gain + xy_bias
+            xy_gain = (scale_xy / grid_size).astype(np.float32)
+            xy_bias = ((grid_xy / grid_size - offset_xy) * scale_xy).astype(np.float32)
+            # 이미지 좌표 반폭/반높이 = exp(twh) * half_wh_gain
+            half_wh_gain = (layer_anchors / input_xy * scale_xy * 0.5).astype(np.float32)
+
+            count = gh * gw * num_anchors
+            flat_shape = (gh, gw, num_anchors, 2)
+            self.layers.append({
+                'shape': (gh, gw, num_anchors, nu),
+                'start': total,
+                'stop': total + count,
+                'xy_gain': xy_gain,
+                'xy_bias': xy_bias,
+                'half_wh_gain': half_wh_gain,
+                'xy_bias_flat': np.broadcast_to(xy_bias, flat_shape).reshape(-1, 2).copy(),
+                'half_wh_gain_flat': np.broadcast_to(half_wh_gain, flat_shape).reshape(-1, 2).copy(),
+                'sig': np.empty((gh, gw, num_anchors, nu), dtype=np.float32),
+                'center': np.empty((gh, gw, num_anchors, 2), dtype=np.float32),
+                'half_wh': np.empty((gh, gw, num_anchors, 2), dtype=np.float32),
+            })
+            total += count
+
+        self.boxes = np.empty((total, 4), dtype=np.float32)
+        self.box_scores = np.empty((total, num_classes), dtype=np.float32)
+
+    def decode(self, yolo_outputs):
+        """
+        전체 anchor의 박스와 클래스 점수 계산
+
+        Args:
+            yolo_outputs: DPU 출력 텐서 목록
+        Returns:
+            boxes (N, 4) [y1, x1, y2, x2], box_scores (N, num_classes)
+            (디코더 내부 버퍼이므로 다음 호출 전까지만 유효)
+        """
+        for feats, layer in zip(yolo_outputs, self.layers):
+            pred = np.reshape(feats, layer['shape'])
+            sig = layer['sig']
+            center = layer['center']
+            half_wh = layer['half_wh']
+            boxes = self.boxes[layer['start']:layer['stop']].reshape(layer['shape'][:3] + (4,))
+            scores = self.box_scores[layer['start']:layer['stop']].reshape(layer['shape'][:3] + (self.num_classes,))
+
+            # sigmoid 한 번으로 xy / confidence / class 확률 계산
+            np.negative(pred, out=sig)
+            np.exp(sig, out=sig)
+            np.add(sig, 1, out=sig)
+            np.reciprocal(sig, out=sig)
+
+            np.multiply(sig[..., 0:2], layer['xy_gain'], out=center)
+            np.add(center, layer['xy_bias'], out=center)
+            np.exp(pred[..., 2:4], out=half_wh)
+            np.multiply(half_wh, layer['half_wh_gain'], out=half_wh)
+
+            np.subtract(center[..., 1], half_wh[..., 1], out=boxes[..., 0])
+            np.subtract(center[..., 0], half_wh[..., 0], out=boxes[..., 1])
+            np.add(center[..., 1], half_wh[..., 1], out=boxes[..., 2])
+            np.add(center[..., 0], half_wh[..., 0], out=boxes[..., 3])
+
+            np.multiply(sig[..., 4:5], sig[..., 5:], out=scores)
+
+        return self.boxes, self.box_scores
+
+    def decode_candidates(self, yolo_outputs, score_thresh):
+        """
+        objectness로 먼저 걸러낸 anchor만 디코딩
+
+        score = sigmoid(obj) * sigmoid(cls) <= sigmoid(obj) 이므로
+        obj 로짓이 logit(score_thresh)보다 작은 anchor는 점수 임계값을
+        넘을 수 없다. 남은 anchor만 박스/점수를 계산한다.
+
+        Args:
+            yolo_outputs: DPU 출력 텐서 목록
+            score_thresh: 점수 임계값
+        Returns:
+            boxes (K, 4), box_scores (K, num_classes) - 후보 anchor만 포함
+        """
+        # float32 sigmoid 반올림을 고려해 약간 낮은 로짓 기준 사용
+        logit_thresh = np.log(score_thresh / (1. - score_thresh)) - 1e-4
+        boxes = []
+        box_scores = []
+        for feats, layer in zip(yolo_outputs, self.layers):
+            pred = np.reshape(feats, (-1, layer['shape'][3]))
+            idx = np.flatnonzero(pred[:, 4] >= logit_thresh)
+            if idx.size == 0:
+                continue
+
+            cand = pred[idx]
+            sig = 1. / (1. + np.exp(-cand))
+            center = sig[:, 0:2] * layer['xy_gain'] + layer['xy_bias_flat'][idx]
+            half_wh = np.exp(cand[:, 2:4]) * layer['half_wh_gain_flat'][idx]
+
+            _boxes = np.empty((idx.size, 4), dtype=np.float32)
+            _boxes[:, 0] = center[:, 1] - half_wh[:, 1]
+            _boxes[:, 1] = center[:, 0] - half_wh[:, 0]
+            _boxes[:, 2] = center[:, 1] + half_wh[:, 1]
+            _boxes[:, 3] = center[:, 0] + half_wh[:, 0]
+            boxes.append(_boxes)
+            box_scores.append(sig[:, 4:5] * sig[:, 5:])
+
+        if not boxes:
+            return (np.empty((0, 4), dtype=np.float32),
+                    np.empty((0, self.num_classes), dtype=np.float32))
+        return np.concatenate(boxes, axis=0), np.concatenate(box_scores, axis=0)
+
+def nms_boxes(boxes, scores, iou_thresh=0.1):
     x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
     areas = (x2-x1+1)*(y2-y1+1)
     order = scores.argsort()[::-1]
@@ -98,14 +345,90 @@ def nms_boxes(boxes, scores):
         h1 = np.maximum(0.0, yy2 - yy1 + 1)
         inter = w1 * h1
         ovr = inter / (areas[i] + areas[order[1:]] - inter)
-        inds = np.where(ovr <= 0.1)[0]
+        inds = np.where(ovr <= iou_thresh)[0]
         order = order[inds + 1]
     
     return keep
 
-def evaluate(yolo_outputs, image_shape, class_names, anchors, max_boxes=20):
-    score_thresh = 0.3
-    anchor_mask = [[3, 4, 5], [0, 1, 2]]
+def batched_nms(boxes, scores, classes, iou_thresh=0.1, max_boxes=20, topk=None):
+    """
+    모든 클래스를 한 번에 처리하는 NMS
+
+    클래스마다 좌표를 겹치지 않게 평행이동(class offset)한 뒤 IoU 행렬을
+    한 번에 계산하고, 점수 순으로 boolean mask 위에서 greedy 억제를 수행한다.
+    클래스 내 순서는 nms_boxes()와 같은 argsort로 정하므로 동점 순서까지 포함해
+    결과는 클래스별 nms_boxes()[:max_boxes] 결과를 클래스 순으로 이은 것과 같다.
+    (후보는 클래스 안에서 원래 인덱스 순이어야 함, select_boxes의 np.nonzero 순서)
+
+    Args:
+        boxes: 후보 박스 (N, 4)
+        scores: 후보 점수 (N,)
+        classes: 후보 클래스 (N,)
+        iou_thresh: 억제 IoU 임계값
+        max_boxes: 클래스별 최대 박스 수
+        topk: NMS 전에 남길 전체 클래스 기준 상위 후보 수 (None이면 전체, 동점은 뒤쪽 후보 우선)
+    Returns:
+        keep 인덱스 배열 (클래스 순, 클래스 내 점수 내림차순)
+    """
+    if scores.size == 0:
+        return np.empty(0, dtype=np.intp)
+
+    candidates = np.arange(scores.size)
+    if topk is not None and topk < scores.size:
+        candidates = np.sort(np.argsort(scores, kind='stable')[::-1][:topk])
+
+    # 클래스마다 nms_boxes()와 같은 부분 배열에 같은 argsort를 적용해 처리 순서 결정
+    candidate_classes = classes[candidates]
+    order = []
+    for c in np.unique(candidate_classes):
+        members = candidates[candidate_classes == c]
+        order.append(members[scores[members].argsort()[::-1]])
+    order = np.concatenate(order)
+
+    # 클래스 간 간격을 박스 범위 + 2 로 두면 (+1 픽셀 규칙 포함) 서로 겹치지 않음
+    b = boxes[order].astype(np.float64)
+    span = b.max() - b.min() + 2.
+    b += (classes[order] * span)[:, None]
+
+    x1, y1, x2, y2 = b[:, 0], b[:, 1], b[:, 2], b[:, 3]
+    areas = (x2-x1+1)*(y2-y1+1)
+    w1 = np.maximum(0.0, np.minimum(x2[:, None], x2[None, :]) - np.maximum(x1[:, None], x1[None, :]) + 1)
+    h1 = np.maximum(0.0, np.minimum(y2[:, None], y2[None, :]) - np.maximum(y1[:, None], y1[None, :]) + 1)
+    inter = w1 * h1
+    over = inter / (areas[:, None] + areas[None, :] - inter) > iou_thresh
+
+    n = order.size
+    suppressed = np.zeros(n, dtype=bool)
+    keep = []
+    for i in range(n):
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        suppressed |= over[i]
+
+    # order가 클래스 순이므로 keep도 클래스 순 (클래스 내 점수 내림차순), 클래스별 max_boxes 개만 남김
+    keep = order[keep]
+    keep_classes = classes[keep]
+    first = np.searchsorted(keep_classes, keep_classes, side='left')
+    rank = np.arange(keep.size) - first
+    return keep[rank < max_boxes]
+
+def decode_outputs(yolo_outputs, image_shape, class_names, anchors, score_thresh=0.3, decoder=None,
+                   early_reject=False):
+    """DPU 출력을 (boxes, box_scores)로 디코딩 (decoder는 같은 image_shape로 만든 것이어야 함)"""
+    anchor_mask = ANCHOR_MASK
+
+    if decoder is not None:
+        # 디코더의 박스 좌표계는 생성 시 image_shape로 고정되어 있음
+        assert decoder.image_shape == tuple(image_shape)
+
+    if decoder is not None and early_reject:
+        # objectness 임계값을 먼저 적용해 살아남은 anchor만 디코딩
+        return decoder.decode_candidates(yolo_outputs, score_thresh)
+    if decoder is not None:
+        # 미리 계산된 grid/anchor 텐서로 한 번에 디코딩
+        return decoder.decode(yolo_outputs)
+
     boxes = []
     box_scores = []
     input_shape = np.shape(yolo_outputs[0])[1:3] * np.array([32, 32])
@@ -119,27 +442,27 @@ def evaluate(yolo_outputs, image_shape, class_names, anchors, max_boxes=20):
     
     boxes = np.concatenate(boxes, axis=0)
     box_scores = np.concatenate(box_scores, axis=0)
+    return boxes, box_scores
+
+def select_boxes(boxes, box_scores, score_thresh=0.3, max_boxes=20, iou_thresh=0.1, nms_topk=None):
+    """점수 임계값 + NMS로 최종 (boxes, scores, classes) 선택"""
     mask = box_scores >= score_thresh
     
-    boxes_ = []
-    scores_ = []
-    classes_ = []
+    # (박스, 클래스) 후보 쌍을 모아 전체 클래스를 한 번에 NMS
+    rows, classes = np.nonzero(mask)
+    candidate_scores = box_scores[rows, classes]
+    keep = batched_nms(boxes[rows], candidate_scores, classes,
+                       iou_thresh=iou_thresh, max_boxes=max_boxes, topk=nms_topk)
     
-    for c in range(len(class_names)):
-        class_boxes = boxes[mask[:, c]]
-        class_box_scores = box_scores[:, c][mask[:, c]]
-        nms_index = nms_boxes(class_boxes, class_box_scores)[:max_boxes]
-        
-        class_boxes = class_boxes[nms_index]
-        class_box_scores = class_box_scores[nms_index]
-        classes = np.ones_like(class_box_scores, dtype=np.int32) * c
-        
-        boxes_.append(class_boxes)
-        scores_.append(class_box_scores)
-        classes_.append(classes)
-    
-    boxes_ = np.concatenate(boxes_, axis=0)
-    scores_ = np.concatenate(scores_, axis=0)
-    classes_ = np.concatenate(classes_, axis=0)
+    boxes_ = boxes[rows[keep]]
+    scores_ = candidate_scores[keep]
+    classes_ = classes[keep].astype(np.int32)
     
     return boxes_, scores_, classes_
+
+def evaluate(yolo_outputs, image_shape, class_names, anchors, max_boxes=20, decoder=None,
+             early_reject=False, iou_thresh=0.1, nms_topk=None):
+    score_thresh = 0.3
+    boxes, box_scores = decode_outputs(yolo_outputs, image_shape, class_names, anchors,
+                                       score_thresh, decoder, early_reject)
+    return select_boxes(boxes, box_scores, score_thresh, max_boxes, iou_thresh, nms_topk)
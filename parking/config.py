@@ -25,6 +25,16 @@ ULTRASONIC_ADDRESSES = {
 
 ADDRESS_RANGE = 0x10000
 
+# sonic_mm_0: 초음파 5채널 거리 레지스터가 0x0 ~ 0x10에 이어져 있는 블록
+# main.py는 오버레이의 sonic_mm_0 주소(test_sonic.ipynb와 같은 overlay.sonic_mm_0.mmio)를 먼저 쓰고,
+# 오버레이에 없을 때만 이 주소를 쓴다. 이 값은 ULTRASONIC_ADDRESSES['ultrasonic_0']을 옮긴 것으로
+# 비트스트림(.hwh)의 주소와 대조하지 않았으므로 실제 보드에서 확인해야 한다.
+ULTRASONIC_BANK_ADDRESS = 0x00B0000000
+
+# 레지스터 값 1당 거리 (cm). test_sonic.ipynb는 원시 값만 출력하므로 환산 계수는 확인되지 않았다.
+# 알고 있는 거리(예: 30cm, 60cm)에 물체를 두고 읽은 원시 값으로 보정할 것 (1.0 = 원시 값을 cm로 간주).
+ULTRASONIC_CM_PER_COUNT = 1.0
+
 # YOLO configurations
 anchor_list = [10, 14, 23, 27, 37, 58, 81, 82, 135, 169, 344, 319]
 anchors = np.array(anchor_list).reshape(-1, 2)
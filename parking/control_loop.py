@@ -0,0 +1,110 @@
+# Copyright (c) 2024 Sungkyunkwan University AutomationLab
+#
+# Authors:
+# - Gyuhyeon Hwang <rbgus7080@g.skku.edu>, Hobin Oh <hobin0676@daum.net>, Minkwan Choi <arbong97@naver.com>, Hyeonjin Sim <nufxwms@naver.com>
+# - url: https://micro.skku.ac.kr/micro/index.do
+
+import time
+import threading
+import numpy as np
+
+
+class ControlLoop:
+    """
+    주기 제어 루프
+
+    단조 시계(perf_counter) 기준으로 예정 시각을 주기만큼 더해 가므로 실행 시간이
+    쌓여 주기가 밀리지 않는다. tick마다 예정 시각 대비 지연(jitter)과 step 실행
+    시간을 기록한다.
+    """
+
+    def __init__(self, step, rate_hz=50.0, history=1024):
+        """
+        Args:
+            step: tick마다 호출할 함수 (False를 반환하면 루프 종료)
+            rate_hz: 제어 주기 (Hz)
+            history: 보관할 tick별 기록 수
+        """
+        self.step = step
+        self.period = 1.0 / rate_hz
+
+        self._jitter = np.zeros(history, dtype=np.float64)
+        self._exec = np.zeros(history, dtype=np.float64)
+        self.running = False
+        self._thread = None
+        self.reset_stats()
+
+    def set_rate(self, rate_hz):
+        """제어 주기 변경 (다음 tick부터 적용)"""
+        self.period = 1.0 / rate_hz
+
+    def reset_stats(self):
+        """tick 통계 초기화"""
+        self.ticks = 0
+        self.missed_ticks = 0
+        self.overruns = 0
+        self.max_jitter = 0.0
+
+    def start(self):
+        """루프 스레드 시작"""
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """루프 스레드 정지"""
+        self.running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def _loop(self):
+        release = time.perf_counter()
+        while self.running:
+            delay = release - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            if not self.running:
+                break
+            start = time.perf_counter()
+
+            index = self.ticks % self._jitter.size
+            jitter = start - release
+            if jitter >= self.period:
+                # 한 주기 이상 밀렸으면 놓친 tick은 건너뛰고 지금부터 다시 시작
+                self.missed_ticks += int(jitter / self.period)
+                release = start
+            self._jitter[index] = jitter
+            self.max_jitter = max(self.max_jitter, jitter)
+            release += self.period
+
+            keep_running = self.step()
+
+            end = time.perf_counter()
+            self._exec[index] = end - start
+            self.ticks += 1
+            if end > release:
+                self.overruns += 1
+            if keep_running is False:
+                self.running = False
+
+    def get_stats(self):
+        """tick / jitter / 실행 시간 통계 (ms)"""
+        n = min(self.ticks, self._jitter.size)
+        stats = {
+            'period_ms': self.period * 1000.0,
+            'ticks': self.ticks,
+            'missed_ticks': self.missed_ticks,
+            'overruns': self.overruns,
+            'jitter_ms_max': self.max_jitter * 1000.0,
+        }
+        if n:
+            jitter_ms = self._jitter[:n] * 1000.0
+            exec_ms = self._exec[:n] * 1000.0
+            stats['jitter_ms_p50'] = float(np.percentile(jitter_ms, 50))
+            stats['jitter_ms_p99'] = float(np.percentile(jitter_ms, 99))
+            stats['exec_ms_p50'] = float(np.percentile(exec_ms, 50))
+            stats['exec_ms_max'] = float(exec_ms.max())
+        return stats
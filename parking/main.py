@@ -11,43 +11,47 @@ import cv2
 import numpy as np
 import time
 import os
-import spidev
-import keyboard
 import threading
 from motor_controller import MotorController
+from speed_ramp import SpeedRamp
+from control_loop import ControlLoop
+from odometry import Odometry
+from key_input import KeyInput
 from parking_system_controller import ParkingSystemController
 from image_processor import ImageProcessor
-from config import MOTOR_ADDRESSES, ULTRASONIC_ADDRESSES, ADDRESS_RANGE
+from ultrasonic_bank import UltrasonicBank, SENSOR_NAMES
+from ultrasonic_filter import UltrasonicFilter
+from config import MOTOR_ADDRESSES, ULTRASONIC_BANK_ADDRESS, ULTRASONIC_CM_PER_COUNT, ADDRESS_RANGE
+from hardware_session import HardwareSession
 from AutoLab_lib import init
 
 
 def init_hardware():
-    """하드웨어 초기화"""
+    """하드웨어 초기화 (SPI / MMIO / 버스 잠금을 소유하는 세션 반환)"""
     init()
-    
-    # SPI 초기화
-    spi0 = spidev.SpiDev()
-    spi0.open(0, 0)
-    spi0.max_speed_hz = 20000000
-    spi0.mode = 0b00
-    
-    return spi0
+    return HardwareSession(spi_bus=0, spi_device=0, spi_speed_hz=20000000, spi_mode=0b00)
 
 
-def init_motors():
-    """모터 초기화"""
-    motors = {}
-    for name, addr in MOTOR_ADDRESSES.items():
-        motors[name] = MMIO(addr, ADDRESS_RANGE)
-    return motors
+def init_motors(session):
+    """모터 초기화 (주소가 이어진 모터는 MMIO 매핑 하나를 공유)"""
+    return session.map_devices(MOTOR_ADDRESSES, ADDRESS_RANGE)
 
 
-def init_ultrasonic_sensors():
-    """초음파 센서 초기화"""
-    ultrasonic_sensors = {}
-    for name, addr in ULTRASONIC_ADDRESSES.items():
-        ultrasonic_sensors[name] = MMIO(addr, ADDRESS_RANGE)
-    return ultrasonic_sensors
+def init_ultrasonic_bank(session, overlay=None):
+    """
+    초음파 센서 초기화 (sonic_mm_0 블록 하나로 5채널 일괄 읽기)
+    
+    주소는 test_sonic.ipynb와 같이 오버레이의 sonic_mm_0에서 가져오고,
+    오버레이가 없거나 sonic_mm_0이 없으면 config의 ULTRASONIC_BANK_ADDRESS를 사용
+    """
+    ip = overlay.ip_dict.get('sonic_mm_0') if overlay is not None else None
+    if ip is not None:
+        base, length = ip['phys_addr'], ip['addr_range']
+    else:
+        base, length = ULTRASONIC_BANK_ADDRESS, ADDRESS_RANGE
+        print(f"⚠️  오버레이에서 sonic_mm_0을 찾지 못해 config 주소 사용: {hex(base)}")
+    window = session.map_devices({'sonic_mm_0': base}, length)['sonic_mm_0']
+    return UltrasonicBank(window, cm_per_count=ULTRASONIC_CM_PER_COUNT, bus_lock=session.bus_lock)
 
 
 def load_dpu():
@@ -65,29 +69,51 @@ def load_dpu():
 class ParkingMainController:
     """주차 메인 컨트롤러"""
     
-    def __init__(self):
+    def __init__(self, key_input=None, control_rate_hz=50):
         # 하드웨어 초기화
-        self.spi = init_hardware()
+        self.session = init_hardware()
+        self.spi = self.session.spi
         
         # 모터 및 센서 초기화
-        self.motors = init_motors()
-        self.ultrasonic_sensors = init_ultrasonic_sensors()
+        self.motors = init_motors(self.session)
+        
+        # DPU / 오버레이 로드 (선택사항, 센서 주소를 오버레이에서 찾으므로 센서보다 먼저)
+        self.overlay, self.dpu = load_dpu()
+        self.ultrasonic_bank = init_ultrasonic_bank(self.session, self.overlay)
+        
+        # 센서 읽기와 주차 판단 사이의 필터 (튐 / 에코 손실 제거, 변화율 추정)
+        self.sensor_filter = UltrasonicFilter(window=5)
         
         # 주차 설정
         self.parking_speed = 30      # 주차 속도 (0-100)
         self.steering_speed = 50     # 조향 속도 (0-100)
         
         # 컨트롤러 초기화
-        self.motor_controller = MotorController(self.motors)
+        self.motor_controller = MotorController(self.motors, spi=self.spi, bus_lock=self.session.bus_lock)
         self.motor_controller.init_motors()
         
+        # 명령 속도와 조향 ADC로 위치 추정 (거리/방향 기준 단계 종료용, 계수는 차량에서 보정)
+        self.odometry = Odometry(self.motor_controller)
+        
         self.parking_controller = ParkingSystemController(
-            self.motor_controller, 
-            self.ultrasonic_sensors
+            self.motor_controller,
+            bus_lock=self.session.bus_lock,
+            odometry=self.odometry,
+            ultrasonic_bank=self.ultrasonic_bank
         )
         
-        # DPU 초기화 (선택사항)
-        self.overlay, self.dpu = load_dpu()
+        # 구동 속도는 램프 스레드가 slew rate 이내로 반영
+        self.speed_ramp = SpeedRamp(
+            self.motor_controller,
+            slew_rate=self.parking_controller.parking_config['speed_slew_rate']
+        )
+        self.motor_controller.speed_ramp = self.speed_ramp
+        
+        # 키 눌림/뗌 이벤트 입력 (None이면 키보드 훅)
+        self.keys = key_input if key_input is not None else KeyInput()
+        
+        # 주차 제어 루프 (고정 주기, tick마다 센서 읽기 -> 필터 -> 주차 사이클)
+        self.control_loop = ControlLoop(self.parking_cycle_step, rate_hz=control_rate_hz)
         
         # 상태 변수
         self.is_running = False
@@ -99,6 +125,8 @@ class ParkingMainController:
         """주차 시작"""
         if not self.parking_active:
             self.parking_active = True
+            self.control_loop.reset_stats()
+            self.sensor_filter.reset()
             self.parking_controller.start_parking()
             print("🚗 주차 시작!")
     
@@ -122,32 +150,33 @@ class ParkingMainController:
         self.parking_active = False
         print("🔄 시스템 리셋!")
     
-    def parking_cycle_thread(self):
-        """주차 사이클 실행 스레드"""
-        while self.is_running:
-            if self.parking_active:
-                try:
-                    # 센서 데이터 읽기
-                    sensor_data = self.parking_controller.read_ultrasonic_sensors()
-                    self.parking_controller.update_sensor_data(sensor_data)
-                    
-                    # 주차 사이클 실행
-                    self.parking_controller.execute_parking_cycle()
-                    
-                    # 주차 완료 확인
-                    if self.parking_controller.parking_completed:
-                        print("🎉 주차 완료!")
-                        self.parking_active = False
-                        break
-                    
-                    time.sleep(0.1)  # 100ms 주기
-                    
-                except Exception as e:
-                    print(f"❌ 주차 사이클 오류: {e}")
-                    self.emergency_stop()
-                    break
-            else:
-                time.sleep(0.1)
+    def parking_cycle_step(self):
+        """주차 사이클 한 주기 (제어 루프에서 호출, False 반환 시 루프 종료)"""
+        if not self.is_running:
+            return False
+        if not self.parking_active:
+            return True
+        
+        try:
+            # 센서 데이터 읽기 -> 필터 -> 주차 판단에 반영
+            sensor_data = self.parking_controller.read_ultrasonic_sensors()
+            sensor_data = self.sensor_filter.update(sensor_data)
+            self.parking_controller.update_sensor_data(sensor_data)
+            
+            # 주차 사이클 실행
+            self.parking_controller.execute_parking_cycle()
+            
+            # 주차 완료 확인
+            if self.parking_controller.parking_completed:
+                print("🎉 주차 완료!")
+                self.parking_active = False
+            
+            return True
+            
+        except Exception as e:
+            print(f"❌ 주차 사이클 오류: {e}")
+            self.emergency_stop()
+            return False
     
     def status_monitor_thread(self):
         """상태 모니터링 스레드"""
@@ -164,6 +193,18 @@ class ParkingMainController:
                           f"MR={distances['middle_right']:.1f}, "
                           f"RL={distances['rear_left']:.1f}, "
                           f"RR={distances['rear_right']:.1f}")
+                    rates = self.sensor_filter.rates
+                    print("   변화율(cm/s): " + ", ".join(
+                        f"{name}={rate:+.1f}" for name, rate in zip(SENSOR_NAMES, rates.tolist())))
+                    
+                    # 제어 주기 지연 출력
+                    loop = self.control_loop.get_stats()
+                    if 'jitter_ms_p99' in loop:
+                        print(f"   주기: {loop['period_ms']:.0f}ms, "
+                              f"지연 p50={loop['jitter_ms_p50']:.2f}ms "
+                              f"p99={loop['jitter_ms_p99']:.2f}ms "
+                              f"max={loop['jitter_ms_max']:.2f}ms, "
+                              f"초과={loop['overruns']}")
                     
                 except Exception as e:
                     print(f"❌ 상태 모니터링 오류: {e}")
@@ -182,39 +223,35 @@ class ParkingMainController:
         
         while self.is_running:
             try:
-                if keyboard.is_pressed('space'):
+                key = self.keys.wait_pressed(timeout=0.1)
+                if key is None:
+                    continue
+                
+                if key == 'space':
                     if not self.parking_active:
                         self.start_parking()
                     else:
                         self.stop_parking()
-                    time.sleep(0.5)  # 중복 입력 방지
                 
-                elif keyboard.is_pressed('r'):
+                elif key == 'r':
                     self.reset_system()
-                    time.sleep(0.5)
                 
-                elif keyboard.is_pressed('e'):
+                elif key == 'e':
                     self.emergency_stop()
-                    time.sleep(0.5)
                 
-                elif keyboard.is_pressed('q'):
+                elif key == 'q':
                     print("👋 프로그램 종료...")
                     self.is_running = False
                     break
                 
-                elif keyboard.is_pressed('c'):
+                elif key == 'c':
                     self.show_parking_config()
-                    time.sleep(0.5)
                 
-                elif keyboard.is_pressed('s'):
+                elif key == 's':
                     self.show_sensor_status()
-                    time.sleep(0.5)
-                
-                time.sleep(0.1)
                 
             except Exception as e:
                 print(f"❌ 키보드 입력 오류: {e}")
-                time.sleep(0.1)
     
     def show_parking_config(self):
         """주차 설정 출력"""
@@ -233,6 +270,10 @@ class ParkingMainController:
         for sensor_name in distances.keys():
             detected = "✅" if flags.get(sensor_name, False) else "❌"
             print(f"  {sensor_name}: {distances[sensor_name]:.1f}cm {detected}")
+        
+        stats = self.sensor_filter.get_stats()
+        print(f"  필터: 샘플 {stats['samples']}, 결측 {stats['dropouts']}, "
+              f"먼 값 {stats['far_readings']}, 튐 {stats['outliers']}")
     
     def run(self):
         """메인 실행 루프"""
@@ -240,13 +281,15 @@ class ParkingMainController:
         
         try:
             # 스레드 시작
-            parking_thread = threading.Thread(target=self.parking_cycle_thread, daemon=True)
             monitor_thread = threading.Thread(target=self.status_monitor_thread, daemon=True)
             keyboard_thread = threading.Thread(target=self.keyboard_input_thread, daemon=True)
             
-            parking_thread.start()
+            self.control_loop.start()
             monitor_thread.start()
+            self.keys.start()
             keyboard_thread.start()
+            self.speed_ramp.start()
+            self.odometry.start()
             
             print("🚗 주차 시스템 실행 중...")
             print("SPACE 키를 눌러 주차를 시작하세요.")
@@ -261,9 +304,14 @@ class ParkingMainController:
             print(f"❌ 메인 실행 오류: {e}")
         finally:
             # 정리
+            self.control_loop.stop()
             self.emergency_stop()
+            self.speed_ramp.stop()
+            self.odometry.stop()
+            self.keys.stop()
             if hasattr(self, 'motor_controller'):
                 self.motor_controller.reset_motor_values()
+            self.session.close()
             print("🔧 시스템 정리 완료")
 
 
@@ -271,9 +319,12 @@ def main():
     """메인 함수"""
     print("🚗 자율주차 시스템 시작")
     
+    # 주차 제어 주기 (Hz) - 빠를수록 정지 거리 판단 지연이 짧아짐
+    control_rate_hz = 50
+    
     try:
         # 주차 메인 컨트롤러 생성 및 실행
-        controller = ParkingMainController()
+        controller = ParkingMainController(control_rate_hz=control_rate_hz)
         controller.run()
         
     except Exception as e:
@@ -5,15 +5,15 @@
 # - url: https://micro.skku.ac.kr/micro/index.do
 
 import time
-from threading import Lock
-import spidev
-import keyboard
+from threading import Lock, RLock
 import numpy as np
 
 class MotorController:
-    def __init__(self, motors):
+    def __init__(self, motors, spi=None, bus_lock=None):
         # 기본 모터 설정
         self.motors = motors
+        # 여러 레지스터를 한 번에 바꾸는 동안 다른 스레드의 쓰기를 막는 잠금
+        self.bus_lock = bus_lock if bus_lock is not None else RLock()
         self.size = 600600  # 2ms
         self._left_speed = 0
         self._right_speed = 0
@@ -32,11 +32,17 @@ class MotorController:
         self.manual_steering_angle = 0
         self.manual_speed = 0
         
-        # SPI 설정
-        self.spi = spidev.SpiDev()
-        self.spi.open(0, 0)
-        self.spi.max_speed_hz = 20000000
-        self.spi.mode = 0b00
+        # SPI 설정 (외부에서 받은 SPI 객체가 없으면 직접 열기)
+        if spi is None:
+            import spidev
+            spi = spidev.SpiDev()
+            spi.open(0, 0)
+            spi.max_speed_hz = 20000000
+            spi.mode = 0b00
+        self.spi = spi
+        
+        # 구동 모터 가감속 제한기 (SpeedRamp, 없으면 속도를 바로 반영)
+        self.speed_ramp = None
         
         # 저항 값 범위 설정
         self.resistance_most_left = 1045 
@@ -57,7 +63,10 @@ class MotorController:
     @left_speed.setter
     def left_speed(self, value):
         self._left_speed = value
-        self.set_left_speed(self._left_speed)  # 속도 변경 시 자동으로 반영
+        if self.speed_ramp is not None:
+            self.speed_ramp.set_left_target(value)  # 램프 스레드가 점진적으로 반영
+        else:
+            self.set_left_speed(self._left_speed)  # 속도 변경 시 자동으로 반영
 
     @property
     def right_speed(self):
@@ -66,17 +75,33 @@ class MotorController:
     @right_speed.setter
     def right_speed(self, value):
         self._right_speed = value
-        self.set_right_speed(self._right_speed)  # 속도 변경 시 자동으로 반영
+        if self.speed_ramp is not None:
+            self.speed_ramp.set_right_target(value)  # 램프 스레드가 점진적으로 반영
+        else:
+            self.set_right_speed(self._right_speed)  # 속도 변경 시 자동으로 반영
+
+    def stop_now(self):
+        """구동 모터 즉시 정지 (램프가 있어도 가감속 없이 0으로)"""
+        self._left_speed = 0
+        self._right_speed = 0
+        if self.speed_ramp is not None:
+            self.speed_ramp.stop_now()
+        else:
+            self.set_left_speed(0)
+            self.set_right_speed(0)
 
     def init_motors(self):
         """모터 초기화"""
-        for name, motor in self.motors.items():
-            motor.write(0x00, self.size)     # size
-            motor.write(0x04, self.min_duty)  # 초기 duty 50%
-            motor.write(0x08, 0)             # valid
+        with self.bus_lock:
+            for name, motor in self.motors.items():
+                motor.write(0x00, self.size)     # size
+                motor.write(0x04, self.min_duty)  # 초기 duty 50%
+                motor.write(0x08, 0)             # valid
 
     def reset_motor_values(self):
         """모터 값 안전 초기화"""
+        if self.speed_ramp is not None:
+            self.speed_ramp.stop_now()  # 램프 없이 즉시 정지
         self.left_speed = 0
         self.right_speed = 0
         self.steering_speed = 0
@@ -86,12 +111,13 @@ class MotorController:
         self.current_duty = self.min_duty
         
         # 모든 모터 정지
-        for motor in self.motors.values():
-            motor.write(0x08, 0)
+        with self.bus_lock:
+            for motor in self.motors.values():
+                motor.write(0x08, 0)
         
-        # duty 값 초기화
-        for motor in self.motors.values():
-            motor.write(0x04, self.min_duty)
+            # duty 값 초기화
+            for motor in self.motors.values():
+                motor.write(0x04, self.min_duty)
 
     def right(self, steering_speed, control_mode=1):
         """우회전 제어"""
@@ -106,9 +132,10 @@ class MotorController:
                 self.last_steering_time = current_time
             duty = self.current_duty
             
-        self.motors['motor_4'].write(0x08, 0)  # valid  steering_left
-        self.motors['motor_5'].write(0x08, 1)  # valid  steering_right
-        self.motors['motor_5'].write(0x04, duty)
+        with self.bus_lock:
+            self.motors['motor_4'].write(0x08, 0)  # valid  steering_left
+            self.motors['motor_5'].write(0x08, 1)  # valid  steering_right
+            self.motors['motor_5'].write(0x04, duty)
 
     def left(self, steering_speed, control_mode=1):
         """좌회전 제어"""
@@ -122,9 +149,10 @@ class MotorController:
                 self.last_steering_time = current_time
             duty = self.current_duty
             
-        self.motors['motor_5'].write(0x08, 0)  # valid  steering_right
-        self.motors['motor_4'].write(0x08, 1)  # valid  steering_left
-        self.motors['motor_4'].write(0x04, duty)
+        with self.bus_lock:
+            self.motors['motor_5'].write(0x08, 0)  # valid  steering_right
+            self.motors['motor_4'].write(0x08, 1)  # valid  steering_left
+            self.motors['motor_4'].write(0x04, duty)
 
     def stay(self, steering_speed, control_mode=1):
         """중립 상태 유지"""
@@ -135,40 +163,43 @@ class MotorController:
             self.current_duty = self.min_duty
             duty = self.current_duty
             
-        self.motors['motor_5'].write(0x08, 0)  # valid  steering_right
-        self.motors['motor_1'].write(0x08, 0)  # valid  steering_left
-        self.motors['motor_5'].write(0x04, duty)
-        self.motors['motor_1'].write(0x04, duty)
+        with self.bus_lock:
+            self.motors['motor_5'].write(0x08, 0)  # valid  steering_right
+            self.motors['motor_1'].write(0x08, 0)  # valid  steering_left
+            self.motors['motor_5'].write(0x04, duty)
+            self.motors['motor_1'].write(0x04, duty)
 
     def set_left_speed(self, speed):
         """왼쪽 모터 속도 설정"""
         duty_percent = abs(speed) / 100
         duty = int(self.size * duty_percent)
         
-        self.motors['motor_0'].write(0x04, duty)
-        self.motors['motor_1'].write(0x04, duty)
+        with self.bus_lock:
+            self.motors['motor_0'].write(0x04, duty)
+            self.motors['motor_1'].write(0x04, duty)
         
-        if speed > 0:
-            self.motors['motor_0'].write(0x08, 0)
-            self.motors['motor_1'].write(0x08, 1)
-        else:
-            self.motors['motor_0'].write(0x08, 1)
-            self.motors['motor_1'].write(0x08, 0)
+            if speed > 0:
+                self.motors['motor_0'].write(0x08, 0)
+                self.motors['motor_1'].write(0x08, 1)
+            else:
+                self.motors['motor_0'].write(0x08, 1)
+                self.motors['motor_1'].write(0x08, 0)
 
     def set_right_speed(self, speed):
         """오른쪽 모터 속도 설정"""
         duty_percent = abs(speed) / 100
         duty = int(self.size * duty_percent)
         
-        self.motors['motor_3'].write(0x04, duty)
-        self.motors['motor_2'].write(0x04, duty)
+        with self.bus_lock:
+            self.motors['motor_3'].write(0x04, duty)
+            self.motors['motor_2'].write(0x04, duty)
         
-        if speed > 0:
-            self.motors['motor_3'].write(0x08, 0)
-            self.motors['motor_2'].write(0x08, 1)
-        else:
-            self.motors['motor_3'].write(0x08, 1)
-            self.motors['motor_2'].write(0x08, 0)
+            if speed > 0:
+                self.motors['motor_3'].write(0x08, 0)
+                self.motors['motor_2'].write(0x08, 1)
+            else:
+                self.motors['motor_3'].write(0x08, 1)
+                self.motors['motor_2'].write(0x08, 0)
 
     def read_adc(self):
         """ADC 값 읽기"""
@@ -220,23 +251,28 @@ class MotorController:
         else:
             self.right(self.steering_speed, control_mode)
 
-    def handle_manual_control(self):
-        """수동 주행 모드에서의 키보드 입력 처리"""
-        if keyboard.is_pressed('w'):
+    def handle_manual_control(self, keys):
+        """
+        수동 주행 모드에서의 키보드 입력 처리
+
+        Args:
+            keys: is_down(키 이름)을 제공하는 키 입력 (KeyInput)
+        """
+        if keys.is_down('w'):
             self.left_speed = min(self.left_speed + 1, 100)
             self.right_speed = min(self.right_speed + 1, 100)
             
-        if keyboard.is_pressed('s'):
+        if keys.is_down('s'):
             self.left_speed = max(self.left_speed - 1, -100)
             self.right_speed = max(self.right_speed - 1, -100)
             
-        if keyboard.is_pressed('a'):
+        if keys.is_down('a'):
             self.steering_angle = min(self.steering_angle - 1, 20)
             
-        if keyboard.is_pressed('d'):
+        if keys.is_down('d'):
             self.steering_angle = max(self.steering_angle + 1, -20)
             
-        if keyboard.is_pressed('r'):
+        if keys.is_down('r'):
             self.left_speed = 0
             self.right_speed = 0
             self.steering_angle = 0
@@ -0,0 +1,128 @@
+# Copyright (c) 2024 Sungkyunkwan University AutomationLab
+#
+# Authors:
+# - Gyuhyeon Hwang <rbgus7080@g.skku.edu>, Hobin Oh <hobin0676@daum.net>, Minkwan Choi <arbong97@naver.com>, Hyeonjin Sim <nufxwms@naver.com>
+# - url: https://micro.skku.ac.kr/micro/index.do
+
+import math
+import time
+import threading
+
+
+class Odometry:
+    """
+    명령 속도와 조향 가변저항 값으로 차량 위치를 추정하는 추측 항법기
+
+    pygame_simul의 Vehicle.update와 같은 자전거 모델을 실제 단위로 적분한다.
+    x는 시작 시 전방, y는 우측 (cm), heading은 시계 방향(우회전)이 양수 (도).
+    속도/조향 환산 계수는 차량에서 보정해야 한다.
+    """
+
+    def __init__(self, motor_controller, speed_scale=1.0, wheelbase=25.0, max_steering_deg=25.0,
+                 period=0.005):
+        """
+        Args:
+            motor_controller: MotorController (속도 명령, read_adc, map_value 사용)
+            speed_scale: 속도 1%당 주행 속도 (cm/s)
+            wheelbase: 앞뒤 바퀴 축 거리 (cm)
+            max_steering_deg: 조향 최대(±7)일 때 바퀴 각도 (도)
+            period: 적분 주기 (초)
+        """
+        self.motor_controller = motor_controller
+        self.speed_scale = speed_scale
+        self.wheelbase = wheelbase
+        self.max_steering_deg = max_steering_deg
+        self.period = period
+
+        self.running = False
+        self._thread = None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """위치 / 누적 거리 초기화"""
+        with self._lock:
+            self.x = 0.0
+            self.y = 0.0
+            self.heading = 0.0
+            self.distance = 0.0
+            self.speed = 0.0
+            self.steering_deg = 0.0
+            self._last_time = None
+
+    def commanded_speed(self):
+        """현재 명령 속도 (%, 램프가 있으면 램프의 현재 값)"""
+        mc = self.motor_controller
+        ramp = getattr(mc, 'speed_ramp', None)
+        if ramp is not None:
+            return (ramp.current_left + ramp.current_right) / 2
+        return (mc.left_speed + mc.right_speed) / 2
+
+    def measured_steering(self):
+        """조향 가변저항 값으로 계산한 바퀴 각도 (도, 우회전 양수)"""
+        mc = self.motor_controller
+        mapped = mc.map_value(mc.read_adc(), mc.resistance_most_right, mc.resistance_most_left, -7, 7)
+        return mapped / 7 * self.max_steering_deg
+
+    def update(self, now=None):
+        """마지막 갱신 이후 이동량 적분"""
+        if now is None:
+            now = time.perf_counter()
+        speed = self.commanded_speed() * self.speed_scale
+        steering_deg = self.measured_steering()
+        with self._lock:
+            if self._last_time is not None:
+                dt = now - self._last_time
+                step = speed * dt
+                heading_rad = math.radians(self.heading)
+                self.x += step * math.cos(heading_rad)
+                self.y += step * math.sin(heading_rad)
+                self.heading += math.degrees(step * math.tan(math.radians(steering_deg)) / self.wheelbase)
+                self.distance += abs(step)
+            self.speed = speed
+            self.steering_deg = steering_deg
+            self._last_time = now
+
+    def mark(self):
+        """구간 측정 시작점 (distance, heading)"""
+        with self._lock:
+            return (self.distance, self.heading)
+
+    def distance_since(self, mark):
+        """mark 이후 이동 거리 (cm, 전진/후진 모두 양수)"""
+        return self.distance - mark[0]
+
+    def heading_since(self, mark):
+        """mark 이후 방향 변화 (도, 시계 방향 양수)"""
+        return self.heading - mark[1]
+
+    def pose(self):
+        """(x, y, heading) 반환"""
+        with self._lock:
+            return (self.x, self.y, self.heading)
+
+    def start(self):
+        """적분 스레드 시작"""
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """적분 스레드 정지"""
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _loop(self):
+        next_tick = time.perf_counter()
+        while self.running:
+            self.update()
+            next_tick += self.period
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.perf_counter()
@@ -0,0 +1,150 @@
+# Copyright (c) 2024 Sungkyunkwan University AutomationLab
+#
+# Authors:
+# - Gyuhyeon Hwang <rbgus7080@g.skku.edu>, Hobin Oh <hobin0676@daum.net>, Minkwan Choi <arbong97@naver.com>, Hyeonjin Sim <nufxwms@naver.com>
+# - url: https://micro.skku.ac.kr/micro/index.do
+
+import time
+import numpy as np
+
+HISTORY_DTYPE = np.dtype([
+    ('t', np.float64),
+    ('from_phase', np.int16),
+    ('to_phase', np.int16),
+])
+
+
+class PhaseSpec:
+    """단계 하나의 진입 / 주기 / 종료 처리와 전이 조건"""
+
+    __slots__ = ('phase', 'on_enter', 'on_tick', 'on_exit', 'transitions')
+
+    def __init__(self, phase, on_enter=None, on_tick=None, on_exit=None, transitions=()):
+        self.phase = phase
+        self.on_enter = on_enter
+        self.on_tick = on_tick
+        self.on_exit = on_exit
+        self.transitions = tuple(transitions)
+
+
+class StateMachine:
+    """
+    표 기반 유한 상태 기계
+
+    단계(Enum)마다 PhaseSpec을 등록하면 phase.value로 인덱싱한 표에서 바로
+    처리기를 찾는다. tick()은 현재 단계의 on_tick을 실행한 뒤 (guard, 다음 단계)
+    목록을 순서대로 검사해 처음 참인 조건으로 전이한다. 전이할 때는 on_exit ->
+    on_enter 순으로 실행하며, 단계 진입 시각과 단계 안의 타이머는 단계마다 새로 시작한다.
+    전이 기록은 미리 할당한 링 버퍼에 남는다.
+    """
+
+    def __init__(self, phases, history_size=64, on_transition=None, clock=time.perf_counter):
+        """
+        Args:
+            phases: 단계 Enum 클래스 (value는 0부터 연속된 정수)
+            history_size: 보관할 전이 기록 수
+            on_transition: 전이 후 호출할 함수 (from_phase, to_phase)
+            clock: 단조 시계 함수 (초)
+        """
+        self.phases = phases
+        self._by_value = {phase.value: phase for phase in phases}
+        self._table = [None] * (max(self._by_value) + 1)
+        self.on_transition = on_transition
+        self.clock = clock
+
+        self._history = np.zeros(history_size, dtype=HISTORY_DTYPE)
+        self.transitions = 0
+        self.entry_counts = np.zeros(len(self._table), dtype=np.int64)
+
+        self.phase = None
+        self.entered_at = None
+        self.timer_started_at = None
+
+    def register(self, phase, on_enter=None, on_tick=None, on_exit=None, transitions=()):
+        """단계 처리기 등록 (transitions: [(guard, 다음 단계), ...])"""
+        self._table[phase.value] = PhaseSpec(phase, on_enter, on_tick, on_exit, transitions)
+
+    def reset(self, phase):
+        """진입/종료 처리 없이 단계와 기록 초기화"""
+        self.phase = phase
+        self.entered_at = self.clock()
+        self.timer_started_at = None
+        self.transitions = 0
+        self.entry_counts[...] = 0
+
+    def transition(self, phase):
+        """다음 단계로 전이 (현재 단계 on_exit -> 다음 단계 on_enter)"""
+        previous = self.phase
+        spec = self._table[previous.value] if previous is not None else None
+        if spec is not None and spec.on_exit is not None:
+            spec.on_exit()
+
+        now = self.clock()
+        record = self._history[self.transitions % self._history.size]
+        record['t'] = now
+        record['from_phase'] = -1 if previous is None else previous.value
+        record['to_phase'] = phase.value
+        self.transitions += 1
+        self.entry_counts[phase.value] += 1
+
+        self.phase = phase
+        self.entered_at = now
+        self.timer_started_at = None
+        if self.on_transition is not None:
+            self.on_transition(previous, phase)
+
+        spec = self._table[phase.value]
+        if spec is not None and spec.on_enter is not None:
+            spec.on_enter()
+
+    def tick(self):
+        """
+        현재 단계 한 주기 실행
+
+        Returns:
+            전이했으면 새 단계, 아니면 None
+        """
+        spec = self._table[self.phase.value]
+        if spec is None:
+            return None
+        if spec.on_tick is not None:
+            spec.on_tick()
+        for guard, next_phase in spec.transitions:
+            if guard():
+                self.transition(next_phase)
+                return next_phase
+        return None
+
+    def elapsed(self):
+        """현재 단계 진입 후 경과 시간 (초)"""
+        return self.clock() - self.entered_at
+
+    def start_timer(self):
+        """현재 단계 안의 타이머 시작 (단계가 바뀌면 초기화됨)"""
+        self.timer_started_at = self.clock()
+
+    def timer_running(self):
+        return self.timer_started_at is not None
+
+    def timer_elapsed(self):
+        """단계 타이머 경과 시간 (초, 시작 전이면 None)"""
+        if self.timer_started_at is None:
+            return None
+        return self.clock() - self.timer_started_at
+
+    def visited(self, phase):
+        """reset 이후 해당 단계에 진입한 적이 있는지 여부"""
+        return self.entry_counts[phase.value] > 0
+
+    def history(self):
+        """최근 전이 기록 [(시각, 이전 단계, 다음 단계), ...] (오래된 것부터)"""
+        count = min(self.transitions, self._history.size)
+        start = self.transitions - count
+        records = []
+        for i in range(start, self.transitions):
+            record = self._history[i % self._history.size]
+            from_value = int(record['from_phase'])
+            records.append((float(record['t']),
+                            self._by_value.get(from_value),
+                            self._by_value[int(record['to_phase'])]))
+        return records
@@ -7,9 +7,19 @@
 import math
 import time
 import numpy as np
-from threading import Lock
+from types import MappingProxyType
+from threading import Lock, RLock
 from enum import Enum
 from config import ULTRASONIC_ADDRESSES, ADDRESS_RANGE
+from parking_fsm import StateMachine
+from ultrasonic_bank import (FRONT_RIGHT, MIDDLE_LEFT, MIDDLE_RIGHT, REAR_RIGHT,
+                             SENSOR_NAMES, SENSOR_INDEX, NUM_CHANNELS)
+
+# 진입 감지에 쓰는 우측 센서 채널
+RIGHT_SENSORS = (FRONT_RIGHT, MIDDLE_RIGHT, REAR_RIGHT)
+
+# 시간 기준 변화 감지용으로 보관하는 최근 센서 샘플 수
+SENSOR_HISTORY = 64
 
 class ParkingPhase(Enum):
     """주차 단계 열거형"""
@@ -31,16 +41,23 @@ class ParkingPhase(Enum):
 class ParkingSystemController:
     """자율주차 시스템 컨트롤러"""
     
-    def __init__(self, motor_controller, ultrasonic_sensors=None):
+    def __init__(self, motor_controller, ultrasonic_sensors=None, bus_lock=None, odometry=None,
+                 ultrasonic_bank=None):
         """
         주차 시스템 컨트롤러 초기화
         
         Args:
             motor_controller: 모터 제어기 인스턴스
             ultrasonic_sensors: 초음파 센서 딕셔너리 (선택사항)
+            bus_lock: 하드웨어 버스 잠금 (HardwareSession.bus_lock, 선택사항)
+            odometry: 추측 항법기 (Odometry, 선택사항 - 거리/방향 기준 단계 종료에 사용)
+            ultrasonic_bank: 초음파 5채널 일괄 읽기 (UltrasonicBank, 선택사항 - 있으면 센서 딕셔너리 대신 사용)
         """
         self.motor_controller = motor_controller
         self.ultrasonic_sensors = ultrasonic_sensors or {}
+        self.bus_lock = bus_lock if bus_lock is not None else RLock()
+        self.odometry = odometry
+        self.ultrasonic_bank = ultrasonic_bank
         
         # 초음파 센서 매핑 (센서 위치별)
         self.sensor_mapping = {
@@ -52,61 +69,30 @@ class ParkingSystemController:
         }
         
         # 주차 상태 변수
-        self.current_phase = ParkingPhase.WAITING
         self.status_message = "대기 중..."
         self.is_parking_active = False
         self.parking_completed = False
         
-        # 센서 데이터
-        self.sensor_distances = {
-            "front_right": 100,
-            "middle_left": 100,
-            "middle_right": 100,
-            "rear_left": 100,
-            "rear_right": 100
-        }
+        # 센서 데이터 (채널 인덱스 순서, ultrasonic_bank의 FRONT_RIGHT 등으로 접근, 측정값이 없으면 NaN)
+        self.sensor_distances = np.full(NUM_CHANNELS, np.nan)
+        self._sensor_buffer = np.full(NUM_CHANNELS, np.nan)
         
         # 이전 센서 값 (변화 감지용)
-        self.previous_distances = {
-            "front_right": -1,
-            "middle_right": -1,
-            "rear_right": -1
-        }
+        self.previous_distances = np.full(NUM_CHANNELS, -1.0)
         
-        # 센서 감지 상태 플래그
-        self.sensor_flags = {
-            "front_right": False,
-            "middle_right": False,
-            "rear_right": False
-        }
+        # 최근 센서 샘플과 시각 (링 버퍼, 제어 주기와 무관하게 일정 시간 전 값과 비교)
+        self._history = np.full((SENSOR_HISTORY, NUM_CHANNELS), np.nan)
+        self._history_times = np.full(SENSOR_HISTORY, -np.inf)
+        self._history_count = 0
         
-        # 주차 단계별 상태 변수
-        self.phase_states = {
-            'initial_forward_started': False,
-            'first_stop_completed': False,
-            'left_turn_started': False,
-            'second_stop_completed': False,
-            'right_turn_started': False,
-            'backward_completed': False,
-            'alignment_completed': False,
-            'straight_backward_started': False,
-            'correction_started': False,
-            'correction_completed': False,
-            'post_correction_backward_started': False,
-            'parking_completion_stop_started': False,
-            'parking_completion_forward_started': False,
-            'right_turn_after_increase_started': False
-        }
+        # 센서 감지 상태 플래그 (RIGHT_SENSORS 채널만 사용)
+        self.sensor_flags = np.zeros(NUM_CHANNELS, dtype=np.bool_)
         
-        # 시간 관련 변수
-        self.phase_start_time = None
-        self.correction_start_time = None
-        self.backward_start_time = None
-        self.straight_backward_start_time = None
-        self.post_correction_backward_start_time = None
-        self.parking_completion_stop_start_time = None
-        self.right_turn_after_increase_start_time = None
-        self.additional_backward_start_time = None  # 추가 후진 시작 시간
+        # 단계 전이 엔진 (단계별 처리기 표, 단계 타이머, 전이 기록)
+        self.fsm = StateMachine(ParkingPhase, on_transition=self._on_transition)
+        self._register_phases()
+        self.fsm.reset(ParkingPhase.WAITING)
+        self._timer_mark = None  # 단계 타이머 시작 시점 오도메트리 (거리, 방향)
         
         # 주차 설정
         self.parking_config = {
@@ -124,78 +110,123 @@ class ParkingSystemController:
             'parking_stop_duration': 2.0, # 주차 완료 정지 시간 (초)
             'right_turn_duration': 1.5,  # 우회전 시간 (초)
             'additional_backward_duration': 0.5,  # 추가 후진 시간 (초)
-            'final_right_turn_angle': 20  # 최종 우회전 각도
+            'final_right_turn_angle': 20,  # 최종 우회전 각도
+            'speed_slew_rate': 150,   # 구동 속도 최대 변화율 (%/초)
+            'edge_window': 0.1,       # 진입 감지 증가량 비교 간격 (초, 기존 100ms 주기와 같음)
+            # 오도메트리 기준 단계 종료 (None이면 위의 시간 기준 사용)
+            'straight_backward_distance': None,   # 정방향 후진 거리 (cm)
+            'correction_distance': None,          # 수정 주행 거리 (cm)
+            'additional_backward_distance': None, # 추가 후진 거리 (cm)
+            'right_turn_heading': None            # 최종 우회전 방향 변화 (도)
         }
         
-        # 스레드 안전을 위한 락
+        # 스레드 안전을 위한 락 (제어 주기 / 상태 변경용, 상태 조회는 잠그지 않음)
         self._lock = Lock()
         
+        # 상태 조회용 스냅샷 (제어 스레드가 게시, 조회 스레드는 참조 한 번만 읽음)
+        self._status_sequence = 0
+        self._status = None
+        self._publish_status()
+        
     def start_parking(self):
         """주차 시작"""
         with self._lock:
             self.is_parking_active = True
             self.parking_completed = False
-            self.current_phase = ParkingPhase.WAITING
             self.status_message = "주차 시작..."
             self._reset_phase_states()
+            if self.odometry is not None:
+                self.odometry.reset()
+            self._publish_status()
             print("🚗 주차 시스템 시작")
     
     def stop_parking(self):
         """주차 중지"""
         with self._lock:
-            self.is_parking_active = False
-            self.motor_controller.reset_motor_values()
-            self.status_message = "주차 중지됨"
-            print("🛑 주차 시스템 중지")
+            self._stop_parking_locked()
+    
+    def _stop_parking_locked(self):
+        """주차 중지 (self._lock을 잡은 상태에서 호출)"""
+        self.is_parking_active = False
+        self.motor_controller.reset_motor_values()
+        self.status_message = "주차 중지됨"
+        self._publish_status()
+        print("🛑 주차 시스템 중지")
     
     def _reset_phase_states(self):
-        """단계별 상태 초기화"""
-        for key in self.phase_states:
-            self.phase_states[key] = False
-        self.phase_start_time = None
-        self.additional_backward_start_time = None
+        """단계별 상태 초기화 (대기 단계로)"""
+        self.fsm.reset(ParkingPhase.WAITING)
+        self._timer_mark = None
+        
+        # 이전 주행의 센서 기록이 거리 증가 기준으로 쓰이지 않도록 비움
+        self._history[...] = np.nan
+        self._history_times[...] = -np.inf
+        self._history_count = 0
+    
+    @property
+    def current_phase(self):
+        """현재 주차 단계"""
+        return self.fsm.phase
     
     def update_sensor_data(self, sensor_data):
         """
         센서 데이터 업데이트
         
         Args:
-            sensor_data: 센서 거리 데이터 딕셔너리
+            sensor_data: 채널 인덱스 순서의 거리 배열 또는 센서 이름 -> 거리 딕셔너리
         """
         with self._lock:
-            self.sensor_distances.update(sensor_data)
+            if isinstance(sensor_data, dict):
+                for sensor_name, distance in sensor_data.items():
+                    self.sensor_distances[SENSOR_INDEX[sensor_name]] = distance
+            else:
+                np.copyto(self.sensor_distances, sensor_data)
+            
+            index = self._history_count % SENSOR_HISTORY
+            self._history[index] = self.sensor_distances
+            self._history_times[index] = self.fsm.clock()
+            self._history_count += 1
+    
+    def _distances_ago(self, seconds):
+        """
+        seconds 전 무렵의 센서 샘플 (그 시각 이전의 가장 최근 샘플, 기록이 짧으면 가장 오래된 샘플)
+        
+        Returns:
+            채널 인덱스 순서의 거리 배열 (내부 버퍼 view, 기록이 없으면 NaN)
+        """
+        if self._history_count == 0:
+            return self._history[0]
+        times = self._history_times
+        cutoff = self.fsm.clock() - seconds
+        older = np.where(times <= cutoff, times, -np.inf)
+        if np.isfinite(older.max()):
+            return self._history[older.argmax()]
+        recorded = np.where(np.isfinite(times), times, np.inf)
+        return self._history[recorded.argmin()]
     
     def read_ultrasonic_sensors(self):
         """
         초음파 센서에서 실제 데이터 읽기
         
         Returns:
-            dict: 센서 위치별 거리 데이터
+            채널 인덱스 순서의 거리 배열 (cm, 다음 읽기에서 덮어씀)
         """
-        sensor_data = {}
-        
         try:
-            for sensor_name, ultrasonic_id in self.sensor_mapping.items():
-                if ultrasonic_id in self.ultrasonic_sensors:
-                    # 실제 센서에서 데이터 읽기
-                    distance = self._read_single_sensor(ultrasonic_id)
-                    sensor_data[sensor_name] = distance
-                else:
-                    # 센서가 없으면 기본값 사용
-                    sensor_data[sensor_name] = 100
+            if self.ultrasonic_bank is not None:
+                return self.ultrasonic_bank.read()
             
-            return sensor_data
+            # 센서 5개를 같은 시점에 읽도록 버스 잠금 안에서 읽기
+            buffer = self._sensor_buffer
+            with self.bus_lock:
+                for sensor_name, ultrasonic_id in self.sensor_mapping.items():
+                    buffer[SENSOR_INDEX[sensor_name]] = self._read_single_sensor(ultrasonic_id)
+            return buffer
             
         except Exception as e:
             print(f"센서 읽기 오류: {e}")
-            # 오류 시 기본값 반환
-            return {
-                "front_right": 100,
-                "middle_left": 100,
-                "middle_right": 100,
-                "rear_left": 100,
-                "rear_right": 100
-            }
+            # 오류 시 결측(NaN) 반환 - 임의의 거리 값으로 단계 조건이 잘못 성립하지 않도록
+            self._sensor_buffer[...] = np.nan
+            return self._sensor_buffer
     
     def _read_single_sensor(self, sensor_id):
         """
@@ -205,58 +236,55 @@ class ParkingSystemController:
             sensor_id: 센서 ID
             
         Returns:
-            float: 센서 거리 (cm)
+            float: 센서 거리 (cm, 읽을 수 없으면 NaN)
         """
         try:
             if sensor_id in self.ultrasonic_sensors:
                 sensor = self.ultrasonic_sensors[sensor_id]
                 # 실제 센서 읽기 구현 (하드웨어에 따라 다름)
                 # 예: sensor.read_distance()
-                distance = sensor.read_distance() if hasattr(sensor, 'read_distance') else 100
+                distance = sensor.read_distance() if hasattr(sensor, 'read_distance') else math.nan
                 return max(0, distance)  # 음수 값 방지
             else:
-                return 100
+                return math.nan
         except Exception as e:
             print(f"센서 {sensor_id} 읽기 오류: {e}")
-            return 100
+            return math.nan
     
-    def _get_sensor_distance(self, sensor_name):
-        """센서 거리 가져오기"""
-        return self.sensor_distances.get(sensor_name, 100)
+    def _get_sensor_distance(self, channel):
+        """센서 거리 가져오기 (channel: FRONT_RIGHT 등 채널 인덱스)"""
+        return self.sensor_distances[channel]
     
     def _check_sensor_detection(self):
         """센서 감지 상태 확인 (첫 번째 정지 조건)"""
-        current_distances = {
-            "front_right": self._get_sensor_distance("front_right"),
-            "middle_right": self._get_sensor_distance("middle_right"),
-            "rear_right": self._get_sensor_distance("rear_right")
-        }
+        current = self.sensor_distances
+        previous = self.previous_distances
+        # 제어 주기가 바뀌어도 같은 의미가 되도록 tick 간 차이 대신 edge_window 전 값과 비교
+        reference = self._distances_ago(self.parking_config['edge_window'])
         
         # 각 센서별로 개별적으로 작아졌다가 커지는지 확인
-        for sensor_name in ["front_right", "middle_right", "rear_right"]:
-            current = current_distances[sensor_name]
-            previous = self.previous_distances[sensor_name]
-            
+        for channel in RIGHT_SENSORS:
             # 아직 감지되지 않은 센서만 확인
-            if not self.sensor_flags[sensor_name] and previous > 0:
-                if current > previous + 5:  # 5cm 이상 증가
-                    self.sensor_flags[sensor_name] = True
-                    print(f"✅ {sensor_name} 센서 감지 완료!")
+            if not self.sensor_flags[channel] and reference[channel] > 0:
+                if current[channel] > reference[channel] + 5:  # edge_window 동안 5cm 이상 증가
+                    self.sensor_flags[channel] = True
+                    print(f"✅ {SENSOR_NAMES[channel]} 센서 감지 완료!")
         
         # 모든 우측 센서가 한 번씩 작아졌다가 커졌는지 확인
-        if all(self.sensor_flags.values()) and not self.phase_states['first_stop_completed']:
+        if all(self.sensor_flags[channel] for channel in RIGHT_SENSORS) and not self.fsm.visited(ParkingPhase.FIRST_STOP):
             self.status_message = "모든 우측 센서 감지 완료! 정지 신호!"
             return True
         
-        self.previous_distances = current_distances.copy()
+        # 이후 단계(두 번째 정지, 최종 우회전)의 비교 기준 - 이 단계를 벗어나면 고정됨
+        np.copyto(previous, current, where=np.isfinite(current))  # 결측은 이전 값 유지
         return False
     
     def _check_second_stop_condition(self):
         """두 번째 정지 조건 확인"""
-        rear_right_current = self._get_sensor_distance("rear_right")
+        rear_right_current = self._get_sensor_distance(REAR_RIGHT)
         
-        if rear_right_current > 0 and self.previous_distances["rear_right"] > 0:
-            if rear_right_current > self.previous_distances["rear_right"] + 10:
+        if rear_right_current > 0 and self.previous_distances[REAR_RIGHT] > 0:
+            if rear_right_current > self.previous_distances[REAR_RIGHT] + 10:
                 self.status_message = "두 번째 정지 신호 감지!"
                 return True
         
@@ -264,7 +292,7 @@ class ParkingSystemController:
     
     def _check_backward_completion(self):
         """후진 완료 조건 확인"""
-        front_right_distance = self._get_sensor_distance("front_right")
+        front_right_distance = self._get_sensor_distance(FRONT_RIGHT)
         
         if front_right_distance <= self.parking_config['stop_distance']:
             self.status_message = "후진 완료!"
@@ -274,11 +302,11 @@ class ParkingSystemController:
     
     def _check_alignment_completion(self):
         """차량 정렬 완료 조건 확인"""
-        front_right_distance = self._get_sensor_distance("front_right")
-        rear_right_distance = self._get_sensor_distance("rear_right")
+        front_right_distance = self._get_sensor_distance(FRONT_RIGHT)
+        rear_right_distance = self._get_sensor_distance(REAR_RIGHT)
         
         # 센서 값이 유효한지 확인
-        if front_right_distance <= 0 or rear_right_distance <= 0:
+        if not (front_right_distance > 0 and rear_right_distance > 0):  # 0 이하 / NaN
             return False
         
         # front_right와 rear_right 값의 차이 계산
@@ -304,11 +332,11 @@ class ParkingSystemController:
     
     def _check_position_correction_needed(self):
         """위치 수정 필요 여부 확인"""
-        middle_right_distance = self._get_sensor_distance("middle_right")
-        middle_left_distance = self._get_sensor_distance("middle_left")
+        middle_right_distance = self._get_sensor_distance(MIDDLE_RIGHT)
+        middle_left_distance = self._get_sensor_distance(MIDDLE_LEFT)
         
         # 센서 값이 유효한지 확인
-        if middle_right_distance <= 0 and middle_left_distance <= 0:
+        if not (middle_right_distance > 0 or middle_left_distance > 0):  # 0 이하 / NaN
             self.status_message = "주차 완료!"
             return False
         
@@ -327,21 +355,42 @@ class ParkingSystemController:
             return False
     
     def _check_time_elapsed(self, start_time, duration):
-        """시간 경과 확인"""
+        """시간 경과 확인 (start_time: fsm.clock 기준)"""
         if start_time is None:
             return False
-        return (time.time() - start_time) >= duration
+        return (self.fsm.clock() - start_time) >= duration
     
-    def _set_phase(self, phase):
-        """단계 설정"""
-        self.current_phase = phase
-        self.phase_start_time = time.time()
+    def _start_timer(self):
+        """단계 타이머 시작 (오도메트리가 있으면 거리/방향 기준점도 기록)"""
+        self.fsm.start_timer()
+        self._timer_mark = self.odometry.mark() if self.odometry is not None else None
+    
+    def _check_phase_done(self, duration_key, distance_key=None, heading_key=None):
+        """
+        단계 타이머 구간 종료 확인
+        
+        distance_key / heading_key 설정값이 있고 오도메트리가 있으면 이동 거리 /
+        방향 변화로, 아니면 duration_key 시간으로 판단
+        """
+        if not self.fsm.timer_running():
+            return False
+        mark = self._timer_mark
+        if mark is not None:
+            distance = self.parking_config.get(distance_key) if distance_key else None
+            if distance is not None:
+                return self.odometry.distance_since(mark) >= distance
+            heading = self.parking_config.get(heading_key) if heading_key else None
+            if heading is not None:
+                return abs(self.odometry.heading_since(mark)) >= heading
+        return self._check_time_elapsed(self.fsm.timer_started_at, self.parking_config[duration_key])
+    
+    def _on_transition(self, previous, phase):
+        """단계 변경 알림"""
         print(f"🔄 단계 변경: {phase.name}")
     
     def _stop_vehicle(self):
-        """차량 정지"""
-        self.motor_controller.left_speed = 0
-        self.motor_controller.right_speed = 0
+        """차량 정지 (램프를 거치지 않고 즉시 0 - 정지 단계는 바로 다음 단계로 넘어가므로)"""
+        self.motor_controller.stop_now()
         self.motor_controller.stay(self.parking_config['steering_speed'])
     
     def _move_forward(self, speed=None):
@@ -381,246 +430,244 @@ class ParkingSystemController:
             self.motor_controller.stay(self.parking_config['steering_speed'])
     
     def execute_parking_cycle(self):
-        """주차 사이클 실행"""
+        """주차 사이클 실행 (현재 단계 처리기 한 번 실행)"""
         if not self.is_parking_active:
             return
         
         with self._lock:
             try:
-                if self.current_phase == ParkingPhase.WAITING:
-                    self._execute_waiting_phase()
-                elif self.current_phase == ParkingPhase.INITIAL_FORWARD:
-                    self._execute_initial_forward_phase()
-                elif self.current_phase == ParkingPhase.FIRST_STOP:
-                    self._execute_first_stop_phase()
-                elif self.current_phase == ParkingPhase.LEFT_TURN_FORWARD:
-                    self._execute_left_turn_forward_phase()
-                elif self.current_phase == ParkingPhase.SECOND_STOP:
-                    self._execute_second_stop_phase()
-                elif self.current_phase == ParkingPhase.RIGHT_TURN_BACKWARD:
-                    self._execute_right_turn_backward_phase()
-                elif self.current_phase == ParkingPhase.STRAIGHT_BACKWARD:
-                    self._execute_straight_backward_phase()
-                elif self.current_phase == ParkingPhase.ALIGNMENT:
-                    self._execute_alignment_phase()
-                elif self.current_phase == ParkingPhase.POSITION_CHECK:
-                    self._execute_position_check_phase()
-                elif self.current_phase == ParkingPhase.CORRECTION:
-                    self._execute_correction_phase()
-                elif self.current_phase == ParkingPhase.POST_CORRECTION_BACKWARD:
-                    self._execute_post_correction_backward_phase()
-                elif self.current_phase == ParkingPhase.PARKING_COMPLETE_STOP:
-                    self._execute_parking_complete_stop_phase()
-                elif self.current_phase == ParkingPhase.FINAL_FORWARD:
-                    self._execute_final_forward_phase()
-                elif self.current_phase == ParkingPhase.COMPLETED:
-                    self._execute_completed_phase()
-                    
+                self.fsm.tick()
             except Exception as e:
                 print(f"❌ 주차 실행 중 오류: {e}")
-                self.stop_parking()
-    
-    def _execute_waiting_phase(self):
-        """대기 단계 실행"""
-        if not self.phase_states['initial_forward_started']:
-            self._set_phase(ParkingPhase.INITIAL_FORWARD)
-            self.phase_states['initial_forward_started'] = True
-    
-    def _execute_initial_forward_phase(self):
-        """초기 전진 단계 실행"""
+                self._stop_parking_locked()
+            self._publish_status()
+    
+    def _register_phases(self):
+        """단계별 진입 / 주기 / 종료 처리기와 전이 조건 등록"""
+        P = ParkingPhase
+        always = lambda: True
+        fsm = self.fsm
+        fsm.register(P.WAITING,
+                     transitions=[(always, P.INITIAL_FORWARD)])
+        fsm.register(P.INITIAL_FORWARD,
+                     on_tick=self._initial_forward_tick,
+                     transitions=[(self._check_sensor_detection, P.FIRST_STOP)])
+        fsm.register(P.FIRST_STOP,
+                     on_enter=self._first_stop_enter,
+                     transitions=[(always, P.LEFT_TURN_FORWARD)])
+        fsm.register(P.LEFT_TURN_FORWARD,
+                     on_enter=self._left_turn_forward_enter,
+                     transitions=[(self._check_second_stop_condition, P.SECOND_STOP)])
+        fsm.register(P.SECOND_STOP,
+                     on_enter=self._second_stop_enter,
+                     transitions=[(always, P.RIGHT_TURN_BACKWARD)])
+        fsm.register(P.RIGHT_TURN_BACKWARD,
+                     on_enter=self._right_turn_backward_enter,
+                     on_tick=self._right_turn_backward_tick,
+                     transitions=[(self._check_backward_completion, P.STRAIGHT_BACKWARD)])
+        fsm.register(P.STRAIGHT_BACKWARD,
+                     on_enter=self._straight_backward_enter,
+                     transitions=[(lambda: self._check_phase_done('straight_backward_duration',
+                                                                  distance_key='straight_backward_distance'),
+                                   P.ALIGNMENT)])
+        fsm.register(P.ALIGNMENT,
+                     on_tick=self._alignment_tick,
+                     on_exit=self._stop_vehicle,
+                     transitions=[(self._check_alignment_completion, P.POSITION_CHECK)])
+        fsm.register(P.POSITION_CHECK,
+                     transitions=[(self._check_position_correction_needed, P.CORRECTION),
+                                  (always, P.PARKING_COMPLETE_STOP)])
+        fsm.register(P.CORRECTION,
+                     on_enter=self._correction_enter,
+                     on_exit=self._stop_vehicle,
+                     transitions=[(lambda: self._check_phase_done('correction_duration',
+                                                                  distance_key='correction_distance'),
+                                   P.POST_CORRECTION_BACKWARD)])
+        fsm.register(P.POST_CORRECTION_BACKWARD,
+                     on_enter=self._post_correction_backward_enter,
+                     on_tick=self._post_correction_backward_tick,
+                     on_exit=self._post_correction_backward_exit,
+                     transitions=[(self._additional_backward_done, P.PARKING_COMPLETE_STOP)])
+        fsm.register(P.PARKING_COMPLETE_STOP,
+                     on_enter=self._parking_complete_stop_enter,
+                     transitions=[(lambda: self._check_phase_done('parking_stop_duration'), P.FINAL_FORWARD)])
+        fsm.register(P.FINAL_FORWARD,
+                     on_enter=self._final_forward_enter,
+                     on_tick=self._final_forward_tick,
+                     on_exit=self._final_forward_exit,
+                     transitions=[(self._final_right_turn_done, P.COMPLETED)])
+        fsm.register(P.COMPLETED,
+                     on_enter=self._completed_enter)
+    
+    def _initial_forward_tick(self):
+        """초기 전진"""
         self._move_forward()
         self._straight_steering()
         self.status_message = "똑바로 전진 중..."
-        
-        if self._check_sensor_detection():
-            self._set_phase(ParkingPhase.FIRST_STOP)
     
-    def _execute_first_stop_phase(self):
-        """첫 번째 정지 단계 실행"""
+    def _first_stop_enter(self):
+        """첫 번째 정지"""
         self._stop_vehicle()
-        self.phase_states['first_stop_completed'] = True
         self.status_message = "첫 번째 정지 완료"
-        self._set_phase(ParkingPhase.LEFT_TURN_FORWARD)
     
-    def _execute_left_turn_forward_phase(self):
-        """좌회전 전진 단계 실행"""
-        if not self.phase_states['left_turn_started']:
-            self._turn_left()
-            self._move_forward()
-            self.phase_states['left_turn_started'] = True
-            self.status_message = "왼쪽 조향 전진 중..."
-        
-        if self._check_second_stop_condition():
-            self._set_phase(ParkingPhase.SECOND_STOP)
+    def _left_turn_forward_enter(self):
+        """좌회전 전진 시작"""
+        self._turn_left()
+        self._move_forward()
+        self.status_message = "왼쪽 조향 전진 중..."
     
-    def _execute_second_stop_phase(self):
-        """두 번째 정지 단계 실행"""
+    def _second_stop_enter(self):
+        """두 번째 정지"""
         self._stop_vehicle()
-        self.phase_states['second_stop_completed'] = True
         self.status_message = "두 번째 정지 완료"
-        self._set_phase(ParkingPhase.RIGHT_TURN_BACKWARD)
-    
-    def _execute_right_turn_backward_phase(self):
-        """우회전 후진 단계 실행 - 조향각 점진적 조정 추가"""
-        if not self.phase_states['right_turn_started']:
-            self._turn_right()
-            self._move_backward()
-            self.phase_states['right_turn_started'] = True
-            self.backward_start_time = time.time()
-            self.status_message = "오른쪽 조향 후진 중..."
-        
-        # 조향각 점진적 조정 (시뮬레이션과 동일)
-        if self.backward_start_time is not None:
-            elapsed_time = time.time() - self.backward_start_time
-            if elapsed_time < 2.0:
-                # 2초에 걸쳐 조향각을 13도에서 0도로 줄임
-                steering_reduction = (elapsed_time / 2.0) * self.parking_config['right_turn_angle']
-                current_steering = max(0, self.parking_config['right_turn_angle'] - steering_reduction)
-                
-                # 조향각에 따른 조향 설정
-                if current_steering > 0:
-                    self._turn_right()  # 우회전 유지
-                else:
-                    self._straight_steering()  # 직진으로 전환
-                
-                self.status_message = f"조향각 점진적 조정 중... ({current_steering:.1f}도)"
-            else:
-                self._straight_steering()  # 2초 후 직진으로 전환
-        
-        if self._check_backward_completion():
-            self._set_phase(ParkingPhase.STRAIGHT_BACKWARD)
-    
-    def _execute_straight_backward_phase(self):
-        """정방향 후진 단계 실행"""
-        if not self.phase_states['straight_backward_started']:
-            self._straight_steering()
-            self._move_backward()
-            self.phase_states['straight_backward_started'] = True
-            self.straight_backward_start_time = time.time()
-            self.status_message = "정방향 후진 중..."
-        
-        if self._check_time_elapsed(self.straight_backward_start_time, 
-                                  self.parking_config['straight_backward_duration']):
-            self._set_phase(ParkingPhase.ALIGNMENT)
-    
-    def _execute_alignment_phase(self):
-        """정렬 단계 실행"""
-        if not self.phase_states['alignment_completed']:
-            self._move_backward()
-            self.status_message = "차량 정렬 중..."
-        
-        if self._check_alignment_completion():
-            self.phase_states['alignment_completed'] = True
-            self._stop_vehicle()
-            self._set_phase(ParkingPhase.POSITION_CHECK)
     
-    def _execute_position_check_phase(self):
-        """위치 확인 단계 실행"""
-        if self._check_position_correction_needed():
-            self._set_phase(ParkingPhase.CORRECTION)
-        else:
-            self._set_phase(ParkingPhase.PARKING_COMPLETE_STOP)
-    
-    def _execute_correction_phase(self):
-        """수정 단계 실행"""
-        if not self.phase_states['correction_started']:
-            self.correction_start_time = time.time()
-            self.phase_states['correction_started'] = True
-            self._move_forward()
+    def _right_turn_backward_enter(self):
+        """우회전 후진 시작"""
+        self._turn_right()
+        self._move_backward()
+        self.status_message = "오른쪽 조향 후진 중..."
+    
+    def _right_turn_backward_tick(self):
+        """우회전 후진 - 조향각 점진적 조정 (시뮬레이션과 동일)"""
+        elapsed_time = self.fsm.elapsed()
+        if elapsed_time < 2.0:
+            # 2초에 걸쳐 조향각을 13도에서 0도로 줄임
+            steering_reduction = (elapsed_time / 2.0) * self.parking_config['right_turn_angle']
+            current_steering = max(0, self.parking_config['right_turn_angle'] - steering_reduction)
             
-            if "좌측으로 치우침" in self.status_message:
-                self._turn_right()
+            # 조향각에 따른 조향 설정
+            if current_steering > 0:
+                self._turn_right()  # 우회전 유지
             else:
-                self._turn_left()
-        
-        if self._check_time_elapsed(self.correction_start_time, 
-                                  self.parking_config['correction_duration']):
-            self.phase_states['correction_completed'] = True
-            self._stop_vehicle()
-            self._set_phase(ParkingPhase.POST_CORRECTION_BACKWARD)
+                self._straight_steering()  # 직진으로 전환
+            
+            self.status_message = f"조향각 점진적 조정 중... ({current_steering:.1f}도)"
+        else:
+            self._straight_steering()  # 2초 후 직진으로 전환
     
-    def _execute_post_correction_backward_phase(self):
-        """수정 후 후진 단계 실행 - 추가 후진 시간 로직 추가"""
-        if not self.phase_states['post_correction_backward_started']:
-            self._straight_steering()
-            self._move_backward()
-            self.phase_states['post_correction_backward_started'] = True
-            self.post_correction_backward_start_time = time.time()
-            self.status_message = "수정 후 정방향 후진 중..."
-        
-        # front_right 센서 거리 확인
-        front_right_distance = self._get_sensor_distance("front_right")
+    def _straight_backward_enter(self):
+        """정방향 후진 시작"""
+        self._straight_steering()
+        self._move_backward()
+        self._start_timer()
+        self.status_message = "정방향 후진 중..."
+    
+    def _alignment_tick(self):
+        """정렬 중 후진"""
+        self._move_backward()
+        self.status_message = "차량 정렬 중..."
+    
+    def _correction_enter(self):
+        """수정 주행 시작 (치우친 반대쪽으로 조향하며 전진)"""
+        self._start_timer()
+        self._move_forward()
         
-        # front_right가 40cm 이하가 되면 추가 후진 시작 시간 기록
-        if front_right_distance <= self.parking_config['stop_distance']:
-            if self.additional_backward_start_time is None:
-                self.additional_backward_start_time = time.time()
-                self.status_message = "front_right 40cm 이하! 추가 정방향 후진 시작..."
-            elif self._check_time_elapsed(self.additional_backward_start_time, 
-                                        self.parking_config['additional_backward_duration']):
-                self._stop_vehicle()
-                self.status_message = "수정 후 정방향 후진 완료!"
-                self._set_phase(ParkingPhase.PARKING_COMPLETE_STOP)
-    
-    def _execute_parking_complete_stop_phase(self):
-        """주차 완료 정지 단계 실행"""
-        if not self.phase_states['parking_completion_stop_started']:
-            self._stop_vehicle()
-            self.phase_states['parking_completion_stop_started'] = True
-            self.parking_completion_stop_start_time = time.time()
-            self.status_message = "주차 완료! 2초 정지 중..."
-        
-        if self._check_time_elapsed(self.parking_completion_stop_start_time, 
-                                  self.parking_config['parking_stop_duration']):
-            self._set_phase(ParkingPhase.FINAL_FORWARD)
-    
-    def _execute_final_forward_phase(self):
-        """최종 전진 단계 실행 - 우회전 로직 완전 구현"""
-        if not self.phase_states['parking_completion_forward_started']:
-            self._straight_steering()
-            self._move_forward()
-            self.phase_states['parking_completion_forward_started'] = True
-            self.status_message = "최종 정방향 주행 중..."
-        
-        # rear_right 갑작스러운 증가 감지
-        rear_right_current = self._get_sensor_distance("rear_right")
-        if (self.previous_distances["rear_right"] > 0 and 
-            rear_right_current > self.previous_distances["rear_right"] + 15):
-            
-            # 우회전 시작
-            if not self.phase_states['right_turn_after_increase_started']:
-                self.right_turn_after_increase_start_time = time.time()
-                self.phase_states['right_turn_after_increase_started'] = True
-                self._turn_right()  # 우회전 시작
-                self.status_message = "오른쪽 조향 중..."
-            
-            # 우회전 완료 확인
-            elif self._check_time_elapsed(self.right_turn_after_increase_start_time, 
-                                        self.parking_config['right_turn_duration']):
-                self._straight_steering()  # 직진으로 복귀
-                self.status_message = "오른쪽 조향 완료! 정방향 주행 시작..."
-                self._set_phase(ParkingPhase.COMPLETED)
-    
-    def _execute_completed_phase(self):
-        """완료 단계 실행"""
+        if "좌측으로 치우침" in self.status_message:
+            self._turn_right()
+        else:
+            self._turn_left()
+    
+    def _post_correction_backward_enter(self):
+        """수정 후 정방향 후진 시작"""
+        self._straight_steering()
+        self._move_backward()
+        self.status_message = "수정 후 정방향 후진 중..."
+    
+    def _post_correction_backward_tick(self):
+        """front_right가 정지 거리 이하가 되면 추가 후진 타이머 시작"""
+        if (self._get_sensor_distance(FRONT_RIGHT) <= self.parking_config['stop_distance']
+                and not self.fsm.timer_running()):
+            self._start_timer()
+            self.status_message = "front_right 40cm 이하! 추가 정방향 후진 시작..."
+    
+    def _additional_backward_done(self):
+        """추가 후진 완료 조건"""
+        return (self._get_sensor_distance(FRONT_RIGHT) <= self.parking_config['stop_distance']
+                and self._check_phase_done('additional_backward_duration',
+                                           distance_key='additional_backward_distance'))
+    
+    def _post_correction_backward_exit(self):
+        self._stop_vehicle()
+        self.status_message = "수정 후 정방향 후진 완료!"
+    
+    def _parking_complete_stop_enter(self):
+        """주차 완료 정지"""
+        self._stop_vehicle()
+        self._start_timer()
+        self.status_message = "주차 완료! 2초 정지 중..."
+    
+    def _final_forward_enter(self):
+        """최종 정방향 주행 시작"""
+        self._straight_steering()
+        self._move_forward()
+        self.status_message = "최종 정방향 주행 중..."
+    
+    def _rear_right_increased(self):
+        """rear_right 갑작스러운 증가 감지"""
+        rear_right_current = self._get_sensor_distance(REAR_RIGHT)
+        return (self.previous_distances[REAR_RIGHT] > 0 and 
+                rear_right_current > self.previous_distances[REAR_RIGHT] + 15)
+    
+    def _final_forward_tick(self):
+        """rear_right가 갑자기 커지면 우회전 시작"""
+        if self._rear_right_increased() and not self.fsm.timer_running():
+            self._start_timer()
+            self._turn_right()
+            self.status_message = "오른쪽 조향 중..."
+    
+    def _final_right_turn_done(self):
+        """최종 우회전 완료 조건"""
+        return (self._rear_right_increased()
+                and self._check_phase_done('right_turn_duration', heading_key='right_turn_heading'))
+    
+    def _final_forward_exit(self):
+        self._straight_steering()  # 직진으로 복귀
+        self.status_message = "오른쪽 조향 완료! 정방향 주행 시작..."
+    
+    def _completed_enter(self):
+        """완료"""
         self._stop_vehicle()
         self.parking_completed = True
         self.is_parking_active = False
         self.status_message = "주차 완료!"
         print("🎉 주차 완료!")
     
+    def get_transition_history(self):
+        """최근 단계 전이 기록 [(시각, 이전 단계 이름, 다음 단계 이름), ...]"""
+        return [(t, previous.name if previous is not None else None, phase.name)
+                for t, previous, phase in self.fsm.history()]
+    
+    def _publish_status(self):
+        """
+        현재 상태 스냅샷 게시 (self._lock을 잡은 상태 또는 초기화 중에 호출)
+        
+        매번 새 읽기 전용 딕셔너리를 만들어 속성 하나에 대입하므로, 조회하는 쪽은
+        잠금 없이 항상 한 시점의 일관된 상태를 읽는다.
+        """
+        self._status_sequence += 1
+        self._status = MappingProxyType({
+            'sequence': self._status_sequence,
+            'published_at': time.perf_counter(),
+            'phase': self.current_phase.name,
+            'phase_number': self.current_phase.value,
+            'phase_elapsed': self.fsm.elapsed(),
+            'transitions': self.fsm.transitions,
+            'status_message': self.status_message,
+            'is_active': self.is_parking_active,
+            'is_completed': self.parking_completed,
+            'sensor_distances': dict(zip(SENSOR_NAMES, self.sensor_distances.tolist())),
+            'sensor_flags': {SENSOR_NAMES[channel]: bool(self.sensor_flags[channel])
+                             for channel in RIGHT_SENSORS},
+            'pose': self.odometry.pose() if self.odometry is not None else None
+        })
+    
     def get_status(self):
-        """현재 상태 반환"""
-        with self._lock:
-            return {
-                'phase': self.current_phase.name,
-                'phase_number': self.current_phase.value,
-                'status_message': self.status_message,
-                'is_active': self.is_parking_active,
-                'is_completed': self.parking_completed,
-                'sensor_distances': self.sensor_distances.copy(),
-                'sensor_flags': self.sensor_flags.copy()
-            }
+        """
+        현재 상태 반환 (마지막으로 게시된 스냅샷, 제어 락을 잡지 않음)
+        
+        주차 중에는 제어 주기마다 갱신되며, published_at / sequence로 게시 시점을 알 수 있다.
+        """
+        return dict(self._status)
     
     def get_parking_config(self):
         """주차 설정 반환"""
@@ -630,13 +677,16 @@ class ParkingSystemController:
         """주차 설정 업데이트"""
         with self._lock:
             self.parking_config.update(new_config)
+            if 'speed_slew_rate' in new_config and self.motor_controller.speed_ramp is not None:
+                self.motor_controller.speed_ramp.slew_rate = new_config['speed_slew_rate']
     
     def emergency_stop(self):
         """비상 정지"""
         with self._lock:
             self._stop_vehicle()
-            self.stop_parking()
+            self._stop_parking_locked()
             self.status_message = "비상 정지!"
+            self._publish_status()
             print("🚨 비상 정지!")
     
     def reset_system(self):
@@ -645,12 +695,11 @@ class ParkingSystemController:
             self._stop_vehicle()
             self.is_parking_active = False
             self.parking_completed = False
-            self.current_phase = ParkingPhase.WAITING
             self.status_message = "시스템 리셋됨"
             self._reset_phase_states()
             
             # 센서 플래그 초기화
-            for key in self.sensor_flags:
-                self.sensor_flags[key] = False
+            self.sensor_flags[...] = False
+            self._publish_status()
             
             print("🔄 시스템 리셋 완료") 
@@ -0,0 +1,116 @@
+# Copyright (c) 2024 Sungkyunkwan University AutomationLab
+#
+# Authors:
+# - Gyuhyeon Hwang <rbgus7080@g.skku.edu>, Hobin Oh <hobin0676@daum.net>, Minkwan Choi <arbong97@naver.com>, Hyeonjin Sim <nufxwms@naver.com>
+# - url: https://micro.skku.ac.kr/micro/index.do
+
+import time
+import threading
+
+
+class SpeedRamp:
+    """
+    구동 모터 속도 가감속 제한기
+
+    호출하는 쪽은 목표 속도만 바꾸고 바로 돌아가며, 타이머 스레드가 주기마다
+    현재 속도를 slew_rate(%/초) 이내로 목표 쪽으로 옮겨 MotorController에 쓴다.
+    전진/후진 전환도 0을 거쳐 연속적으로 바뀐다. stop_now()는 램프 없이 즉시 정지한다.
+    """
+
+    def __init__(self, motor_controller, slew_rate=150.0, period=0.01):
+        """
+        Args:
+            motor_controller: MotorController (set_left_speed / set_right_speed 사용)
+            slew_rate: 최대 속도 변화율 (%/초)
+            period: 갱신 주기 (초)
+        """
+        self.motor_controller = motor_controller
+        self.slew_rate = slew_rate
+        self.period = period
+
+        self.target_left = 0.0
+        self.target_right = 0.0
+        self.current_left = 0.0
+        self.current_right = 0.0
+        self._applied = (0, 0)
+
+        self.running = False
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def set_left_target(self, speed):
+        self.target_left = float(speed)
+
+    def set_right_target(self, speed):
+        self.target_right = float(speed)
+
+    def set_target(self, left, right):
+        """좌/우 목표 속도 설정 (-100 ~ 100)"""
+        self.target_left = float(left)
+        self.target_right = float(right)
+
+    def at_target(self):
+        """현재 속도가 목표에 도달했는지 여부"""
+        return self.current_left == self.target_left and self.current_right == self.target_right
+
+    def start(self):
+        """램프 스레드 시작"""
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """램프 스레드 정지 (모터는 즉시 정지)"""
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.stop_now()
+
+    def stop_now(self):
+        """램프 없이 즉시 정지 (리셋 / 비상 정지용)"""
+        with self._lock:
+            self.target_left = self.target_right = 0.0
+            self.current_left = self.current_right = 0.0
+            self.motor_controller.set_left_speed(0)
+            self.motor_controller.set_right_speed(0)
+            self._applied = (0, 0)
+
+    @staticmethod
+    def _approach(current, target, max_step):
+        if target > current:
+            return min(target, current + max_step)
+        return max(target, current - max_step)
+
+    def _apply(self):
+        """정수 속도가 바뀐 쪽만 모터에 쓰기"""
+        left = int(round(self.current_left))
+        right = int(round(self.current_right))
+        if left != self._applied[0]:
+            self.motor_controller.set_left_speed(left)
+        if right != self._applied[1]:
+            self.motor_controller.set_right_speed(right)
+        self._applied = (left, right)
+
+    def step(self, dt):
+        """dt초만큼 목표 쪽으로 이동"""
+        max_step = self.slew_rate * dt
+        with self._lock:
+            self.current_left = self._approach(self.current_left, self.target_left, max_step)
+            self.current_right = self._approach(self.current_right, self.target_right, max_step)
+            self._apply()
+
+    def _loop(self):
+        last = next_tick = time.perf_counter()
+        while self.running:
+            next_tick += self.period
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            now = time.perf_counter()
+            self.step(now - last)
+            last = now
+            if now - next_tick > self.period:
+                next_tick = now  # 크게 밀렸으면 주기 기준 재설정
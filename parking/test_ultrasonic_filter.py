@@ -0,0 +1,106 @@
+# Copyright (c) 2024 Sungkyunkwan University AutomationLab
+#
+# Authors:
+# - Gyuhyeon Hwang <rbgus7080@g.skku.edu>, Hobin Oh <hobin0676@daum.net>, Minkwan Choi <arbong97@naver.com>, Hyeonjin Sim <nufxwms@naver.com>
+# - url: https://micro.skku.ac.kr/micro/index.do
+
+"""UltrasonicFilter와 주차 진입 감지(거리 증가) 조건 시험 (python -m pytest)"""
+
+import numpy as np
+import pytest
+
+from ultrasonic_bank import NUM_CHANNELS, FRONT_RIGHT, MIDDLE_RIGHT, REAR_RIGHT
+from ultrasonic_filter import UltrasonicFilter
+from parking_system_controller import ParkingSystemController, ParkingPhase
+
+
+class NullMotorController:
+    speed_ramp = None
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def feed(filt, value, count, dt=0.02, start=0.0):
+    """모든 채널에 같은 값을 count번 넣고 마지막 필터 값과 다음 시각 반환"""
+    t = start
+    for _ in range(count):
+        t += dt
+        out = filt.update(np.full(NUM_CHANNELS, value, dtype=np.float64), now=t)
+    return out.copy(), t
+
+
+@pytest.mark.parametrize('opening', [0.0, 1000.0])
+def test_slot_opening_without_echo_reads_far(opening):
+    filt = UltrasonicFilter(window=5, max_cm=400.0)
+    near, t = feed(filt, 40.0, 5)
+    far, _ = feed(filt, opening, 5, start=t)
+    assert np.all(near == 40.0)
+    assert np.all(far == 400.0)
+    assert filt.get_stats()['far_readings'][FRONT_RIGHT] == 5
+
+
+def test_short_spike_and_read_error_are_rejected():
+    filt = UltrasonicFilter(window=5)
+    feed(filt, 50.0, 5)
+    for value in (0.0, np.nan, 50.0, 200.0, 50.0):
+        out = filt.update(np.full(NUM_CHANNELS, value))
+    assert np.all(out == 50.0)
+    assert filt.get_stats()['dropouts'][FRONT_RIGHT] == 1
+
+
+def test_all_read_errors_give_nan():
+    filt = UltrasonicFilter(window=3)
+    out, _ = feed(filt, np.nan, 3)
+    assert np.all(np.isnan(out))
+
+
+def test_zero_as_missing_when_disabled():
+    filt = UltrasonicFilter(window=3, zero_is_no_echo=False)
+    feed(filt, 40.0, 3)
+    out, _ = feed(filt, 0.0, 3)
+    assert np.all(np.isnan(out))
+
+
+def test_entry_edge_fires_when_slot_reads_no_echo():
+    """진입 감지: 우측 센서가 가까운 벽(40cm) 뒤 에코 없음(0)으로 바뀌면 첫 번째 정지"""
+    filt = UltrasonicFilter(window=5)
+    controller = ParkingSystemController(NullMotorController())
+    clock = [0.0]
+    controller.fsm.clock = lambda: clock[0]
+    controller.start_parking()
+
+    raw = np.full(NUM_CHANNELS, 40.0)
+    phases = []
+    for tick in range(40):
+        clock[0] += 0.02
+        if tick >= 15:
+            raw[[FRONT_RIGHT, MIDDLE_RIGHT, REAR_RIGHT]] = 0.0  # 에코 없음
+        controller.update_sensor_data(filt.update(raw, now=clock[0]))
+        controller.execute_parking_cycle()
+        phases.append(controller.current_phase)
+    assert controller.fsm.visited(ParkingPhase.FIRST_STOP)
+    assert phases.index(ParkingPhase.FIRST_STOP) < 25
+
+
+def test_restart_does_not_compare_against_previous_run():
+    """재시작 직후 첫 tick이 이전 주행의 (가까운) 기록과 비교되어 진입 감지되면 안 됨"""
+    controller = ParkingSystemController(NullMotorController())
+    clock = [0.0]
+    controller.fsm.clock = lambda: clock[0]
+
+    near = np.full(NUM_CHANNELS, 40.0)
+    far = np.full(NUM_CHANNELS, 60.0)
+    controller.start_parking()
+    for _ in range(10):
+        clock[0] += 0.02
+        controller.update_sensor_data(near)
+    controller.stop_parking()
+
+    clock[0] += 5.0
+    controller.start_parking()
+    for _ in range(3):
+        clock[0] += 0.02
+        controller.update_sensor_data(far)
+        controller.execute_parking_cycle()
+    assert not controller.fsm.visited(ParkingPhase.FIRST_STOP)
@@ -0,0 +1,92 @@
+# Copyright (c) 2024 Sungkyunkwan University AutomationLab
+#
+# Authors:
+# - Gyuhyeon Hwang <rbgus7080@g.skku.edu>, Hobin Oh <hobin0676@daum.net>, Minkwan Choi <arbong97@naver.com>, Hyeonjin Sim <nufxwms@naver.com>
+# - url: https://micro.skku.ac.kr/micro/index.do
+
+import numpy as np
+
+# 센서 채널 인덱스 (sonic_mm_0 레지스터 0x0, 0x4, 0x8, 0xc, 0x10 순서)
+FRONT_RIGHT = 0   # 전방 우측
+MIDDLE_LEFT = 1   # 중간 좌측
+MIDDLE_RIGHT = 2  # 중간 우측
+REAR_LEFT = 3     # 후방 좌측
+REAR_RIGHT = 4    # 후방 우측
+
+SENSOR_NAMES = ("front_right", "middle_left", "middle_right", "rear_left", "rear_right")
+SENSOR_INDEX = {name: index for index, name in enumerate(SENSOR_NAMES)}
+NUM_CHANNELS = len(SENSOR_NAMES)
+CHANNEL_STRIDE = 4  # 채널 간 레지스터 간격 (bytes)
+
+
+class UltrasonicBank:
+    """
+    초음파 센서 5채널 일괄 읽기
+
+    sonic_mm_0 블록 하나에 이어진 채널 레지스터를 한 번에 읽어 미리 할당한 numpy
+    배열에 담고 cm로 환산한다. MMIO가 레지스터 배열(array)을 제공하면 한 번의
+    복사로 읽고, 아니면 채널마다 read()한다. 값은 채널 인덱스 상수로 꺼낸다.
+    """
+
+    def __init__(self, mmio, cm_per_count=1.0, offset_cm=0.0, bus_lock=None):
+        """
+        Args:
+            mmio: sonic_mm_0 블록 (pynq MMIO, MmioWindow 또는 read(offset)를 제공하는 객체)
+            cm_per_count: 레지스터 값 1당 거리 (cm)
+            offset_cm: 거리 보정값 (cm)
+            bus_lock: 하드웨어 버스 잠금 (선택사항)
+        """
+        self.mmio = mmio
+        self.cm_per_count = cm_per_count
+        self.offset_cm = offset_cm
+        self.bus_lock = bus_lock
+
+        self.raw = np.zeros(NUM_CHANNELS, dtype=np.uint32)
+        self.distances = np.zeros(NUM_CHANNELS, dtype=np.float64)
+        self.samples = 0
+        self._registers = self._register_view(mmio)
+
+    @staticmethod
+    def _register_view(mmio):
+        """채널 레지스터를 가리키는 uint32 배열 (지원하지 않으면 None)"""
+        register_view = getattr(mmio, 'register_view', None)
+        if callable(register_view):
+            return register_view(NUM_CHANNELS)
+        array = getattr(mmio, 'array', None)
+        if isinstance(array, np.ndarray):
+            return array[:NUM_CHANNELS]
+        return None
+
+    def read_raw(self):
+        """전 채널 레지스터 값을 raw 배열로 읽기"""
+        if self._registers is not None:
+            np.copyto(self.raw, self._registers, casting='unsafe')
+        else:
+            read = self.mmio.read
+            for channel in range(NUM_CHANNELS):
+                self.raw[channel] = read(channel * CHANNEL_STRIDE)
+        return self.raw
+
+    def read(self):
+        """
+        전 채널 거리 읽기
+
+        Returns:
+            채널 인덱스 순서의 거리 배열 (cm, 내부 배열이므로 보관하려면 복사)
+        """
+        if self.bus_lock is not None:
+            with self.bus_lock:
+                self.read_raw()
+        else:
+            self.read_raw()
+        distances = self.distances
+        np.multiply(self.raw, self.cm_per_count, out=distances)
+        if self.offset_cm:
+            distances += self.offset_cm
+        np.maximum(distances, 0.0, out=distances)  # 음수 값 방지
+        self.samples += 1
+        return distances
+
+    def as_dict(self):
+        """마지막 거리 값을 센서 이름 딕셔너리로 반환"""
+        return dict(zip(SENSOR_NAMES, self.distances.tolist()))
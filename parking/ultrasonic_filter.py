@@ -0,0 +1,134 @@
+# Copyright (c) 2024 Sungkyunkwan University AutomationLab
+#
+# Authors:
+# - Gyuhyeon Hwang <rbgus7080@g.skku.edu>, Hobin Oh <hobin0676@daum.net>, Minkwan Choi <arbong97@naver.com>, Hyeonjin Sim <nufxwms@naver.com>
+# - url: https://micro.skku.ac.kr/micro/index.do
+
+import time
+import numpy as np
+from ultrasonic_bank import NUM_CHANNELS
+
+
+class UltrasonicFilter:
+    """
+    초음파 거리 스트리밍 필터
+
+    채널마다 최근 window개 샘플을 미리 할당한 링 버퍼에 두고 중앙값을 필터 값으로
+    쓴다. max_cm보다 먼 값과 에코가 없는 0(zero_is_no_echo)은 "멀다"는 측정으로 보고
+    max_cm로 제한한다. 그래서 주차 칸이 열려 에코가 사라져도 거리 증가 조건이 성립한다.
+    NaN(읽기 오류)과 0 < 값 < min_cm 인 샘플만 결측으로 보고 중앙값에서 빼며,
+    창 안에 유효한 샘플이 없으면 NaN을 낸다.
+    한두 샘플짜리 튐은 중앙값이 걸러 내고, 계단처럼 이어지는 변화는 window // 2 + 1
+    샘플 뒤에 그대로 반영된다. 필터 값의 변화율(cm/s)은 지수 이동 평균으로 추정한다.
+    """
+
+    def __init__(self, channels=NUM_CHANNELS, window=5, min_cm=1.0, max_cm=400.0,
+                 zero_is_no_echo=True, outlier_cm=20.0, rate_alpha=0.3):
+        """
+        Args:
+            channels: 채널 수
+            window: 중앙값 창 크기 (샘플)
+            min_cm: 최소 유효 거리 (cm, 0 < 값 < min_cm 는 결측)
+            max_cm: 최대 거리 (cm, 이보다 먼 값은 max_cm로 제한)
+            zero_is_no_echo: 0을 에코 없음(max_cm)으로 볼지 여부 (False면 결측)
+            outlier_cm: 필터 값과 이보다 크게 다른 샘플을 튐으로 집계 (통계용)
+            rate_alpha: 변화율 지수 이동 평균 계수 (0~1)
+        """
+        self.channels = channels
+        self.window = window
+        self.min_cm = min_cm
+        self.max_cm = max_cm
+        self.zero_is_no_echo = zero_is_no_echo
+        self.outlier_cm = outlier_cm
+        self.rate_alpha = rate_alpha
+
+        # 같은 샘플을 i와 i + window에 써서 최근 window개가 항상 연속 구간이 되도록 함
+        self._ring = np.full((2 * window, channels), np.nan)
+        self._scratch = np.empty((window, channels))
+        self._valid = np.empty((window, channels), dtype=np.bool_)
+        self._sample = np.empty(channels)
+        self._columns = np.arange(channels)
+        self.distances = np.full(channels, np.nan)
+        self.rates = np.zeros(channels)
+        self._previous = np.full(channels, np.nan)
+        self.reset()
+
+    def reset(self):
+        """창 / 변화율 / 통계 초기화"""
+        self._ring[...] = np.nan
+        self.distances[...] = np.nan
+        self.rates[...] = 0.0
+        self._previous[...] = np.nan
+        self._index = 0
+        self._last_time = None
+        self.samples = 0
+        self.dropouts = np.zeros(self.channels, dtype=np.int64)
+        self.far_readings = np.zeros(self.channels, dtype=np.int64)
+        self.outliers = np.zeros(self.channels, dtype=np.int64)
+
+    def update(self, sample, now=None):
+        """
+        새 샘플 한 세트 반영
+
+        Args:
+            sample: 채널 순서의 거리 배열 (cm, 결측은 NaN)
+            now: 샘플 시각 (초, None이면 perf_counter)
+        Returns:
+            채널별 필터 거리 배열 (cm, 내부 배열이므로 보관하려면 복사)
+        """
+        if now is None:
+            now = time.perf_counter()
+        current = self._sample
+        np.copyto(current, sample)
+
+        # 에코 없음(0) / max_cm 초과는 max_cm, NaN / min_cm 미만은 결측
+        with np.errstate(invalid='ignore'):
+            far = current > self.max_cm
+            if self.zero_is_no_echo:
+                far |= current == 0
+            missing = ~(far | (current >= self.min_cm))
+        current[far] = self.max_cm
+        current[missing] = np.nan
+        self.far_readings += far
+        self.dropouts += missing
+
+        # 현재 필터 값에서 크게 벗어난 샘플 집계 (중앙값이 걸러 냄)
+        with np.errstate(invalid='ignore'):
+            self.outliers += np.abs(current - self.distances) > self.outlier_cm
+
+        index = self._index
+        self._ring[index] = current
+        self._ring[index + self.window] = current
+        self._index = (index + 1) % self.window
+        self.samples += 1
+
+        # 결측을 뺀 중앙값 (NaN은 정렬 시 뒤로 감)
+        scratch = self._scratch
+        scratch[...] = self._ring[self._index:self._index + self.window]
+        scratch.sort(axis=0)
+        np.isfinite(scratch, out=self._valid)
+        counts = self._valid.sum(axis=0)
+        middle = np.maximum(counts - 1, 0) // 2
+        filtered = self.distances
+        filtered[...] = scratch[middle, self._columns]
+        filtered[counts == 0] = np.nan
+
+        # 변화율 (cm/s)
+        if self._last_time is not None:
+            dt = now - self._last_time
+            if dt > 0:
+                rate = (filtered - self._previous) / dt
+                np.copyto(self.rates, self.rates + self.rate_alpha * (rate - self.rates),
+                          where=np.isfinite(rate))
+        np.copyto(self._previous, filtered)
+        self._last_time = now
+        return filtered
+
+    def get_stats(self):
+        """샘플 수, 채널별 결측 / 먼 값(max_cm 제한) / 튐 수"""
+        return {
+            'samples': self.samples,
+            'dropouts': self.dropouts.tolist(),
+            'far_readings': self.far_readings.tolist(),
+            'outliers': self.outliers.tolist(),
+        }